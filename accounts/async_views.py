@@ -0,0 +1,36 @@
+# accounts/async_views.py
+"""
+Async login view for ASGI deployments (ASYNC_VIEWS=True, see accounts/urls.py).
+
+The password hash runs on the bounded hashing pool (accounts.hashers) so a
+login never blocks the event loop or the single thread that runs sync code
+under ASGI. Logging in and rendering reuse the sync view's helpers.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from cart.async_views import get_request_state
+from utils.i18n import ui_text
+from .hashers import aauthenticate
+from .views import already_logged_in_response, complete_login, login_form_response
+
+
+# No csrf_protect: it is not async-capable in Django 4.2, and
+# CsrfViewMiddleware already checks every POST
+async def login_view(request):
+    """Handle user login"""
+    is_authenticated, current_language = await get_request_state(request)
+
+    if is_authenticated:
+        return await sync_to_async(already_logged_in_response)(request, current_language)
+
+    if request.method == 'POST':
+        username = request.POST.get('username', '').strip()
+        password = request.POST.get('password', '').strip()
+
+        user = await aauthenticate(request, username=username, password=password)
+        if user is not None:
+            return await sync_to_async(complete_login)(request, user, current_language)
+
+        messages.error(request, ui_text('invalid_login', current_language))
+
+    return await sync_to_async(login_form_response)(request, current_language)
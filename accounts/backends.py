@@ -0,0 +1,92 @@
+# accounts/backends.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
+UserModel = get_user_model()
+
+# Accounts that share an email address are tried in this number at most
+MAX_EMAIL_MATCHES = 3
+
+
+def users_matching(identifier):
+    """
+    Accounts matching a username or an email address (case-insensitive), as
+    one query. An exact username match comes first, then the oldest account.
+    The email lookup uses the lower(email) index from accounts migration 0004.
+    """
+    users = UserModel._default_manager.all()
+    if not identifier:
+        return users.none()
+    if '@' not in identifier:
+        return users.filter(username=identifier)[:1]
+    return (
+        users.annotate(email_lower=Lower('email'))
+        .filter(Q(username=identifier) | Q(email_lower=identifier.lower()))
+        .order_by(
+            Case(When(username=identifier, then=Value(0)), default=Value(1), output_field=IntegerField()),
+            'pk',
+        )[:MAX_EMAIL_MATCHES]
+    )
+
+
+def find_user_by_email(email):
+    """
+    The oldest account with this email address (case-insensitive), or None.
+    Never matches a username; uses the lower(email) index.
+    """
+    if not email:
+        return None
+    return (
+        UserModel._default_manager.annotate(email_lower=Lower('email'))
+        .filter(email_lower=email.lower())
+        .order_by('pk')
+        .first()
+    )
+
+
+def find_users(identifier):
+    return list(users_matching(identifier))
+
+
+def find_user(identifier):
+    """The account a username or email address refers to, or None"""
+    users = find_users(identifier)
+    return users[0] if users else None
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """
+    Log in with either a username or an email address.
+
+    Authoritative for username/password logins: a failed check raises
+    PermissionDenied so ModelBackend, still listed only to keep sessions from
+    before this backend valid, does not repeat the lookup and password hash.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        users = find_users(username)
+        if not users:
+            # Run the hasher once anyway so response time does not reveal
+            # whether the account exists (same as ModelBackend)
+            UserModel().set_password(password)
+            raise PermissionDenied
+        for user in users:
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
+        raise PermissionDenied
+
+    def get_user(self, user_id):
+        # The profile comes with the user so profile and checkout pages need no extra query
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
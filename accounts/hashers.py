@@ -0,0 +1,70 @@
+# accounts/hashers.py
+"""
+Password hashers tuned from settings, and a bounded pool for hashing work.
+
+PASSWORD_HASH_POLICY in settings.py picks the hasher for new passwords
+(scrypt by default, argon2 when argon2-cffi is installed, or pbkdf2). The
+others stay listed in PASSWORD_HASHERS to verify older hashes. Django
+rehashes a password with the preferred hasher and parameters on the user's
+next successful login, so changing the policy needs no migration.
+
+Each hash is CPU-bound and scrypt/argon2 also use tens of MB, so at most
+PASSWORD_HASH_CONCURRENCY hashes run at once per process. Async code calls
+aauthenticate(), which runs authenticate() on a pool of the same size
+instead of blocking the event loop.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth import hashers
+from django.db import close_old_connections
+
+PASSWORD_HASH_CONCURRENCY = getattr(settings, 'PASSWORD_HASH_CONCURRENCY', None) or os.cpu_count() or 1
+
+_hash_slots = BoundedSemaphore(PASSWORD_HASH_CONCURRENCY)
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix='password-hash')
+
+
+class BoundedHasherMixin:
+    """Run encode() (which verify() uses too) under the per-process hashing limit"""
+
+    def encode(self, *args, **kwargs):
+        with _hash_slots:
+            return super().encode(*args, **kwargs)
+
+
+class PBKDF2PasswordHasher(BoundedHasherMixin, hashers.PBKDF2PasswordHasher):
+    iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(BoundedHasherMixin, hashers.ScryptPasswordHasher):
+    # Memory per hash is 128 * work_factor * block_size bytes (16 MB by default)
+    work_factor = getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', hashers.ScryptPasswordHasher.work_factor)
+    block_size = getattr(settings, 'PASSWORD_SCRYPT_BLOCK_SIZE', hashers.ScryptPasswordHasher.block_size)
+    parallelism = getattr(settings, 'PASSWORD_SCRYPT_PARALLELISM', hashers.ScryptPasswordHasher.parallelism)
+
+
+class Argon2PasswordHasher(BoundedHasherMixin, hashers.Argon2PasswordHasher):
+    time_cost = getattr(settings, 'PASSWORD_ARGON2_TIME_COST', hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = getattr(settings, 'PASSWORD_ARGON2_PARALLELISM', hashers.Argon2PasswordHasher.parallelism)
+
+    def verify(self, password, encoded):
+        # Argon2 verifies without going through encode()
+        with _hash_slots:
+            return super().verify(password, encoded)
+
+
+def _authenticate_in_pool(request, credentials):
+    # Pool threads keep their own database connection between logins
+    close_old_connections()
+    return authenticate(request, **credentials)
+
+
+async def aauthenticate(request=None, **credentials):
+    """authenticate() on the password hashing pool, for async views"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _authenticate_in_pool, request, credentials)
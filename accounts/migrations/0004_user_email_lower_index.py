@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import migrations
+
+INDEX_NAME = 'auth_user_email_lower_idx'
+
+
+def create_index(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    table = schema_editor.quote_name(User._meta.db_table)
+    # CONCURRENTLY keeps auth_user writable while the index builds on PostgreSQL
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f"CREATE INDEX {concurrently}IF NOT EXISTS {INDEX_NAME} ON {table} (LOWER(email))"
+    )
+
+
+def drop_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f"DROP INDEX {concurrently}IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_remove_userprofile_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Case-insensitive email lookups in accounts.backends.find_users
+        migrations.RunPython(create_index, drop_index),
+    ]
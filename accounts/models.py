@@ -37,26 +37,21 @@ class UserProfile(models.Model):
         return f"{self.user.first_name} {self.user.last_name}".strip() or self.user.username
 
 
-# Signal to create/update profile when User is created/updated
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    """Create profile when user is created"""
-    if created:
-        UserProfile.objects.create(user=instance)
-    else:
-        # Try to save profile if it exists
-        try:
-            instance.profile.save()
-        except ObjectDoesNotExist:
-            # Create profile if it doesn't exist
-            UserProfile.objects.create(user=instance)
+def get_profile(user):
+    """The user's profile, created on first use for accounts that predate profiles"""
+    try:
+        return user.profile
+    except ObjectDoesNotExist:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        user.profile = profile
+        return profile
 
 
+# Create the profile once, together with the user. Later saves of the user
+# (login() updating last_login, profile edits) never write the profile; views
+# save it themselves when they change it.
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save profile when user is saved"""
-    try:
-        instance.profile.save()
-    except ObjectDoesNotExist:
-        # Create profile if it doesn't exist
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    """Create profile when user is created"""
+    if created and not raw:
+        UserProfile.objects.create(user=instance)
@@ -0,0 +1,93 @@
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from accounts.backends import find_user
+
+
+class EmailOrUsernameBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('amina', 'Amina@Example.com', 'correct-horse-1')
+
+    def test_login_by_username_or_email_in_any_case(self):
+        for identifier in ('amina', 'amina@example.com', 'AMINA@EXAMPLE.COM'):
+            self.assertEqual(authenticate(username=identifier, password='correct-horse-1'), self.user)
+
+    def test_wrong_password_or_unknown_account(self):
+        self.assertIsNone(authenticate(username='amina@example.com', password='wrong'))
+        self.assertIsNone(authenticate(username='nobody@example.com', password='correct-horse-1'))
+
+    def test_shared_email_logs_into_the_account_whose_password_matches(self):
+        other = User.objects.create(username='amina2', email='amina@example.com', password=make_password('other-pass-2'))
+        self.assertEqual(authenticate(username='amina@example.com', password='other-pass-2'), other)
+        self.assertEqual(find_user('amina@example.com'), self.user)
+
+    def test_email_lookup_is_one_query(self):
+        with self.assertNumQueries(1):
+            find_user('amina@example.com')
+
+    def test_reset_lookup_matches_emails_only(self):
+        from accounts.backends import find_user_by_email
+
+        User.objects.create_user('bob@example.com', 'bob.smith@example.com', 'correct-horse-2')
+        self.assertEqual(find_user_by_email('AMINA@example.com'), self.user)
+        self.assertIsNone(find_user_by_email('amina'))
+        # A username that looks like an address is still not an email
+        self.assertIsNone(find_user_by_email('bob@example.com'))
+
+
+# The login limit is covered in home.tests; reruns must not hit it here
+@override_settings(RATE_LIMIT_ENABLED=False)
+class ProfileQueryCountTests(TestCase):
+    """Login and profile pages must not write or re-read the profile needlessly"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('baraka', 'baraka@example.com', 'correct-horse-2')
+
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+
+    def test_profile_created_once_with_the_user(self):
+        from accounts.models import UserProfile
+        self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
+        with self.assertNumQueries(1):
+            # last_login only: no profile write
+            self.user.save(update_fields=['last_login'])
+
+    def test_login_query_count(self):
+        # user lookup; new session (exists check, savepoint, insert, release);
+        # last_login update; session save (savepoint, update, release). No profile queries.
+        with self.assertNumQueries(9):
+            response = self.client.post(
+                '/accounts/login/', {'username': 'baraka@example.com', 'password': 'correct-horse-2'}, secure=True,
+            )
+        self.assertEqual(response.status_code, 302)
+
+    def test_profile_page_query_count(self):
+        self.client.force_login(self.user)
+        # session; user joined with profile; session save (savepoint, update, release)
+        with self.assertNumQueries(5):
+            response = self.client.get('/accounts/profile/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['profile'].user_id, self.user.pk)
+
+
+class PasswordHashingTests(TestCase):
+
+    def test_new_passwords_use_the_policy_hasher(self):
+        user = User.objects.create_user('neema', 'neema@example.com', 'correct-horse-3')
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+    def test_legacy_hash_upgraded_on_login(self):
+        from django.contrib.auth.hashers import PBKDF2PasswordHasher
+        legacy = PBKDF2PasswordHasher().encode('correct-horse-4', 'legacysalt1234', iterations=1000)
+        user = User.objects.create(username='juma', email='juma@example.com', password=legacy)
+
+        self.assertEqual(authenticate(username='juma', password='correct-horse-4'), user)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+        self.assertEqual(authenticate(username='juma', password='correct-horse-4'), user)
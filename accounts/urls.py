@@ -1,12 +1,19 @@
 # accounts/urls.py
+from django.conf import settings
 from django.urls import path
-from . import views
+from utils.lazy_views import lazy_view
+
+if getattr(settings, 'ASYNC_VIEWS', False):
+    # Password hashing off the event loop (accounts.hashers)
+    login = lazy_view('accounts.async_views.login_view', is_async=True)
+else:
+    login = lazy_view('accounts.views.login_view')
 
 urlpatterns = [
-    path('login/', views.login_view, name='login'),
-    path('register/', views.register_view, name='register'),
-    path('logout/', views.logout_view, name='logout'),
-    path('profile/', views.profile_view, name='profile'),
-    path('profile/edit/', views.edit_profile_view, name='edit_profile'),
-    path('profile/change-password/', views.change_password_view, name='change_password'),
+    path('login/', login, name='login'),
+    path('register/', lazy_view('accounts.views.register_view'), name='register'),
+    path('logout/', lazy_view('accounts.views.logout_view'), name='logout'),
+    path('profile/', lazy_view('accounts.views.profile_view'), name='profile'),
+    path('profile/edit/', lazy_view('accounts.views.edit_profile_view'), name='edit_profile'),
+    path('profile/change-password/', lazy_view('accounts.views.change_password_view'), name='change_password'),
 ]
\ No newline at end of file
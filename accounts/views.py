@@ -5,7 +5,9 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_protect
-from django.utils.translation import gettext as _
+from utils.i18n import get_language, ui_text
+from .backends import find_user_by_email
+from .models import get_profile
 from urllib.parse import urlparse
 import logging
 
@@ -42,88 +44,77 @@ def login_view(request):
     Handle user login with CSRF protection and proper redirects
     """
     # Get current language
-    current_language = request.session.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
     # If user is already logged in, redirect to home
     if request.user.is_authenticated:
-        if current_language == 'sw':
-            messages.info(request, "Tayari umeingia.")
-        else:
-            messages.info(request, "You are already logged in.")
-        
-        # Get redirect URL from various sources
-        redirect_url = request.GET.get('next') or request.POST.get('next') or \
-                      request.session.get('next_url', 'home')
-        
-        # Validate redirect URL
-        safe_redirect = is_safe_url(redirect_url)
-        if safe_redirect:
-            return redirect(safe_redirect)
-        return redirect('home')
+        return already_logged_in_response(request, current_language)
     
     # Handle POST request
     if request.method == 'POST':
         username = request.POST.get('username', '').strip()
         password = request.POST.get('password', '').strip()
-        remember_me = request.POST.get('remember_me') == 'on'
-        
-        # Check if input is email or username
-        if '@' in username:
-            try:
-                user_obj = User.objects.get(email=username)
-                username = user_obj.username
-            except User.DoesNotExist:
-                username = None
         
-        # Authenticate user
+        # Authenticate user by username or email (accounts.backends)
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
-            # Login successful
-            login(request, user)
-            
-            # Set session expiration based on remember me
-            if remember_me:
-                # 2 weeks expiration
-                request.session.set_expiry(1209600)
-            else:
-                # Session expires when browser closes
-                request.session.set_expiry(0)
-            
-            # Create profile if it doesn't exist
-            if not hasattr(user, 'profile'):
-                from .models import UserProfile
-                UserProfile.objects.get_or_create(user=user)
-            
-            # Success message
-            if current_language == 'sw':
-                messages.success(request, f"Karibu tena, {user.username}!")
-            else:
-                messages.success(request, f"Welcome back, {user.username}!")
-            
-            # Handle redirect after login
-            # Priority: 1. POST next, 2. GET next, 3. Session next_url, 4. Default home
-            redirect_url = request.POST.get('next') or request.GET.get('next') or \
-                          request.session.get('next_url', 'home')
-            
-            # Clear stored redirect URL from session
-            if 'next_url' in request.session:
-                del request.session['next_url']
-            
-            # Validate and redirect
-            safe_redirect = is_safe_url(redirect_url)
-            if safe_redirect:
-                return redirect(safe_redirect)
-            return redirect('home')
-            
-        else:
-            # Authentication failed
-            if current_language == 'sw':
-                messages.error(request, "Jina la mtumiaji au nywila sio sahihi.")
-            else:
-                messages.error(request, "Invalid username or password.")
+            return complete_login(request, user, current_language)
+        
+        # Authentication failed
+        messages.error(request, ui_text('invalid_login', current_language))
+    
+    return login_form_response(request, current_language)
+
+
+def already_logged_in_response(request, current_language):
+    """Redirect a visitor who is already logged in"""
+    messages.info(request, ui_text('already_logged_in', current_language))
+    
+    # Get redirect URL from various sources
+    redirect_url = request.GET.get('next') or request.POST.get('next') or \
+                  request.session.get('next_url', 'home')
+    
+    # Validate redirect URL
+    safe_redirect = is_safe_url(redirect_url)
+    if safe_redirect:
+        return redirect(safe_redirect)
+    return redirect('home')
+
+
+def complete_login(request, user, current_language):
+    """Log in an authenticated user and redirect to where they were going"""
+    login(request, user)
+    
+    # Set session expiration based on remember me
+    if request.POST.get('remember_me') == 'on':
+        # 2 weeks expiration
+        request.session.set_expiry(1209600)
+    else:
+        # Session expires when browser closes
+        request.session.set_expiry(0)
     
-    # GET request - show login form
+    # Success message
+    messages.success(request, ui_text('welcome_back', current_language, username=user.username))
+    
+    # Handle redirect after login
+    # Priority: 1. POST next, 2. GET next, 3. Session next_url, 4. Default home
+    redirect_url = request.POST.get('next') or request.GET.get('next') or \
+                  request.session.get('next_url', 'home')
+    
+    # Clear stored redirect URL from session
+    if 'next_url' in request.session:
+        del request.session['next_url']
+    
+    # Validate and redirect
+    safe_redirect = is_safe_url(redirect_url)
+    if safe_redirect:
+        return redirect(safe_redirect)
+    return redirect('home')
+
+
+def login_form_response(request, current_language):
+    """Show the login form"""
     # Store the redirect URL in session for POST requests
     next_url = request.GET.get('next', '')
     if next_url:
@@ -142,14 +133,11 @@ def register_view(request):
     Handle user registration with CSRF protection and proper redirects
     """
     # Get current language
-    current_language = request.session.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
     # If user is already logged in, redirect to home
     if request.user.is_authenticated:
-        if current_language == 'sw':
-            messages.info(request, "Tayari umeingia.")
-        else:
-            messages.info(request, "You are already logged in.")
+        messages.info(request, ui_text('already_logged_in', current_language))
         return redirect('home')
     
     # Handle POST request
@@ -167,40 +155,22 @@ def register_view(request):
         
         # Validation
         if not all([username, email, password1, password2]):
-            if current_language == 'sw':
-                errors.append("Tafadhali jaza sehemu zote zinazohitajika.")
-            else:
-                errors.append("Please fill in all required fields.")
+            errors.append(ui_text('required_fields', current_language))
         
         if password1 != password2:
-            if current_language == 'sw':
-                errors.append("Nywila hazifanani.")
-            else:
-                errors.append("Passwords do not match.")
+            errors.append(ui_text('passwords_mismatch', current_language))
         
         if len(password1) < 8:
-            if current_language == 'sw':
-                errors.append("Nywila lazima iwe na angalau herufi 8.")
-            else:
-                errors.append("Password must be at least 8 characters.")
+            errors.append(ui_text('password_too_short', current_language))
         
         if not agree_terms:
-            if current_language == 'sw':
-                errors.append("Lazima ukubali masharti na mashariti.")
-            else:
-                errors.append("You must agree to the terms and conditions.")
+            errors.append(ui_text('terms_required', current_language))
         
         if User.objects.filter(username=username).exists():
-            if current_language == 'sw':
-                errors.append("Jina la mtumiaji tayari limechukuliwa.")
-            else:
-                errors.append("Username already taken.")
+            errors.append(ui_text('username_taken', current_language))
         
         if User.objects.filter(email=email).exists():
-            if current_language == 'sw':
-                errors.append("Barua pepe tayari imesajiliwa.")
-            else:
-                errors.append("Email already registered.")
+            errors.append(ui_text('email_registered', current_language))
         
         # If no errors, create user
         if not errors:
@@ -214,26 +184,17 @@ def register_view(request):
                     last_name=last_name
                 )
                 
-                # Create user profile with phone number
-                from .models import UserProfile
-                profile, created = UserProfile.objects.get_or_create(
-                    user=user,
-                    defaults={'phone_number': phone_number}
-                )
-                
-                # Update phone number if profile already existed
-                if not created:
+                # The profile was created with the user (accounts.models); add the phone number
+                if phone_number:
+                    profile = get_profile(user)
                     profile.phone_number = phone_number
-                    profile.save()
+                    profile.save(update_fields=['phone_number', 'updated_at'])
                 
                 # Log the user in
                 login(request, user)
                 
                 # Success message
-                if current_language == 'sw':
-                    messages.success(request, f"Akaunti yako imeundwa kikamilifu! Karibu, {user.username}!")
-                else:
-                    messages.success(request, f"Your account has been created successfully! Welcome, {user.username}!")
+                messages.success(request, ui_text('account_created', current_language, username=user.username))
                 
                 # Handle redirect after registration
                 redirect_url = request.POST.get('next') or request.GET.get('next') or \
@@ -251,10 +212,7 @@ def register_view(request):
                 
             except Exception as e:
                 logger.error(f"Registration error: {e}")
-                if current_language == 'sw':
-                    errors.append("Hitilafu imetokea wakati wa kujisajili.")
-                else:
-                    errors.append("An error occurred during registration.")
+                errors.append(ui_text('registration_error', current_language))
                 for error in errors:
                     messages.error(request, error)
         else:
@@ -280,7 +238,7 @@ def logout_view(request):
     """
     Handle user logout with optional redirect
     """
-    current_language = request.session.get('ambertek_language', 'en')
+    current_language = get_language(request)
     username = request.user.username
     
     # Get redirect URL if provided
@@ -289,10 +247,7 @@ def logout_view(request):
     
     logout(request)
     
-    if current_language == 'sw':
-        messages.success(request, f"Umetoka kwenye akaunti yako. Kwaheri, {username}!")
-    else:
-        messages.success(request, f"You have been logged out. Goodbye, {username}!")
+    messages.success(request, ui_text('logged_out', current_language, username=username))
     
     if safe_redirect:
         return redirect(safe_redirect)
@@ -304,19 +259,16 @@ def profile_view(request):
     """
     Display user profile
     """
-    current_language = request.session.get('ambertek_language', 'en')
+    current_language = get_language(request)
     user = request.user
     
-    # Ensure profile exists
-    if not hasattr(user, 'profile'):
-        from .models import UserProfile
-        UserProfile.objects.get_or_create(user=user)
-        user.refresh_from_db()
+    # Loaded with the user by accounts.backends; created here for old accounts
+    profile = get_profile(user)
     
     context = {
         'current_language': current_language,
         'user': user,
-        'profile': user.profile,
+        'profile': profile,
     }
     return render(request, 'accounts/profile.html', context)
 
@@ -327,14 +279,11 @@ def edit_profile_view(request):
     """
     Edit user profile
     """
-    current_language = request.session.get('ambertek_language', 'en')
+    current_language = get_language(request)
     user = request.user
     
-    # Ensure profile exists
-    if not hasattr(user, 'profile'):
-        from .models import UserProfile
-        UserProfile.objects.get_or_create(user=user)
-        user.refresh_from_db()
+    # Loaded with the user by accounts.backends; created here for old accounts
+    profile = get_profile(user)
     
     if request.method == 'POST':
         # Update user info
@@ -343,44 +292,35 @@ def edit_profile_view(request):
         user_email = request.POST.get('email', user.email).strip().lower()
         
         # Update profile info
-        user.profile.phone_number = request.POST.get('phone_number', user.profile.phone_number).strip()
-        user.profile.address = request.POST.get('address', user.profile.address).strip()
-        user.profile.city = request.POST.get('city', user.profile.city).strip()
-        user.profile.region = request.POST.get('region', user.profile.region).strip()
+        profile.phone_number = request.POST.get('phone_number', profile.phone_number).strip()
+        profile.address = request.POST.get('address', profile.address).strip()
+        profile.city = request.POST.get('city', profile.city).strip()
+        profile.region = request.POST.get('region', profile.region).strip()
         
         # Handle profile picture upload
         if 'profile_picture' in request.FILES:
-            user.profile.profile_picture = request.FILES['profile_picture']
+            profile.profile_picture = request.FILES['profile_picture']
         
         # Validate email uniqueness (excluding current user)
         if user_email != user.email and User.objects.filter(email=user_email).exists():
-            if current_language == 'sw':
-                messages.error(request, "Barua pepe tayari inatumiwa na mtu mwingine.")
-            else:
-                messages.error(request, "Email is already used by another user.")
+            messages.error(request, ui_text('email_in_use', current_language))
         else:
             try:
                 user.email = user_email
-                user.save()
-                user.profile.save()
+                user.save(update_fields=['first_name', 'last_name', 'email'])
+                profile.save()
                 
-                if current_language == 'sw':
-                    messages.success(request, "Wasifu wako umesasishwa kikamilifu!")
-                else:
-                    messages.success(request, "Your profile has been updated successfully!")
+                messages.success(request, ui_text('profile_updated', current_language))
                 
                 return redirect('profile')
             except Exception as e:
                 logger.error(f"Profile update error: {e}")
-                if current_language == 'sw':
-                    messages.error(request, "Hitilafu imetokea wakati wa kusasisha wasifu.")
-                else:
-                    messages.error(request, "An error occurred while updating profile.")
+                messages.error(request, ui_text('profile_update_error', current_language))
     
     context = {
         'current_language': current_language,
         'user': user,
-        'profile': user.profile,
+        'profile': profile,
     }
     return render(request, 'accounts/edit_profile.html', context)
 
@@ -391,7 +331,7 @@ def change_password_view(request):
     """
     Change user password
     """
-    current_language = request.session.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
     if request.method == 'POST':
         old_password = request.POST.get('old_password', '').strip()
@@ -400,26 +340,17 @@ def change_password_view(request):
         
         # Check if old password is correct
         if not request.user.check_password(old_password):
-            if current_language == 'sw':
-                messages.error(request, "Nywila ya zamani sio sahihi.")
-            else:
-                messages.error(request, "Old password is incorrect.")
+            messages.error(request, ui_text('old_password_incorrect', current_language))
             return redirect('change_password')
         
         # Check if new passwords match
         if new_password1 != new_password2:
-            if current_language == 'sw':
-                messages.error(request, "Nywila mpya hazifanani.")
-            else:
-                messages.error(request, "New passwords do not match.")
+            messages.error(request, ui_text('new_passwords_mismatch', current_language))
             return redirect('change_password')
         
         # Check password strength
         if len(new_password1) < 8:
-            if current_language == 'sw':
-                messages.error(request, "Nywila mpya lazima iwe na angalau herufi 8.")
-            else:
-                messages.error(request, "New password must be at least 8 characters.")
+            messages.error(request, ui_text('new_password_too_short', current_language))
             return redirect('change_password')
         
         # Change password
@@ -431,18 +362,12 @@ def change_password_view(request):
             from django.contrib.auth import update_session_auth_hash
             update_session_auth_hash(request, request.user)
             
-            if current_language == 'sw':
-                messages.success(request, "Nywila yako imebadilishwa kikamilifu!")
-            else:
-                messages.success(request, "Your password has been changed successfully!")
+            messages.success(request, ui_text('password_changed', current_language))
             
             return redirect('profile')
         except Exception as e:
             logger.error(f"Password change error: {e}")
-            if current_language == 'sw':
-                messages.error(request, "Hitilafu imetokea wakati wa kubadilisha nywila.")
-            else:
-                messages.error(request, "An error occurred while changing password.")
+            messages.error(request, ui_text('password_change_error', current_language))
     
     context = {
         'current_language': current_language,
@@ -454,24 +379,18 @@ def password_reset_request(request):
     """
     Handle password reset request
     """
-    current_language = request.session.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
     if request.method == 'POST':
         email = request.POST.get('email', '').strip().lower()
         
-        try:
-            user = User.objects.get(email=email)
+        user = find_user_by_email(email)
+        if user is not None:
             # Here you would send a password reset email
             # For now, just show a message
-            if current_language == 'sw':
-                messages.info(request, f"Ujumbe wa kuweka upya nywila umetumwa kwa {email}.")
-            else:
-                messages.info(request, f"Password reset email sent to {email}.")
-        except User.DoesNotExist:
-            if current_language == 'sw':
-                messages.error(request, "Barua pepe hii haijasajiliwa.")
-            else:
-                messages.error(request, "This email is not registered.")
+            messages.info(request, ui_text('password_reset_sent', current_language, email=email))
+        else:
+            messages.error(request, ui_text('email_not_registered', current_language))
     
     context = {
         'current_language': current_language,
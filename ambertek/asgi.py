@@ -3,6 +3,11 @@ ASGI config for ambertek project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it next to (or instead of) the WSGI setup with uvicorn workers, and set
+ASYNC_VIEWS=True so the cart and checkout endpoints use their async views:
+
+    ASYNC_VIEWS=True gunicorn ambertek.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
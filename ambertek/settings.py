@@ -3,6 +3,7 @@ Django settings for ambertek project.
 """
 
 import os
+import importlib.util
 from pathlib import Path
 import dj_database_url
 from dotenv import load_dotenv
@@ -50,12 +51,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # ADD THIS for static files
+    'utils.compression.CompressionMiddleware',  # Brotli/gzip for pages and JSON
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',  # For language support
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'utils.rate_limit.RateLimitMiddleware',  # Token buckets for login, registration and checkout
     'django.contrib.messages.middleware.MessageMiddleware',
+    'utils.page_cache.PageCacheMiddleware',  # Catalogue pages served from cache as shared shells
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'cart.middleware.CartAccessMiddleware',  
 ]
@@ -75,6 +79,10 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 # Add custom context processor for cart count
                 'cart.context_processors.cart_items_count',
+                # Shared en/sw UI string catalogue as {{ ui.<key> }}
+                'utils.i18n.ui_strings',
+                # page_shell flag for pages shared through the page cache
+                'utils.page_cache.page_shell',
             ],
         },
     },
@@ -111,6 +119,41 @@ else:
         }
     }
 
+# Two-tier cache (utils.tiered_cache): a per-process LRU in front of a cache
+# shared by all workers - Redis when CACHE_URL is set, otherwise files in CACHE_DIR
+CACHE_URL = os.environ.get('CACHE_URL')
+
+if CACHE_URL:
+    CACHE_L2 = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+    }
+else:
+    CACHE_L2 = {
+        'BACKEND': 'utils.tiered_cache.CountingFileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', '/tmp/ambertek-cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 5000)),
+        },
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'utils.tiered_cache.TieredCache',
+        'LOCATION': 'default',
+        'KEY_PREFIX': 'ambertek',
+        # Bump to abandon every shared entry, e.g. when cached model fields change
+        'VERSION': int(os.environ.get('CACHE_VERSION', 1)),
+        'OPTIONS': {
+            'L2': CACHE_L2,
+            'L1_MAX_ENTRIES': int(os.environ.get('CACHE_L1_MAX_ENTRIES', 1000)),
+            'L1_TIMEOUT': int(os.environ.get('CACHE_L1_TIMEOUT', 60)),
+            # Longest delay before an invalidation reaches every worker
+            'SYNC_INTERVAL': float(os.environ.get('CACHE_SYNC_INTERVAL', 1.0)),
+        },
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -168,9 +211,37 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
+    # Username or email, case-insensitive email lookup
+    'accounts.backends.EmailOrUsernameBackend',
+    # Kept so sessions created before the backend above stay valid
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Password hashing (accounts.hashers): scrypt, argon2 (needs argon2-cffi,
+# otherwise pbkdf2 is used) or pbkdf2. New passwords use the policy's hasher;
+# older hashes still verify and are upgraded on the user's next login.
+PASSWORD_HASH_POLICY = os.environ.get('PASSWORD_HASH_POLICY', 'scrypt')
+if PASSWORD_HASH_POLICY == 'argon2' and importlib.util.find_spec('argon2') is None:
+    PASSWORD_HASH_POLICY = 'pbkdf2'
+
+PASSWORD_HASHER_CLASSES = {
+    'scrypt': 'accounts.hashers.ScryptPasswordHasher',
+    'argon2': 'accounts.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'accounts.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASH_POLICY]] + [
+    hasher for policy, hasher in PASSWORD_HASHER_CLASSES.items() if policy != PASSWORD_HASH_POLICY
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Hasher parameters (defaults are Django's)
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2**14))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 65536))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1))
+# Hashes running at once per process (default: CPU count)
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 0)) or None
+
 # Login/Logout URLs
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'  # Redirect to home after login
@@ -181,6 +252,8 @@ SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds (1209600)
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False  # Keep session alive after browser close
 SESSION_SAVE_EVERY_REQUEST = True  # Save session on every request
+# Compact msgpack encoding; sessions saved as JSON before the switch still load
+SESSION_SERIALIZER = 'utils.session_serializer.CompactSessionSerializer'
 
 # CSRF protection
 CSRF_COOKIE_SECURE = os.environ.get('CSRF_COOKIE_SECURE', 'False') == 'True'
@@ -332,9 +405,85 @@ else:
 # Cart session key
 CART_SESSION_ID = 'cart'
 
+# Serve cart mutations and order placement from async views (for ASGI/uvicorn)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
+# Catalogue cache lifetime in seconds (entries are also invalidated on change)
+CATALOGUE_CACHE_TIMEOUT = int(os.environ.get('CATALOGUE_CACHE_TIMEOUT', 300))
+
+# Response compression (utils.compression): smallest body worth compressing,
+# Brotli quality / gzip level for dynamic responses, and HTML whitespace minification
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+HTML_MINIFY = os.environ.get('HTML_MINIFY', 'True') == 'True'
+# Never minified (pages with form fields are skipped as well)
+HTML_MINIFY_EXCLUDE = ['/admin/']
+
+# Full-page cache for anonymous catalogue pages (utils.page_cache)
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'True') == 'True'
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', CATALOGUE_CACHE_TIMEOUT))
+
+# Bulk product import (products.importer): rows per transaction, where image
+# files named in catalogue files are read from, and stored image sizes in pixels
+PRODUCT_IMPORT_BATCH_SIZE = int(os.environ.get('PRODUCT_IMPORT_BATCH_SIZE', 1000))
+PRODUCT_IMPORT_IMAGE_DIR = os.environ.get('PRODUCT_IMPORT_IMAGE_DIR', str(BASE_DIR / 'imports'))
+PRODUCT_IMAGE_MAX_SIZE = int(os.environ.get('PRODUCT_IMAGE_MAX_SIZE', 1600))
+PRODUCT_THUMBNAIL_SIZE = int(os.environ.get('PRODUCT_THUMBNAIL_SIZE', 400))
+
+# "Frequently bought together" (products.recommendations): products kept per
+# product, orders read per chunk by the batch job, and the fewest orders two
+# products must share before one is recommended with the other
+RECOMMENDATIONS_TOP_K = int(os.environ.get('RECOMMENDATIONS_TOP_K', 8))
+RECOMMENDATIONS_CHUNK_SIZE = int(os.environ.get('RECOMMENDATIONS_CHUNK_SIZE', 20000))
+RECOMMENDATIONS_MIN_ORDERS = int(os.environ.get('RECOMMENDATIONS_MIN_ORDERS', 2))
+
+# Best sellers and trending products (products.rankings): products per
+# section, how fast a sale's trending weight halves, how recent the last sale
+# of a trending product must be, and the date trending weights count from
+RANKING_SIZE = int(os.environ.get('RANKING_SIZE', 4))
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 72))
+TRENDING_WINDOW_DAYS = int(os.environ.get('TRENDING_WINDOW_DAYS', 14))
+TRENDING_EPOCH = os.environ.get('TRENDING_EPOCH', '2026-01-01')
+
+# Faceted product filtering (products.facets): upper bounds of the price
+# filter's buckets in TZS, and how many catalogue changes an in-memory facet
+# index catches up on one by one before it is rebuilt instead
+PRODUCT_PRICE_BUCKETS = [
+    int(bound) for bound in os.environ.get('PRODUCT_PRICE_BUCKETS', '50000,100000,250000,500000,1000000').split(',')
+]
+FACET_INCREMENTAL_LIMIT = int(os.environ.get('FACET_INCREMENTAL_LIMIT', 200))
+
 # Authentication requirements
 MIN_PASSWORD_LENGTH = 8
 MAX_LOGIN_ATTEMPTS = 5
 
+# Rate limiting (utils.rate_limit): token buckets refilled at `rate` holding
+# up to `burst` requests, one per key ('ip', or 'user' for the logged-in user)
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True') == 'True'
+# Proxies that append the client address to X-Forwarded-For (Render has one)
+RATE_LIMIT_PROXY_COUNT = int(os.environ.get('RATE_LIMIT_PROXY_COUNT', 1 if os.environ.get('RENDER') else 0))
+RATE_LIMITS = {
+    'login': {
+        'paths': [r'^/accounts/login/$'],
+        'rate': os.environ.get('RATE_LIMIT_LOGIN', '10/m'),
+        'burst': MAX_LOGIN_ATTEMPTS,
+        'keys': ['ip'],
+    },
+    'register': {
+        'paths': [r'^/accounts/register/$'],
+        'rate': os.environ.get('RATE_LIMIT_REGISTER', '10/h'),
+        'burst': 5,
+        'keys': ['ip'],
+    },
+    # Applied with @rate_limit('place_order') on the sync and async order views,
+    # so every URL that places an order is covered
+    'place_order': {
+        'rate': os.environ.get('RATE_LIMIT_PLACE_ORDER', '6/m'),
+        'burst': 3,
+        'keys': ['user'],
+    },
+}
+
 # Render-specific settings
 RENDER = True if os.environ.get('RENDER', None) else False
\ No newline at end of file
@@ -5,57 +5,34 @@ from django.shortcuts import render
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponseRedirect
+from utils.i18n import get_language, set_language as store_language, ui_text
 
-# Import views from your apps
-from products import views as product_views
-
-# Import cart views
-try:
-    from cart import views as cart_views
-except ImportError:
-    # If cart app doesn't exist yet
-    cart_views = None
-
-# Import order views
-try:
-    from orders import views as order_views
-except ImportError:
-    # If orders app doesn't exist yet
-    order_views = None
-
-# Import account views
-try:
-    from accounts import views as account_views
-except ImportError:
-    # If accounts app doesn't exist yet
-    account_views = None
+# App views are imported on first request (see utils/lazy_views.py) so a
+# cold start only loads this URLconf; missing apps fall back to a placeholder
+from utils.lazy_views import lazy_view
 
 def get_current_language(request):
-    return request.session.get('ambertek_language') or request.COOKIES.get('ambertek_language', 'en')
+    return get_language(request)
 
 def set_current_language(request, language_code):
-    if language_code in ['en', 'sw']:
-        request.session['ambertek_language'] = language_code
-        response = HttpResponseRedirect(request.META.get('HTTP_REFERER', '/'))
-        response.set_cookie('ambertek_language', language_code)
+    response = HttpResponseRedirect(request.META.get('HTTP_REFERER', '/'))
+    if store_language(request, response, language_code):
         return response
     return HttpResponseRedirect('/')
 
 def home_view(request):
     current_language = get_current_language(request)
     
-    from home.models import HomepageBanner, CategoryBanner, FeaturedProduct
-    
-    homepage_banners = HomepageBanner.objects.filter(is_active=True)
-    category_banners = CategoryBanner.objects.filter(is_active=True)
-    featured_products = FeaturedProduct.objects.filter(is_active=True)
+    from home.cache import get_homepage_content
+    from products import cache as catalogue_cache
+    from products.rankings import BEST_SELLERS, TRENDING
     
     context = {
         'cart_items_count': request.session.get('cart_items_count', 0),
         'current_language': current_language,
-        'homepage_banners': homepage_banners,
-        'category_banners': category_banners,
-        'featured_products': featured_products,
+        **get_homepage_content(),
+        'best_sellers': catalogue_cache.get_ranked_products(BEST_SELLERS),
+        'trending_products': catalogue_cache.get_ranked_products(TRENDING),
     }
     return render(request, 'index.html', context)
 
@@ -73,28 +50,33 @@ def contact_view(request):
 def products_view(request, category_id=None):
     current_language = get_current_language(request)
     
-    from products.models import Product, Category
-    products = Product.objects.filter(available=True)
-    categories = Category.objects.all()
+    from products import cache as catalogue_cache
+    categories = catalogue_cache.get_categories()
     
     active_category = None
-    active_category_name = "All Products"
+    active_category_name = ui_text('all_products', current_language)
     
     # Filter by category if category_id is provided
     if category_id:
-        from django.shortcuts import get_object_or_404
-        products = products.filter(category_id=category_id)
+        from django.http import Http404
+        category_obj = catalogue_cache.get_category(category_id)
+        if category_obj is None:
+            raise Http404("No Category matches the given query.")
         active_category = category_id
-        category_obj = get_object_or_404(Category, id=category_id)
         active_category_name = category_obj.name
     
-    # Update name for Swahili
-    if current_language == 'sw' and not category_id:
-        active_category_name = "Bidhaa Zote"
+    # Filters from the query string, counted from the in-memory facet index
+    from products.facets import filter_products
+    product_ids, facets = filter_products(request.GET, categories, category_id, current_language)
+    products = catalogue_cache.get_product_cards(product_ids)
     
+    from products.rankings import BEST_SELLERS, TRENDING
     context = {
         'products': products,
+        'best_sellers': catalogue_cache.get_ranked_products(BEST_SELLERS, category_id),
+        'trending_products': catalogue_cache.get_ranked_products(TRENDING, category_id),
         'categories': categories,
+        'facets': facets,
         'current_language': current_language,
         'cart_items_count': request.session.get('cart_items_count', 0),
         'active_category': active_category,
@@ -109,12 +91,12 @@ def placeholder_function(request, *args, **kwargs):
     messages.info(request, "This functionality is coming soon!")
     return HttpResponseRedirect('/products/')
 
-# Helper to get views safely
-def get_view(app_views, view_name):
-    """Helper to get view or placeholder"""
-    if app_views and hasattr(app_views, view_name):
-        return getattr(app_views, view_name)
-    return placeholder_function
+# Helper to get views lazily
+def get_view(module_path, view_name, async_module_path=None):
+    """Lazy view or placeholder, preferring the async version if enabled"""
+    if async_module_path and getattr(settings, 'ASYNC_VIEWS', False):
+        return lazy_view(f"{async_module_path}.{view_name}", fallback=placeholder_function, is_async=True)
+    return lazy_view(f"{module_path}.{view_name}", fallback=placeholder_function)
 
 urlpatterns = [
     # Admin
@@ -128,33 +110,36 @@ urlpatterns = [
     path('products/', products_view, name='products'),
     path('products/category/<int:category_id>/', products_view, name='products_by_category'),
     path('products/<int:product_id>/', 
-         get_view(product_views, 'product_detail'), 
+         get_view('products.views', 'product_detail'), 
          name='product_detail'),
     
     # Contact
     path('contact/', contact_view, name='contact'),
     
+    # Per-user parts of cached pages (cart count, login state, messages)
+    path('session-state.json', get_view('home.views', 'session_state'), name='session_state'),
+    
     # Accounts URLs
     path('accounts/', include('accounts.urls')),
     
     # Cart URLs
-    path('cart/add/<int:product_id>/', get_view(cart_views, 'add_to_cart'), name='add_to_cart'),
-    path('cart/', get_view(cart_views, 'cart_detail'), name='cart_detail'),
-    path('cart/remove/<int:product_id>/', get_view(cart_views, 'remove_from_cart'), name='remove_from_cart'),
-    path('cart/update/<int:product_id>/', get_view(cart_views, 'update_cart'), name='update_cart'),
-    path('cart/clear/', get_view(cart_views, 'clear_cart'), name='clear_cart'),
+    path('cart/add/<int:product_id>/', get_view('cart.views', 'add_to_cart', 'cart.async_views'), name='add_to_cart'),
+    path('cart/', get_view('cart.views', 'cart_detail'), name='cart_detail'),
+    path('cart/remove/<int:product_id>/', get_view('cart.views', 'remove_from_cart', 'cart.async_views'), name='remove_from_cart'),
+    path('cart/update/<int:product_id>/', get_view('cart.views', 'update_cart', 'cart.async_views'), name='update_cart'),
+    path('cart/clear/', get_view('cart.views', 'clear_cart', 'cart.async_views'), name='clear_cart'),
     
     # Order URLs
-    path('checkout/', get_view(order_views, 'checkout'), name='checkout'),
-    path('place-order/', get_view(order_views, 'place_order'), name='place_order'),
-    path('order/confirmation/<int:order_id>/', get_view(order_views, 'order_confirmation'), name='order_confirmation'),
-    path('order/success/<int:order_id>/', get_view(order_views, 'order_success'), name='order_success'),
-    path('order/track/<str:order_number>/', get_view(order_views, 'order_track'), name='order_track'),
+    path('checkout/', get_view('orders.views', 'checkout'), name='checkout'),
+    path('place-order/', get_view('orders.views', 'place_order', 'orders.async_views'), name='place_order'),
+    path('order/confirmation/<int:order_id>/', get_view('orders.views', 'order_confirmation'), name='order_confirmation'),
+    path('order/success/<int:order_id>/', get_view('orders.views', 'order_success'), name='order_success'),
+    path('order/track/<str:order_number>/', get_view('orders.views', 'order_track'), name='order_track'),
     
     # Email test URLs
-    path('test-email/', get_view(order_views, 'test_email'), name='test_email'),
-    path('test-email-simple/', get_view(order_views, 'test_email_simple'), name='test_email_simple'),
-    path('test-complete-email/', get_view(order_views, 'test_complete_email'), name='test_complete_email'),
+    path('test-email/', get_view('orders.views', 'test_email'), name='test_email'),
+    path('test-email-simple/', get_view('orders.views', 'test_email_simple'), name='test_email_simple'),
+    path('test-complete-email/', get_view('orders.views', 'test_complete_email'), name='test_complete_email'),
 ]
 
 if settings.DEBUG:
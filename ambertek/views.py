@@ -1,19 +1,19 @@
 from django.shortcuts import redirect
 from django.http import HttpResponseRedirect
-from django.conf import settings
 from django.utils import translation
+from utils.i18n import set_language as store_language
 
 def set_language(request, language_code):
     """
     View to set user's language preference
     """
-    if language_code in [lang[0] for lang in settings.LANGUAGES]:
-        translation.activate(language_code)
-        request.session[translation.LANGUAGE_SESSION_KEY] = language_code
-    
     # Redirect back to the previous page
     referer = request.META.get('HTTP_REFERER')
     if referer:
-        return HttpResponseRedirect(referer)
+        response = HttpResponseRedirect(referer)
     else:
-        return redirect('home')
\ No newline at end of file
+        response = redirect('home')
+    
+    if store_language(request, response, language_code):
+        translation.activate(language_code)
+    return response
\ No newline at end of file
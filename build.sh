@@ -9,4 +9,7 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 
 # Apply database migrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Wake the database and check every template compiles before going live
+python manage.py warm_caches --stage connections --stage templates --fail-on-error
\ No newline at end of file
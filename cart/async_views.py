@@ -0,0 +1,155 @@
+# cart/async_views.py
+"""
+Async versions of the cart mutation views for ASGI deployments.
+
+Enabled with ASYNC_VIEWS=True (see ambertek/urls.py). Products are loaded
+with the async ORM; the session and user are loaded once per request in a
+worker thread because Django 4.2 has no async session or auth API.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from products.models import Product
+from utils.i18n import get_language, ui_text
+from .views import add_product_to_session_cart, add_to_cart_response, cart_totals
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@sync_to_async
+def get_request_state(request):
+    """
+    Load the user and session (both may hit the database) in a worker thread.
+    Afterwards request.session and request.user are safe to use from async code.
+    """
+    return request.user.is_authenticated, get_language(request)
+
+
+def async_login_required(view):
+    """login_required for async views"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated, _ = await get_request_state(request)
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def aget_product(product_id):
+    """Async get_object_or_404 for Product"""
+    try:
+        return await Product.objects.aget(id=product_id)
+    except Product.DoesNotExist:
+        raise Http404("No Product matches the given query.")
+
+
+@async_login_required
+async def add_to_cart(request, product_id):
+    """Add a product to the cart - REQUIRES LOGIN"""
+    product = await aget_product(product_id)
+    current_language = get_language(request)
+
+    # Get quantity from request
+    if request.method == 'POST':
+        quantity = int(request.POST.get('quantity', 1))
+    else:
+        # Also check GET for direct links
+        quantity = int(request.GET.get('quantity', 1))
+
+    cart, action = add_product_to_session_cart(request, product, quantity)
+
+    success_msg = ui_text(f'cart_item_{action}', current_language, name=product.name)
+    messages.success(request, success_msg)
+
+    return add_to_cart_response(request, product_id, cart, success_msg)
+
+
+@async_login_required
+async def remove_from_cart(request, product_id):
+    """Remove a product from cart - REQUIRES LOGIN"""
+    product = await aget_product(product_id)
+
+    cart = request.session.get('cart', {})
+
+    if str(product_id) in cart:
+        del cart[str(product_id)]
+        request.session['cart'] = cart
+        request.session.modified = True
+
+        messages.success(
+            request,
+            ui_text('cart_item_removed', get_language(request), name=product.name)
+        )
+
+    return redirect('cart_detail')
+
+
+async def update_cart(request, product_id):
+    """Update quantity of a product in cart - REQUIRES LOGIN"""
+    is_authenticated, current_language = await get_request_state(request)
+    if not is_authenticated:
+        return JsonResponse({
+            'success': False,
+            'error': 'Login required',
+            'redirect': '/accounts/login/'
+        })
+
+    if request.method == 'POST':
+        try:
+            quantity = int(request.POST.get('quantity', 1))
+            product = await aget_product(product_id)
+
+            cart = request.session.get('cart', {})
+
+            if quantity > 0:
+                cart[str(product_id)]['quantity'] = quantity
+            else:
+                # If quantity is 0 or less, remove the item
+                if str(product_id) in cart:
+                    del cart[str(product_id)]
+
+            request.session['cart'] = cart
+            request.session.modified = True
+
+            # Recalculate totals with a single query
+            product_ids = [int(pid) for pid in cart if pid.isdigit()]
+            products = {p.id: p async for p in Product.objects.filter(id__in=product_ids)}
+            item_total, total, cart_count = cart_totals(cart, products, product_id, quantity)
+
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({
+                    'success': True,
+                    'item_total': item_total,
+                    'cart_total': total,
+                    'cart_count': len(cart),
+                    'items_count': cart_count
+                })
+            else:
+                messages.success(
+                    request,
+                    ui_text('cart_quantity_updated', current_language, name=product.name)
+                )
+
+        except (ValueError, KeyError) as e:
+            logger.error(f"Error updating cart: {e}")
+            messages.error(request, ui_text('cart_update_error', current_language))
+
+    return redirect('cart_detail')
+
+
+@async_login_required
+async def clear_cart(request):
+    """Clear all items from cart - REQUIRES LOGIN"""
+    if 'cart' in request.session:
+        del request.session['cart']
+        request.session.modified = True
+
+        messages.success(request, ui_text('cart_cleared', get_language(request)))
+
+    return redirect('cart_detail')
@@ -18,6 +18,9 @@ def cart_items_count(request):
 # cart/context_processors.py
 def cart_items_count(request):
     """Add cart items count to all templates"""
+    if getattr(request, 'page_shell', False):
+        # Shared cached page: the count is filled in client-side
+        return {'cart_items_count': 0}
     cart = request.session.get('cart', {})
     count = 0
     for item in cart.values():
@@ -1,29 +1,48 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.urls import reverse
+from utils.i18n import get_language, ui_text
 
 class CartAccessMiddleware:
+    # Works in both WSGI and ASGI stacks without forcing a sync/async switch
+    sync_capable = True
+    async_capable = True
+    
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
     
     def __call__(self, request):
-        # Check if user is trying to access checkout without login
-        if request.path.startswith('/cart/checkout') or request.path.startswith('/orders/'):
-            if not request.user.is_authenticated:
-                # Store the intended URL
-                request.session['next_url'] = request.path
-                
-                # Get current language
-                current_language = request.session.get('ambertek_language', 'en')
-                
-                # Add message
-                if current_language == 'sw':
-                    messages.warning(request, "Lazima uingie ili kuweka agizo.")
-                else:
-                    messages.warning(request, "You must login to place an order.")
-                
-                # Redirect to login
-                return redirect(reverse('login'))
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        if self.needs_login(request) and not request.user.is_authenticated:
+            return self.login_redirect(request)
         
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+    
+    async def __acall__(self, request):
+        if self.needs_login(request):
+            is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+            if not is_authenticated:
+                return await sync_to_async(self.login_redirect)(request)
+        
+        response = await self.get_response(request)
+        return response
+    
+    def needs_login(self, request):
+        # Check if user is trying to access checkout without login
+        return request.path.startswith('/cart/checkout') or request.path.startswith('/orders/')
+    
+    def login_redirect(self, request):
+        # Store the intended URL
+        request.session['next_url'] = request.path
+        
+        # Add message in the visitor's language
+        messages.warning(request, ui_text('login_to_order', get_language(request)))
+        
+        # Redirect to login
+        return redirect(reverse('login'))
\ No newline at end of file
@@ -1,3 +1,72 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from products.models import Category, Product
+
+AJAX = {'x-requested-with': 'XMLHttpRequest'}
+
+
+def async_urlconf():
+    """A fresh ambertek.urls built with ASYNC_VIEWS=True, for ROOT_URLCONF"""
+    import importlib.util
+
+    spec = importlib.util.find_spec('ambertek.urls')
+    module = importlib.util.module_from_spec(spec)
+    with override_settings(ASYNC_VIEWS=True):
+        spec.loader.exec_module(module)
+    return module
+
+
+class AsyncCartTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('amina', 'amina@example.com', 'correct-horse-3')
+        cls.radio = Product.objects.create(
+            name='Radio', description='', price=100, category=Category.objects.create(name='Audio'),
+            image='products/p.jpg', stock=5,
+        )
+
+    def setUp(self):
+        urlconf = override_settings(ROOT_URLCONF=async_urlconf())
+        urlconf.enable()
+        self.addCleanup(urlconf.disable)
+        self.async_client.defaults['HTTP_HOST'] = 'localhost'
+        self.async_client.force_login(self.user)
+
+    async def post(self, path, data=None, headers=None):
+        return await self.async_client.post(path, data or {}, secure=True, headers=headers)
+
+    async def cart(self):
+        return await sync_to_async(lambda: self.async_client.session.get('cart', {}))()
+
+    async def test_add_then_add_again_updates_quantity(self):
+        response = await self.post(f'/cart/add/{self.radio.pk}/', {'quantity': 2}, headers=AJAX)
+        self.assertEqual(response.json()['cart_total'], 2)
+        response = await self.post(f'/cart/add/{self.radio.pk}/')
+        self.assertRedirects(response, '/cart/', fetch_redirect_response=False)
+        self.assertEqual((await self.cart())[str(self.radio.pk)]['quantity'], 3)
+
+    async def test_add_requires_login(self):
+        await sync_to_async(self.async_client.logout)()
+        response = await self.post(f'/cart/add/{self.radio.pk}/')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/accounts/login/', response.url)
+        self.assertEqual(await self.cart(), {})
+
+    async def test_update_recalculates_and_zero_removes(self):
+        await self.post(f'/cart/add/{self.radio.pk}/')
+        response = await self.post(f'/cart/update/{self.radio.pk}/', {'quantity': 3}, headers=AJAX)
+        data = response.json()
+        self.assertEqual((data['item_total'], data['cart_total'], data['items_count']), ('300.00', '300.00', 3))
+
+        await self.post(f'/cart/update/{self.radio.pk}/', {'quantity': 0})
+        self.assertEqual(await self.cart(), {})
+
+    async def test_remove(self):
+        await self.post(f'/cart/add/{self.radio.pk}/')
+        response = await self.post(f'/cart/remove/{self.radio.pk}/')
+        self.assertRedirects(response, '/cart/', fetch_redirect_response=False)
+        self.assertEqual(await self.cart(), {})
+        self.assertEqual((await self.post('/cart/remove/999999/')).status_code, 404)
@@ -11,7 +11,4 @@ urlpatterns = [
     path('remove/<int:product_id>/', login_required(views.remove_from_cart), name='remove_from_cart'),
     path('update/<int:product_id>/', login_required(views.update_cart), name='update_cart'),
     path('clear/', login_required(views.clear_cart), name='clear_cart'),
-    path('checkout/', login_required(views.checkout_view), name='checkout_view'),
-    path('place-order/', login_required(views.place_order_view), name='place_order'),
-    path('checkout/', views.checkout_view, name='checkout_view'),
 ]
\ No newline at end of file
@@ -0,0 +1,189 @@
+# gunicorn.conf.py
+"""
+Gunicorn configuration for Ambertek Export.
+
+Workers and threads are sized from the CPUs and memory actually available
+to the container; every setting can be overridden from the environment
+(WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_MAX_REQUESTS, ...).
+"""
+import os
+import time
+import threading
+import multiprocessing
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _cpu_count():
+    """CPUs this process may run on (respects container CPU affinity)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def _memory_mb():
+    """Memory available to the container in MB (cgroup limit, else physical RAM)"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value.isdigit() and int(value) < 1 << 60:
+                return int(value) // (1024 * 1024)
+        except OSError:
+            continue
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return 512
+
+
+# =============================================
+# SERVER SOCKET
+# =============================================
+
+wsgi_app = 'ambertek.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# =============================================
+# WORKER SIZING
+# =============================================
+
+# Resident memory of one Django worker; caps workers on small instances
+WORKER_MEMORY_MB = _env_int('GUNICORN_WORKER_MEMORY_MB', 120)
+
+CPU_COUNT = _cpu_count()
+MEMORY_MB = _memory_mb()
+
+workers = _env_int(
+    'WEB_CONCURRENCY',
+    max(1, min(CPU_COUNT * 2 + 1, MEMORY_MB // WORKER_MEMORY_MB)),
+)
+
+# Threads let a worker keep serving while another request waits on the DB or SMTP
+threads = _env_int('GUNICORN_THREADS', 4)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Import Django, the URLconf and templates once in the master before forking
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Warm templates, catalogue caches and storefront pages in the master after
+# preloading, so every forked (and recycled) worker starts hot
+WARM_CACHES = preload_app and os.environ.get('GUNICORN_WARM_CACHES', 'True') == 'True'
+
+# Recycle workers to contain slow leaks; jitter stops them restarting together
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+# =============================================
+# LOGGING & METRICS
+# =============================================
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+# Gunicorn's built-in statsd metrics (request rate, durations, worker count)
+statsd_host = os.environ.get('STATSD_HOST') or None
+statsd_prefix = 'ambertek'
+
+# Log a per-worker summary every this many requests (0 disables)
+STATS_EVERY = _env_int('GUNICORN_STATS_EVERY', 500)
+
+# =============================================
+# SERVER HOOKS
+# =============================================
+
+
+def when_ready(server):
+    server.log.info(
+        f"Gunicorn ready: {workers} worker(s) x {threads} thread(s) ({worker_class}), "
+        f"{CPU_COUNT} CPU(s), {MEMORY_MB} MB, preload={preload_app}"
+    )
+    if WARM_CACHES:
+        from home.warmup import run_warmup
+        for result in run_warmup(['templates', 'catalogue', 'pages']):
+            server.log.info(
+                f"Warm-up {result['stage']}: {result['seconds'] * 1000:.0f} ms, {result['summary']}"
+            )
+
+
+def pre_fork(server, worker):
+    # Never let workers inherit a database connection opened while preloading;
+    # closing it in a child would also tear down the master's socket
+    from django.conf import settings
+    if not settings.configured:
+        return
+    from django.db import connections
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    worker.request_stats = {
+        'requests': 0,
+        'errors': 0,
+        'total_time': 0.0,
+        'max_time': 0.0,
+        'started': time.time(),
+    }
+    worker.request_stats_lock = threading.Lock()
+
+
+def pre_request(worker, req):
+    req.started_at = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+    stats = getattr(worker, 'request_stats', None)
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - getattr(req, 'started_at', time.perf_counter())
+    with worker.request_stats_lock:
+        stats['requests'] += 1
+        stats['total_time'] += elapsed
+        stats['max_time'] = max(stats['max_time'], elapsed)
+        if resp.status_code and resp.status_code >= 500:
+            stats['errors'] += 1
+        report = STATS_EVERY and stats['requests'] % STATS_EVERY == 0
+    if report:
+        _log_worker_stats(worker)
+
+
+def worker_exit(server, worker):
+    if getattr(worker, 'request_stats', None):
+        _log_worker_stats(worker, exiting=True)
+
+
+def _log_worker_stats(worker, exiting=False):
+    stats = worker.request_stats
+    requests = stats['requests'] or 1
+    uptime = time.time() - stats['started']
+    worker.log.info(
+        f"Worker {worker.pid}{' exiting' if exiting else ''}: "
+        f"{stats['requests']} requests in {uptime:.0f}s, "
+        f"avg {stats['total_time'] / requests * 1000:.1f} ms, "
+        f"max {stats['max_time'] * 1000:.1f} ms, "
+        f"{stats['errors']} 5xx"
+    )
+    from django.core.cache import cache
+    if hasattr(cache, 'stats'):
+        tiers = cache.stats()
+        worker.log.info(
+            f"Worker {worker.pid} cache: "
+            f"L1 {tiers['l1']['hits']} hits / {tiers['l1']['misses']} misses / "
+            f"{tiers['l1']['evictions']} evictions ({tiers['l1']['entries']} entries), "
+            f"L2 {tiers['l2']['hits']} hits / {tiers['l2']['misses']} misses / "
+            f"{tiers['l2']['evictions']} evictions, "
+            f"{tiers['broadcasts']['received']} invalidations received"
+        )
@@ -0,0 +1,21 @@
+# home/cache.py
+"""
+Cached homepage content (banners and featured products).
+
+Entries live inside the catalogue generation from products/cache.py; the
+signal receivers in home/models.py bump it whenever a banner changes.
+"""
+from products.cache import catalogue_key, get_or_build
+
+
+def get_homepage_content():
+    """Active homepage banners, category banners and featured products"""
+    from .models import HomepageBanner, CategoryBanner, FeaturedProduct
+    return get_or_build(
+        catalogue_key('homepage'),
+        lambda: {
+            'homepage_banners': list(HomepageBanner.objects.filter(is_active=True)),
+            'category_banners': list(CategoryBanner.objects.filter(is_active=True)),
+            'featured_products': list(FeaturedProduct.objects.filter(is_active=True)),
+        },
+    )
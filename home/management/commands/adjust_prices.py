@@ -0,0 +1,75 @@
+# home/management/commands/adjust_prices.py
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from products.models import Product
+from products.pricing import adjust_prices, price_expression, priced_out, set_availability
+
+
+class Command(BaseCommand):
+    help = (
+        "Reprice products by percentage or fixed amount, or switch their availability, "
+        "for whole categories or given skus in one UPDATE each. Price changes are audited."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', action='append', default=[], help="Category id or name (repeatable)")
+        parser.add_argument('--sku', action='append', default=[], help="Product sku (repeatable)")
+        parser.add_argument('--all', action='store_true', help="Every product")
+        change = parser.add_mutually_exclusive_group()
+        change.add_argument('--percent', type=Decimal, help="Price change in percent, e.g. -10")
+        change.add_argument('--amount', type=Decimal, help="Amount added to each price, e.g. 500 or -250")
+        availability = parser.add_mutually_exclusive_group()
+        availability.add_argument('--available', dest='available', action='store_true', default=None)
+        availability.add_argument('--unavailable', dest='available', action='store_false')
+        parser.add_argument('--reason', default='', help="Recorded with each price change")
+        parser.add_argument('--dry-run', action='store_true', help="Show what would change without writing")
+
+    def handle(self, *args, **options):
+        products = self.selected_products(options)
+        repricing = options['percent'] is not None or options['amount'] is not None
+        if not repricing and options['available'] is None:
+            raise CommandError("Nothing to do: give --percent, --amount, --available or --unavailable")
+
+        count = products.count()
+        if repricing:
+            too_low = priced_out(products, options['percent'], options['amount'])
+            if too_low.exists():
+                names = ', '.join(too_low.order_by('pk').values_list('name', flat=True)[:5])
+                raise CommandError(
+                    f"The change would take {too_low.count()} price(s) to zero or below ({names}); nothing was changed"
+                )
+        if options['dry_run']:
+            self.stdout.write(f"{count} products selected")
+            if repricing:
+                preview = products.annotate(
+                    new_price=price_expression(options['percent'], options['amount'])
+                ).order_by('pk')[:10]
+                for product in preview:
+                    self.stdout.write(f"  {product.pk} {product.name}: {product.price} -> {product.new_price:.2f}")
+            return
+
+        started = time.perf_counter()
+        if repricing:
+            try:
+                changed = adjust_prices(
+                    products, percent=options['percent'], amount=options['amount'], reason=options['reason'],
+                )
+            except ValueError as e:
+                raise CommandError(f"{e}; nothing was changed")
+            self.stdout.write(f"{changed} of {count} prices changed and audited")
+        if options['available'] is not None:
+            updated = set_availability(products, options['available'])
+            self.stdout.write(f"{updated} products marked {'available' if options['available'] else 'unavailable'}")
+        self.stdout.write(self.style.SUCCESS(f"Done in {(time.perf_counter() - started) * 1000:.0f} ms"))
+
+    def selected_products(self, options):
+        if options['all']:
+            return Product.objects.all()
+        if not options['category'] and not options['sku']:
+            raise CommandError("Select products with --category, --sku or --all")
+        selection = Q(sku__in=options['sku'])
+        for category in options['category']:
+            selection |= Q(category_id=int(category)) if category.isdigit() else Q(category__name=category)
+        return Product.objects.filter(selection)
@@ -0,0 +1,85 @@
+# home/management/commands/bench_compression.py
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import Client, override_settings
+from django.urls import reverse
+from utils import compression
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure compression ratio and CPU cost per response for storefront pages "
+        "and cart JSON: HTML minification, gzip and Brotli at several levels"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths', help="Page to measure (repeatable)")
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        bodies = self.collect_bodies(options['paths'] or self.default_paths())
+        iterations = options['iterations']
+
+        variants = [('minify', lambda body: compression.minify_html(body))]
+        variants.append(('gzip-6', compression.zlib_compress))
+        if compression.brotli is not None:
+            for quality in (4, 5, 11):
+                variants.append((f'br-{quality}', lambda body, q=quality: compression.brotli.compress(
+                    body, quality=q, mode=compression.brotli.MODE_TEXT
+                )))
+            variants.append(('minify+br-5', lambda body: compression.brotli.compress(
+                compression.minify_html(body), quality=5, mode=compression.brotli.MODE_TEXT
+            )))
+        else:
+            self.stdout.write(self.style.WARNING("brotli is not installed; only gzip is measured"))
+
+        self.stdout.write(f"{'endpoint':<28} {'variant':<12} {'bytes':>8} {'ratio':>7} {'cpu/resp':>10}")
+        for label, body in bodies:
+            self.stdout.write(f"{label:<28} {'raw':<12} {len(body):>8}")
+            if len(body) < settings.COMPRESSION_MIN_SIZE:
+                self.stdout.write(f"{'':<28} below COMPRESSION_MIN_SIZE ({settings.COMPRESSION_MIN_SIZE}), sent as is")
+                continue
+            for name, function in variants:
+                if name.startswith('minify') and not label.startswith('/'):
+                    continue
+                started = time.process_time()
+                for _ in range(iterations):
+                    output = function(body)
+                cpu = (time.process_time() - started) / iterations
+                self.stdout.write(
+                    f"{'':<28} {name:<12} {len(output):>8} {len(body) / len(output):>6.1f}x {cpu * 1000:>8.2f}ms"
+                )
+
+    def collect_bodies(self, paths):
+        """Uncompressed, unminified bodies of the given pages plus a cart JSON response"""
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '0.0.0.0')), 'localhost')
+        client = Client(HTTP_HOST=host)
+        bodies = []
+        with override_settings(HTML_MINIFY=False):
+            for path in paths:
+                response = client.get(path, secure=True)
+                if response.status_code == 200:
+                    bodies.append((path, response.content))
+                else:
+                    self.stdout.write(self.style.WARNING(f"{path}: HTTP {response.status_code}"))
+
+        # Same shape as update_cart's AJAX response
+        cart_json = JsonResponse({
+            'success': True,
+            'item_total': 125000.0,
+            'cart_total': 480000.0,
+            'cart_count': 4,
+            'items_count': 7,
+        })
+        bodies.append(('update_cart JSON', cart_json.content))
+        return bodies
+
+    def default_paths(self):
+        from products.models import Product
+        paths = [reverse('home'), reverse('products'), reverse('contact'), reverse('login')]
+        product_id = Product.objects.filter(available=True).values_list('id', flat=True).first()
+        if product_id:
+            paths.insert(2, reverse('product_detail', args=[product_id]))
+        return paths
@@ -0,0 +1,79 @@
+# home/management/commands/bench_gunicorn.py
+import os
+import sys
+import time
+import socket
+import subprocess
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from .bench_http import run_load, format_result
+
+STOREFRONT_PATHS = ['/', '/products/', '/contact/']
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn with its defaults and then with gunicorn.conf.py, load the "
+        "storefront pages against each and compare throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=3000)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--path', action='append', dest='paths', help="Page to load (repeatable)")
+
+    def handle(self, *args, **options):
+        config = os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+        paths = options['paths'] or STOREFRONT_PATHS
+        port = options['port']
+        bind = f"127.0.0.1:{port}"
+
+        setups = [
+            # --config /dev/null skips ./gunicorn.conf.py, i.e. gunicorn's defaults
+            ('default (1 sync worker)', ['--config', os.devnull, '--bind', bind]),
+            ('tuned (gunicorn.conf.py)', ['--config', config, '--bind', bind, '--access-logfile', os.devnull]),
+        ]
+
+        results = []
+        for label, args in setups:
+            self.stdout.write(f"\n=== {label} ===")
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', 'ambertek.wsgi:application'] + args,
+                cwd=settings.BASE_DIR,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(port, server)
+                targets = [urlsplit(f"http://{bind}{path}") for path in paths]
+                # Warm-up so both setups are measured with imported code and templates
+                run_load(targets, clients=4, total_requests=len(paths) * 4)
+                result = run_load(targets, clients=options['clients'], total_requests=options['requests'])
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            self.stdout.write(format_result(result))
+            results.append((label, result))
+
+        (_, default), (_, tuned) = results
+        if default['rps']:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nThroughput: {default['rps']:.1f} -> {tuned['rps']:.1f} req/s "
+                f"({tuned['rps'] / default['rps']:.2f}x)"
+            ))
+
+
+def wait_for_port(port, process, timeout=30):
+    """Block until something accepts connections on 127.0.0.1:port"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError("gunicorn exited during startup")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"gunicorn did not start listening on port {port}")
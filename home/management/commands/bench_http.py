@@ -0,0 +1,151 @@
+# home/management/commands/bench_http.py
+import time
+import threading
+import http.client
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server with many concurrent keep-alive clients and "
+        "report requests/sec and latency percentiles. Run it once against the "
+        "WSGI deployment and once against the ASGI one to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='+', help="URL(s) to request, e.g. http://127.0.0.1:8000/products/")
+        parser.add_argument('--clients', type=int, default=500, help="Concurrent clients")
+        parser.add_argument('--requests', type=int, default=5000, help="Total requests across all clients")
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--data', default='', help="Request body (form encoded) for POST")
+        parser.add_argument('--cookie', default='', help="Cookie header, e.g. a logged-in sessionid")
+        parser.add_argument('--header', action='append', default=[], help="Extra header 'Name: value'")
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        targets = [urlsplit(url) for url in options['url']]
+        for target in targets:
+            if target.scheme not in ('http', 'https'):
+                raise CommandError(f"Unsupported URL: {target.geturl()}")
+
+        headers = {}
+        if options['cookie']:
+            headers['Cookie'] = options['cookie']
+        if options['data']:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        for header in options['header']:
+            name, _, value = header.partition(':')
+            headers[name.strip()] = value.strip()
+
+        result = run_load(
+            targets,
+            clients=options['clients'],
+            total_requests=options['requests'],
+            method=options['method'].upper(),
+            body=options['data'].encode() or None,
+            headers=headers,
+            timeout=options['timeout'],
+        )
+        self.stdout.write(format_result(result))
+
+
+def run_load(targets, clients, total_requests, method='GET', body=None, headers=None, timeout=30.0):
+    """
+    Fire total_requests requests at targets (round robin) from clients threads,
+    each holding one keep-alive connection. Returns a result dict.
+    """
+    headers = headers or {}
+    latencies = []
+    statuses = {}
+    errors = [0]
+    bytes_received = [0]
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def next_request():
+        with lock:
+            return next(counter, None)
+
+    def connect(target):
+        conn_class = http.client.HTTPSConnection if target.scheme == 'https' else http.client.HTTPConnection
+        return conn_class(target.netloc, timeout=timeout)
+
+    def client():
+        connections = {}
+        while True:
+            index = next_request()
+            if index is None:
+                break
+            target = targets[index % len(targets)]
+            path = target.path or '/'
+            if target.query:
+                path += '?' + target.query
+            conn = connections.get(target.netloc) or connect(target)
+            connections[target.netloc] = conn
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+                    bytes_received[0] += len(payload)
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    connections.pop(target.netloc, None)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                connections.pop(target.netloc, None)
+                with lock:
+                    errors[0] += 1
+        for conn in connections.values():
+            conn.close()
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'elapsed': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0,
+        'statuses': statuses,
+        'bytes': bytes_received[0],
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def percentile(sorted_values, pct):
+    """pct-th percentile of an already sorted list (0 if empty)"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def format_result(result):
+    """Human readable summary of a run_load() result"""
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(result['statuses'].items()))
+    return (
+        f"Clients:        {result['clients']}\n"
+        f"Requests:       {result['requests']} ({result['errors']} errors)\n"
+        f"Elapsed:        {result['elapsed']:.2f}s\n"
+        f"Requests/sec:   {result['rps']:.1f}\n"
+        f"Latency p50:    {result['p50'] * 1000:.1f} ms\n"
+        f"Latency p95:    {result['p95'] * 1000:.1f} ms\n"
+        f"Latency p99:    {result['p99'] * 1000:.1f} ms\n"
+        f"Bytes received: {result['bytes']}\n"
+        f"Status codes:   {statuses}"
+    )
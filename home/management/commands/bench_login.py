@@ -0,0 +1,99 @@
+# home/management/commands/bench_login.py
+import time
+import random
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from accounts.backends import find_user, users_matching
+
+SEED_PREFIX = 'benchuser'
+SEED_PASSWORD = 'bench-password-123'
+
+
+def seed_users(count, batch_size=5000):
+    """Create benchuser<N> accounts up to count (one shared password hash); returns how many were added"""
+    existing = User.objects.filter(username__startswith=SEED_PREFIX).count()
+    if existing >= count:
+        return 0
+    password = make_password(SEED_PASSWORD)
+    added = 0
+    for start in range(existing, count, batch_size):
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    username=f"{SEED_PREFIX}{number}",
+                    # Mixed case, like addresses typed in before emails were lowercased
+                    email=f"{SEED_PREFIX.capitalize()}{number}@Example.com",
+                    password=password,
+                )
+                for number in range(start, min(start + batch_size, count))
+            ])
+        added += min(batch_size, count - start)
+    return added
+
+
+def old_lookup(identifier):
+    """The previous login_view lookup: exact email match, then a query by username"""
+    username = identifier
+    if '@' in identifier:
+        try:
+            username = User.objects.get(email=identifier).username
+        except (User.DoesNotExist, User.MultipleObjectsReturned):
+            return None
+    return User.objects.filter(username=username).first()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed benchmark users and measure login lookups/sec (old vs email-or-username "
+        "backend) and full logins/sec including password hashing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000, help="Accounts to seed")
+        parser.add_argument('--lookups', type=int, default=2000, help="Lookups timed per variant")
+        parser.add_argument('--logins', type=int, default=20, help="Full authenticate() calls timed")
+        parser.add_argument('--cleanup', action='store_true', help="Delete the seeded accounts afterwards")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        added = seed_users(options['users'])
+        self.stdout.write(f"Seeded {added} users in {time.perf_counter() - started:.1f}s ({options['users']} total)")
+
+        sample = random.sample(range(options['users']), min(options['lookups'], options['users']))
+        variants = [
+            ('old, username', old_lookup, lambda n: f"{SEED_PREFIX}{n}"),
+            ('old, email', old_lookup, lambda n: f"{SEED_PREFIX}{n}@example.com"),
+            ('backend, username', find_user, lambda n: f"{SEED_PREFIX}{n}"),
+            ('backend, email', find_user, lambda n: f"{SEED_PREFIX}{n}@example.com"),
+        ]
+        self.stdout.write(f"{'lookup':<20} {'found':>7} {'per sec':>10}")
+        for name, lookup, identifier in variants:
+            found = 0
+            started = time.perf_counter()
+            for number in sample:
+                found += lookup(identifier(number)) is not None
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{name:<20} {found:>7} {len(sample) / elapsed:>10.0f}")
+
+        # The email lookup should be an index scan on lower(email), not a table scan
+        plan = users_matching(f"{SEED_PREFIX}{sample[0]}@example.com").explain()
+        self.stdout.write(f"Email lookup plan:\n{plan}")
+
+        request = RequestFactory().post('/accounts/login/')
+        started = time.perf_counter()
+        ok = 0
+        for number in sample[:options['logins']]:
+            ok += authenticate(request, username=f"{SEED_PREFIX}{number}@example.com", password=SEED_PASSWORD) is not None
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"authenticate() by email: {ok}/{options['logins']} ok, {options['logins'] / elapsed:.1f} logins/sec "
+            f"(password hashing dominates)"
+        )
+
+        if options['cleanup']:
+            deleted, _ = User.objects.filter(username__startswith=SEED_PREFIX).delete()
+            self.stdout.write(f"Deleted {deleted} seeded rows")
@@ -0,0 +1,60 @@
+# home/management/commands/bench_password_hashing.py
+import os
+import time
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+PASSWORD = 'correct-horse-battery-1'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password hashing cost per policy (pbkdf2, scrypt, argon2): ms and "
+        "CPU per login, logins/sec per core and with one thread per core"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10, help="Logins timed per policy")
+        parser.add_argument('--policy', action='append', dest='policies', choices=list(settings.PASSWORD_HASHER_CLASSES))
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        cores = os.cpu_count() or 1
+        policies = options['policies'] or list(settings.PASSWORD_HASHER_CLASSES)
+
+        self.stdout.write(f"Current policy: {settings.PASSWORD_HASH_POLICY}, {cores} CPU(s)")
+        self.stdout.write(
+            f"{'policy':<8} {'hash ms':>8} {'verify ms':>10} {'cpu ms':>8} {'logins/s/core':>14} {f'logins/s x{cores}':>14}"
+        )
+        for policy in policies:
+            if policy == 'argon2' and importlib.util.find_spec('argon2') is None:
+                self.stdout.write(f"{policy:<8} skipped: argon2-cffi is not installed")
+                continue
+            with override_settings(PASSWORD_HASHERS=[settings.PASSWORD_HASHER_CLASSES[policy]]):
+                started = time.perf_counter()
+                encoded = make_password(PASSWORD)
+                hash_time = time.perf_counter() - started
+
+                # A login is one verify of the stored hash
+                started = time.perf_counter()
+                cpu_started = time.process_time()
+                for _ in range(iterations):
+                    assert check_password(PASSWORD, encoded)
+                verify_time = (time.perf_counter() - started) / iterations
+                cpu_time = (time.process_time() - cpu_started) / iterations
+
+                # All cores busy, limited by PASSWORD_HASH_CONCURRENCY like real requests
+                with ThreadPoolExecutor(max_workers=cores) as executor:
+                    started = time.perf_counter()
+                    list(executor.map(lambda _: check_password(PASSWORD, encoded), range(iterations * cores)))
+                    parallel_rate = iterations * cores / (time.perf_counter() - started)
+
+            self.stdout.write(
+                f"{policy:<8} {hash_time * 1000:>8.0f} {verify_time * 1000:>10.0f} {cpu_time * 1000:>8.0f} "
+                f"{1 / cpu_time:>14.1f} {parallel_rate:>14.1f}"
+            )
+        self.stdout.write("Rehashing to the current policy happens once per user, on their next login.")
@@ -0,0 +1,96 @@
+# home/management/commands/bench_rate_limit.py
+import time
+import uuid
+import threading
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from home.management.commands.bench_http import percentile
+
+PASSWORD = 'rate-limit-bench-1'
+
+
+def run_phase(username, legit_requests, pause, abusers, abuse_rate, rate_limited):
+    """
+    Time legit_requests logins (each from its own address) while abusers
+    clients post wrong passwords from one address each, together offering
+    abuse_rate requests/sec (less if the server cannot keep up). Returns
+    (sorted legit latencies, legit statuses, abusive statuses, abusive requests/sec).
+    """
+    latencies = []
+    legit_statuses = {}
+    abusive_statuses = {}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def abuser():
+        client = Client(HTTP_HOST='localhost', REMOTE_ADDR=f"2001:db8::{uuid.uuid4().hex[:4]}")
+        interval = abusers / abuse_rate
+        next_at = time.perf_counter()
+        while not done.wait(max(0, next_at - time.perf_counter())):
+            next_at += interval
+            response = client.post('/accounts/login/', {'username': username, 'password': 'wrong'}, secure=True)
+            with lock:
+                abusive_statuses[response.status_code] = abusive_statuses.get(response.status_code, 0) + 1
+        connections.close_all()
+
+    with override_settings(RATE_LIMIT_ENABLED=rate_limited):
+        threads = [threading.Thread(target=abuser, daemon=True) for _ in range(abusers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for _ in range(legit_requests):
+            client = Client(HTTP_HOST='localhost', REMOTE_ADDR=f"2001:db8:1::{uuid.uuid4().hex[:4]}")
+            request_started = time.perf_counter()
+            response = client.post('/accounts/login/', {'username': username, 'password': PASSWORD}, secure=True)
+            latencies.append(time.perf_counter() - request_started)
+            legit_statuses[response.status_code] = legit_statuses.get(response.status_code, 0) + 1
+            time.sleep(pause)
+        done.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return latencies, legit_statuses, abusive_statuses, sum(abusive_statuses.values()) / elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the login rate limit in-process: latency of legitimate logins "
+        "alone, next to abusive clients without rate limiting, and with it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=30, help="Legitimate logins timed per phase")
+        parser.add_argument('--pause', type=float, default=0.1, help="Seconds between legitimate logins")
+        parser.add_argument('--abusers', type=int, default=4, help="Abusive clients (one address each)")
+        parser.add_argument('--abuse-rate', type=float, default=40, help="Requests/sec offered by all abusers together")
+
+    def handle(self, *args, **options):
+        username = f"ratelimit-bench-{uuid.uuid4().hex[:8]}"
+        User.objects.create_user(username, f"{username}@example.com", PASSWORD)
+        phases = [
+            ('legit only', 0, True),
+            ('abuse, no limit', options['abusers'], False),
+            ('abuse, limited', options['abusers'], True),
+        ]
+        try:
+            self.stdout.write(
+                f"{'phase':<16} {'p50 ms':>8} {'p95 ms':>8} {'legit statuses':<18} {'abusive req/s':>13}  abusive statuses"
+            )
+            for name, abusers, rate_limited in phases:
+                latencies, legit, abusive, abusive_rate = run_phase(
+                    username, options['requests'], options['pause'], abusers, options['abuse_rate'], rate_limited,
+                )
+                self.stdout.write(
+                    f"{name:<16} {percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} "
+                    f"{format_statuses(legit):<18} {abusive_rate:>13.1f}  {format_statuses(abusive)}"
+                )
+        finally:
+            User.objects.filter(username=username).delete()
+
+
+def format_statuses(statuses):
+    return ', '.join(f"{status}: {count}" for status, count in sorted(statuses.items())) or '-'
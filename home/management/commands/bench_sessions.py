@@ -0,0 +1,87 @@
+# home/management/commands/bench_sessions.py
+import time
+from django.contrib.sessions.backends.db import SessionStore
+from django.core import signing
+from django.core.management.base import BaseCommand
+from utils.session_serializer import CompactSessionSerializer
+from utils.i18n import LANGUAGE_KEY
+
+SERIALIZERS = [
+    ('json', signing.JSONSerializer),
+    ('compact', CompactSessionSerializer),
+]
+
+
+def sample_session(lines):
+    """A logged-in session with a cart of the given number of lines and saved checkout data"""
+    cart = {
+        str(1000 + index): {
+            'name': f"Bluetooth Speaker Model {index}",
+            'price': 125000.0 + index,
+            'quantity': 1 + index % 4,
+            'image': f"/media/products/bluetooth-speaker-{index}.jpg",
+            'slug': f"bluetooth-speaker-model-{index}",
+        }
+        for index in range(lines)
+    }
+    return {
+        '_auth_user_id': '42',
+        '_auth_user_backend': 'django.contrib.auth.backends.ModelBackend',
+        '_auth_user_hash': 'f3c1b6a8d0e94c2b7a5e1d9c8b7a6f5e4d3c2b1a0f9e8d7c6b5a4f3e2d1c0b9a',
+        LANGUAGE_KEY: 'sw',
+        'next_url': '/cart/',
+        'cart': cart,
+        'checkout_data': {
+            'customer_name': 'Amina Juma',
+            'customer_email': 'amina@example.com',
+            'customer_phone': '+255712345678',
+            'shipping_address': 'Plot 12, Samora Avenue',
+            'customer_city': 'Dar es Salaam',
+            'customer_region': 'Dar es Salaam',
+            'payment_method': 'mobile_money',
+            'notes': '',
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the JSON and compact session serializers: encode/decode time and "
+        "stored bytes per session (signed and compressed like the db session backend)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, action='append', help="Cart lines (repeatable, default 1, 20, 100)")
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        salt = SessionStore().key_salt
+
+        self.stdout.write(
+            f"{'lines':>5} {'serializer':<10} {'raw':>7} {'stored':>7} {'encode':>9} {'decode':>9}"
+        )
+        for lines in options['lines'] or [1, 20, 100]:
+            session = sample_session(lines)
+            for name, serializer in SERIALIZERS:
+                raw = serializer().dumps(session)
+                # Exactly what SessionBase.encode() writes to session_data
+                stored = signing.dumps(session, salt=salt, serializer=serializer, compress=True)
+                if signing.loads(stored, salt=salt, serializer=serializer) != session:
+                    self.stderr.write(self.style.ERROR(f"{name}: session did not round-trip"))
+
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    signing.dumps(session, salt=salt, serializer=serializer, compress=True)
+                encode = (time.perf_counter() - started) / iterations
+
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    signing.loads(stored, salt=salt, serializer=serializer)
+                decode = (time.perf_counter() - started) / iterations
+
+                self.stdout.write(
+                    f"{lines:>5} {name:<10} {len(raw):>7} {len(stored):>7} "
+                    f"{encode * 1e6:>7.1f}us {decode * 1e6:>7.1f}us"
+                )
+        self.stdout.write("raw: serializer output; stored: signed, compressed and base64 encoded session_data")
@@ -0,0 +1,30 @@
+# home/management/commands/build_recommendations.py
+from django.core.management.base import BaseCommand
+from products.recommendations import (
+    RECOMMENDATIONS_CHUNK_SIZE, RECOMMENDATIONS_MIN_ORDERS, RECOMMENDATIONS_TOP_K, build_recommendations,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the \"frequently bought together\" products shown on product pages "
+        "from the order history. Run it periodically, e.g. nightly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=RECOMMENDATIONS_TOP_K, help="Products kept per product")
+        parser.add_argument('--chunk-size', type=int, default=RECOMMENDATIONS_CHUNK_SIZE, help="Order lines read per query")
+        parser.add_argument(
+            '--min-orders', type=int, default=RECOMMENDATIONS_MIN_ORDERS,
+            help="Orders two products must share to be recommended together",
+        )
+
+    def handle(self, *args, **options):
+        stats = build_recommendations(
+            top_k=options['top_k'], chunk_size=options['chunk_size'], min_orders=options['min_orders'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['lines']} lines of {stats['orders']} orders read, {stats['pairs']} product pairs: "
+            f"{stats['recommendations']} recommendations for {stats['products']} products "
+            f"in {stats['elapsed']:.1f}s"
+        ))
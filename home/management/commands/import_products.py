@@ -0,0 +1,54 @@
+# home/management/commands/import_products.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from products.importer import PRODUCT_IMPORT_BATCH_SIZE, PRODUCT_IMPORT_IMAGE_DIR, RowError, import_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update products from a CSV/XLSX catalogue file, matched on sku, "
+        "ingesting their image files in parallel. See products/importer.py for the columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Catalogue file (.csv or .xlsx)")
+        parser.add_argument('--images', default=PRODUCT_IMPORT_IMAGE_DIR, help="Directory the image columns refer to")
+        parser.add_argument('--batch-size', type=int, default=PRODUCT_IMPORT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=None, help="Image processes (default: CPU count)")
+        parser.add_argument('--dry-run', action='store_true', help="Validate rows and images without writing anything")
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+
+        def progress(stats):
+            if verbosity >= 1:
+                self.stdout.write(
+                    f"{stats['rows']} rows, {stats['created']} created, {stats['updated']} updated, "
+                    f"{stats['failed']} failed, {stats['images']} images ({stats['rows_per_sec']:.0f} rows/s)"
+                )
+
+        try:
+            stats = import_products(
+                options['path'],
+                image_dir=options['images'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                dry_run=options['dry_run'],
+                progress=progress,
+            )
+        except (OSError, RowError) as e:
+            raise CommandError(str(e))
+        except DatabaseError as e:
+            raise CommandError(f"Import stopped by a database error; earlier batches were saved: {e}")
+
+        for line, message in stats['errors']:
+            self.stderr.write(f"line {line}: {message}")
+        summary = (
+            f"{'Dry run: ' if stats['dry_run'] else ''}{stats['rows']} rows in {stats['elapsed']:.1f}s "
+            f"({stats['rows_per_sec']:.0f} rows/s): {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['failed']} failed, {stats['duplicates']} duplicate skus, "
+            f"{stats['categories_created']} new categories, {stats['images']} images ingested, "
+            f"{stats['image_errors']} image errors"
+        )
+        style = self.style.WARNING if stats['failed'] else self.style.SUCCESS
+        self.stdout.write(style(summary))
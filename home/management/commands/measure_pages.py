@@ -0,0 +1,106 @@
+# home/management/commands/measure_pages.py
+import os
+import re
+import gzip
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LOCAL_ASSET_RE = re.compile(r'<(?:link|script)\b[^>]*?(?:href|src)="(%s[^"]+)"' % re.escape(settings.STATIC_URL))
+INLINE_BLOCK_RE = re.compile(r'<(style|script)\b[^>]*>(.*?)</\1>', re.S)
+
+
+def compressed_size(data):
+    """Bytes on the wire: Brotli if available, else gzip"""
+    if brotli is not None:
+        return len(brotli.compress(data))
+    return len(gzip.compress(data))
+
+
+def asset_transfer(url, hashed_names):
+    """
+    (bytes on the wire, cacheable forever) for a local static URL, using the
+    precompressed .br/.gz that WhiteNoise would serve next to the file.
+    """
+    name = url[len(settings.STATIC_URL):].split('?')[0]
+    path = os.path.join(settings.STATIC_ROOT, name)
+    if not os.path.exists(path):
+        return 0, False
+    size = os.path.getsize(path)
+    for suffix in ('.br', '.gz'):
+        if os.path.exists(path + suffix):
+            size = min(size, os.path.getsize(path + suffix))
+    # Manifest-hashed names are served with an immutable Cache-Control header
+    return size, name in hashed_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Render storefront pages and report HTML bytes, inline CSS/JS bytes and "
+        "first-visit vs repeat-visit transfer size for local assets"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths', help="Page to measure (repeatable)")
+        parser.add_argument('--language', default='en')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or self.default_paths()
+        hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '0.0.0.0')), 'localhost')
+        client = Client(HTTP_HOST=host)
+        client.cookies['ambertek_language'] = options['language']
+
+        self.stdout.write(
+            f"{'page':<28} {'html':>8} {'inline':>8} {'html wire':>10} {'assets':>8} {'first visit':>12} {'repeat':>8}"
+        )
+        totals = [0, 0, 0]
+        for path in paths:
+            response = client.get(path, secure=True)
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f"{path:<28} HTTP {response.status_code}"))
+                continue
+            html = response.content
+            inline = sum(len(body.encode()) for _, body in INLINE_BLOCK_RE.findall(html.decode('utf-8', 'replace')))
+            html_wire = compressed_size(html)
+
+            assets_wire = 0
+            uncached_wire = 0
+            for url in sorted(set(LOCAL_ASSET_RE.findall(html.decode('utf-8', 'replace')))):
+                size, immutable = asset_transfer(url, hashed_names)
+                assets_wire += size
+                if not immutable:
+                    uncached_wire += size
+
+            first_visit = html_wire + assets_wire
+            repeat_visit = html_wire + uncached_wire
+            totals[0] += html_wire
+            totals[1] += first_visit
+            totals[2] += repeat_visit
+            self.stdout.write(
+                f"{path:<28} {len(html):>8} {inline:>8} {html_wire:>10} {assets_wire:>8} {first_visit:>12} {repeat_visit:>8}"
+            )
+
+        self.stdout.write(
+            f"{'total':<28} {'':>8} {'':>8} {totals[0]:>10} {'':>8} {totals[1]:>12} {totals[2]:>8}"
+        )
+        self.stdout.write(
+            f"Sizes in bytes; wire sizes are {'Brotli' if brotli else 'gzip'} compressed. "
+            "CDN assets (Bootstrap, Font Awesome, fonts) are not counted."
+        )
+
+    def default_paths(self):
+        from products.models import Product
+        paths = [reverse('home'), reverse('products'), reverse('contact'), reverse('login')]
+        product_id = Product.objects.filter(available=True).values_list('id', flat=True).first()
+        if product_id:
+            paths.insert(2, reverse('product_detail', args=[product_id]))
+        return paths
@@ -0,0 +1,150 @@
+# home/management/commands/profile_startup.py
+import os
+import sys
+import json
+import subprocess
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: the same work a worker does before its first request
+STARTUP_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+import django
+from django.core.wsgi import get_wsgi_application
+imported = time.perf_counter()
+django.setup(set_prefix=False)
+setup_done = time.perf_counter()
+application = get_wsgi_application()
+wsgi_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+print(json.dumps({
+    'import_django': imported - started,
+    'django_setup': setup_done - imported,
+    'wsgi_application': wsgi_done - setup_done,
+    'url_loading': urls_done - wsgi_done,
+    'total': urls_done - started,
+    'modules': sorted(sys.modules),
+}))
+"""
+
+# Modules a cold start must not import; they load on the first request that needs them
+LAZY_MODULES = [
+    'cart.views',
+    'cart.async_views',
+    'orders.views',
+    'orders.async_views',
+    'accounts.views',
+    'utils.email_service',
+]
+
+
+def measure_startup(importtime=False):
+    """
+    Start a fresh interpreter, run django.setup() and load the URLconf.
+    Returns the phase timings (seconds) and loaded modules, plus the raw
+    -X importtime report when importtime is True.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'ambertek.settings'))
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', STARTUP_SCRIPT]
+
+    process = subprocess.run(
+        command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    if process.returncode != 0:
+        raise CommandError(f"Startup failed:\n{process.stderr[-2000:]}")
+
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['importtime'] = process.stderr if importtime else ''
+    return result
+
+
+def parse_importtime(report):
+    """
+    Turn `-X importtime` output into a list of root nodes:
+    {'name', 'self', 'cumulative', 'children'} with times in microseconds.
+    """
+    pending = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        node = {
+            'name': name.strip(),
+            'self': int(self_us),
+            'cumulative': int(cumulative_us),
+            'children': [],
+            'depth': depth,
+        }
+        # Children are reported before their parent
+        while pending and pending[-1]['depth'] > depth:
+            node['children'].insert(0, pending.pop())
+        pending.append(node)
+    return pending
+
+
+def walk(nodes):
+    for node in nodes:
+        yield node
+        yield from walk(node['children'])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold-start time (django.setup(), WSGI app, URL loading) in a fresh "
+        "interpreter and show where import time goes as an -X importtime tree"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=5.0, help="Hide modules cheaper than this (ms cumulative)")
+        parser.add_argument('--depth', type=int, default=4, help="Maximum tree depth shown")
+        parser.add_argument('--top', type=int, default=15, help="Number of most expensive modules by self time")
+        parser.add_argument('--runs', type=int, default=3, help="Cold starts to time (best is reported)")
+
+    def handle(self, *args, **options):
+        runs = [measure_startup() for _ in range(max(1, options['runs']))]
+        best = min(runs, key=lambda run: run['total'])
+
+        self.stdout.write(f"Cold start (best of {len(runs)}):")
+        for phase in ('import_django', 'django_setup', 'wsgi_application', 'url_loading', 'total'):
+            self.stdout.write(f"  {phase:<18} {best[phase] * 1000:8.1f} ms")
+        self.stdout.write(f"  {'modules loaded':<18} {len(best['modules']):8d}")
+
+        eager = [module for module in LAZY_MODULES if module in best['modules']]
+        if eager:
+            self.stdout.write(self.style.WARNING(f"Imported at startup but meant to be lazy: {', '.join(eager)}"))
+
+        roots = parse_importtime(measure_startup(importtime=True)['importtime'])
+        threshold_us = options['threshold'] * 1000
+
+        self.stdout.write(f"\nImport tree (cumulative >= {options['threshold']} ms):")
+        self.stdout.write(f"  {'cumulative':>10} {'self':>8}  module")
+        for root in sorted(roots, key=lambda node: -node['cumulative']):
+            self.write_tree(root, threshold_us, options['depth'])
+
+        self.stdout.write("\nMost expensive modules by self time:")
+        for node in sorted(walk(roots), key=lambda node: -node['self'])[:options['top']]:
+            self.stdout.write(f"  {node['self'] / 1000:8.1f} ms  {node['name']}")
+
+        packages = {}
+        for node in walk(roots):
+            package = node['name'].split('.')[0]
+            packages[package] = packages.get(package, 0) + node['self']
+        self.stdout.write("\nSelf time by top-level package:")
+        for package, total in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {total / 1000:8.1f} ms  {package}")
+
+    def write_tree(self, node, threshold_us, max_depth, depth=0):
+        if node['cumulative'] < threshold_us or depth > max_depth:
+            return
+        self.stdout.write(
+            f"  {node['cumulative'] / 1000:8.1f}ms {node['self'] / 1000:6.1f}ms  {'  ' * depth}{node['name']}"
+        )
+        for child in sorted(node['children'], key=lambda child: -child['cumulative']):
+            self.write_tree(child, threshold_us, max_depth, depth + 1)
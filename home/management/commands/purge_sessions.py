@@ -0,0 +1,141 @@
+# home/management/commands/purge_sessions.py
+import os
+import time
+import signal
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+# A batch slower than this is halved next time; a fast one grows back
+DEFAULT_MAX_BATCH_TIME = 0.2  # seconds
+# Longest a batch may wait for a row or table lock before it is skipped (PostgreSQL)
+LOCK_TIMEOUT_MS = 100
+
+
+def delete_expired_batch(now, batch_size):
+    """
+    Delete up to batch_size sessions that expired before now, oldest first, in
+    one short transaction. Returns the number of rows deleted.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT_MS}ms'")
+        expired = Session.objects.filter(expire_date__lt=now).order_by('expire_date')
+        if connection.features.has_select_for_update_skip_locked:
+            # Sessions being saved by a request right now are left for the next pass
+            expired = expired.select_for_update(skip_locked=True)
+        # Range scan on the expire_date index, then delete by primary key
+        keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return 0
+        deleted, _ = Session.objects.filter(session_key__in=keys, expire_date__lt=now).delete()
+        return deleted
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in small batches with throttling, reporting rows/sec. "
+        "Unlike clearsessions it never runs one long DELETE over the whole table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Largest number of rows deleted per transaction")
+        parser.add_argument('--sleep', type=float, default=0.1, help="Pause between batches, in seconds")
+        parser.add_argument('--max-rate', type=float, default=0, help="Upper bound on rows deleted per second (0: no limit)")
+        parser.add_argument(
+            '--max-batch-time', type=float, default=DEFAULT_MAX_BATCH_TIME,
+            help="Batches slower than this (seconds) are halved in size",
+        )
+        parser.add_argument('--max-seconds', type=float, default=0, help="Stop a pass after this long (0: until done)")
+        parser.add_argument('--continuous', action='store_true', help="Keep running, starting a new pass every --interval seconds")
+        parser.add_argument('--interval', type=float, default=300, help="Pause between passes in continuous mode, in seconds")
+        parser.add_argument('--nice', type=int, default=0, help="Lower the CPU priority of this process by this much")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if options['nice']:
+            os.nice(options['nice'])
+
+        self.stopping = False
+        if options['continuous']:
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        while True:
+            if options['continuous']:
+                # A long-running loop must drop connections past CONN_MAX_AGE
+                # or broken by a database restart, as Django does per request
+                close_old_connections()
+            self.purge(options)
+            if not options['continuous'] or self.stopping:
+                break
+            self.wait(options['interval'])
+            if self.stopping:
+                break
+
+    def stop(self, signum, frame):
+        self.stdout.write("Stopping after the current batch")
+        self.stopping = True
+
+    def wait(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < deadline:
+            time.sleep(max(0, min(1.0, deadline - time.monotonic())))
+
+    def purge(self, options):
+        """One pass over the sessions that have expired by now"""
+        now = timezone.now()
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        deleted = 0
+        batches = 0
+        skipped = 0
+
+        while not self.stopping:
+            if options['max_seconds'] and time.monotonic() - started >= options['max_seconds']:
+                self.stdout.write(self.style.WARNING(f"Stopped after {options['max_seconds']:.0f}s; the rest is left for the next pass"))
+                break
+
+            batch_started = time.monotonic()
+            try:
+                count = delete_expired_batch(now, batch_size)
+            except DatabaseError as e:
+                # Most likely a lock timeout against live traffic: back off and retry smaller
+                skipped += 1
+                batch_size = max(1, batch_size // 2)
+                self.stderr.write(f"Batch failed ({e.__class__.__name__}: {e}); retrying with {batch_size} rows")
+                if skipped >= 10:
+                    self.stderr.write(self.style.ERROR("Giving up on this pass after 10 failed batches"))
+                    break
+                time.sleep(max(options['sleep'], 1.0))
+                continue
+            batch_time = time.monotonic() - batch_started
+
+            if count == 0:
+                break
+            deleted += count
+            batches += 1
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"Batch {batches}: {count} rows in {batch_time * 1000:.0f} ms")
+
+            # Keep every transaction short: shrink slow batches, grow fast ones back
+            if batch_time > options['max_batch_time']:
+                batch_size = max(1, batch_size // 2)
+            elif batch_size < options['batch_size']:
+                batch_size = min(options['batch_size'], batch_size * 2)
+
+            pause = options['sleep']
+            if options['max_rate']:
+                pause = max(pause, count / options['max_rate'] - batch_time)
+            if pause > 0:
+                time.sleep(pause)
+
+        elapsed = time.monotonic() - started
+        rate = deleted / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Purged {deleted} expired sessions in {batches} batches, {elapsed:.1f}s ({rate:.0f} rows/sec)"
+        )
+        return deleted
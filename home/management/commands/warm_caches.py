@@ -0,0 +1,34 @@
+# home/management/commands/warm_caches.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from home.warmup import STAGES, DEFAULT_PRODUCT_PAGES, run_warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm templates, catalogue caches, storefront pages and database connections "
+        "after a deploy. Stages run in parallel threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stage', action='append', dest='stages', choices=list(STAGES),
+            help="Stage to run (repeatable, default: all)",
+        )
+        parser.add_argument('--threads', type=int, default=len(STAGES))
+        parser.add_argument('--pages', type=int, default=DEFAULT_PRODUCT_PAGES, help="Product pages to pre-render per language")
+        parser.add_argument('--fail-on-error', action='store_true', help="Exit non-zero if any stage fails")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        results = run_warmup(options['stages'], threads=options['threads'], pages=options['pages'])
+        elapsed = time.perf_counter() - started
+
+        for result in results:
+            style = self.style.SUCCESS if result['ok'] else self.style.ERROR
+            self.stdout.write(style(f"{result['stage']:<12} {result['seconds'] * 1000:8.0f} ms  {result['summary']}"))
+        self.stdout.write(f"{'total':<12} {elapsed * 1000:8.0f} ms")
+
+        failed = [result['stage'] for result in results if not result['ok']]
+        if failed and options['fail_on_error']:
+            raise CommandError(f"Warm-up failed: {', '.join(failed)}")
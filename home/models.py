@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 class HomepageBanner(models.Model):
     title = models.CharField(max_length=200, help_text="Title for the banner")
@@ -50,4 +52,17 @@ class FeaturedProduct(models.Model):
         verbose_name_plural = "Featured Products"
     
     def __str__(self):
-        return self.product_name
\ No newline at end of file
+        return self.product_name
+
+
+@receiver(post_save, sender=HomepageBanner)
+@receiver(post_delete, sender=HomepageBanner)
+@receiver(post_save, sender=CategoryBanner)
+@receiver(post_delete, sender=CategoryBanner)
+@receiver(post_save, sender=FeaturedProduct)
+@receiver(post_delete, sender=FeaturedProduct)
+def invalidate_homepage_cache(sender, **kwargs):
+    """Homepage content is cached with the catalogue - move it to a new generation once committed"""
+    from products.cache import bump_catalogue_generation
+    # Bumping before commit would let a request rebuild entries from the old rows
+    transaction.on_commit(bump_catalogue_generation)
@@ -0,0 +1,38 @@
+# home/templatetags/assets.py
+import re
+from functools import lru_cache
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE_RE = re.compile(r'\s*([{};:,>])\s*')
+
+
+def minify_css(css):
+    """Strip comments and whitespace; enough for small hand-written critical CSS"""
+    css = CSS_COMMENT_RE.sub('', css)
+    css = CSS_SPACE_RE.sub(r'\1', css)
+    return ' '.join(css.split()).replace(';}', '}')
+
+
+@lru_cache(maxsize=None)
+def _read_static(path):
+    found = finders.find(path)
+    if not found:
+        raise template.TemplateSyntaxError(f"Static file {path} not found")
+    with open(found, encoding='utf-8') as f:
+        content = f.read()
+    return minify_css(content) if path.endswith('.css') else content
+
+
+@register.simple_tag
+def inline_static(path):
+    """Inline the (minified) contents of a static file, e.g. critical CSS"""
+    if settings.DEBUG:
+        # Pick up edits without a restart while developing
+        _read_static.cache_clear()
+    return mark_safe(_read_static(path))
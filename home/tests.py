@@ -1,3 +1,465 @@
-from django.test import TestCase
+import time
+from io import StringIO
+from django.test import SimpleTestCase, TestCase
+from django.urls import resolve
 
-# Create your tests here.
+from home.management.commands.profile_startup import LAZY_MODULES, measure_startup
+
+# Cold start budget for django.setup() + WSGI app + URLconf in a fresh interpreter
+COLD_START_BUDGET = 1.5  # seconds
+
+
+class ColdStartTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Best of three so one slow run on a busy machine does not fail the suite
+        cls.startup = min((measure_startup() for _ in range(3)), key=lambda run: run['total'])
+
+    def test_cold_start_within_budget(self):
+        self.assertLess(
+            self.startup['total'], COLD_START_BUDGET,
+            f"Cold start took {self.startup['total'] * 1000:.0f} ms",
+        )
+
+    def test_view_modules_not_imported_at_startup(self):
+        eager = [module for module in LAZY_MODULES if module in self.startup['modules']]
+        self.assertEqual(eager, [])
+
+    def test_lazy_views_resolve_on_first_use(self):
+        view = resolve('/cart/').func
+        self.assertEqual(view.lazy_path, 'cart.views.cart_detail')
+        from cart.views import cart_detail
+        self.assertIs(view.load(), cart_detail)
+
+    def test_missing_view_falls_back_to_placeholder(self):
+        from ambertek.urls import placeholder_function
+        self.assertIs(resolve('/test-email/').func.load(), placeholder_function)
+
+
+class TieredCacheTests(SimpleTestCase):
+    """Two TieredCache instances with their own L1 stand in for two gunicorn workers"""
+
+    def setUp(self):
+        import tempfile
+        from utils.tiered_cache import TieredCache, _stores
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        def worker(name):
+            self.addCleanup(_stores.pop, name, None)
+            return TieredCache(name, {
+                'OPTIONS': {
+                    'L2': {
+                        'BACKEND': 'utils.tiered_cache.CountingFileBasedCache',
+                        'LOCATION': self.directory.name,
+                    },
+                    'L1_MAX_ENTRIES': 2,
+                    'SYNC_INTERVAL': 0,
+                },
+            })
+
+        self.first = worker('test-worker-1')
+        self.second = worker('test-worker-2')
+
+    def test_read_through_fills_l1(self):
+        self.first.set('key', {'value': 1})
+        self.assertEqual(self.second.get('key'), {'value': 1})
+        self.assertEqual(self.second.get('key'), {'value': 1})
+        stats = self.second.stats()
+        self.assertEqual((stats['l2']['hits'], stats['l1']['hits']), (1, 1))
+
+    def test_lru_evicts_oldest_entry(self):
+        for key in ('a', 'b', 'c'):
+            self.first.set(key, key)
+        stats = self.first.stats()
+        self.assertEqual((stats['l1']['entries'], stats['l1']['evictions']), (2, 1))
+        # Still served from L2
+        self.assertEqual(self.first.get('a'), 'a')
+
+    def test_incr_invalidates_other_workers(self):
+        self.first.set('generation', 1, None)
+        self.assertEqual(self.second.get('generation'), 1)
+        self.first.incr('generation')
+        self.assertEqual(self.second.get('generation'), 2)
+        self.assertEqual(self.second.stats()['broadcasts']['received'], 1)
+
+    def test_incremented_counter_outlives_default_timeout(self):
+        from unittest import mock
+
+        self.first.set('generation', 1, None)
+        self.first.incr('generation')
+        later = time.time() + self.first.l2.default_timeout + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(self.second.get('generation'), 2)
+
+    def test_concurrent_incr_loses_no_updates(self):
+        import threading
+
+        self.first.set('generation', 0, None)
+
+        def bump(cache):
+            for _ in range(25):
+                cache.incr('generation')
+
+        threads = [threading.Thread(target=bump, args=(cache,)) for cache in (self.first, self.second) * 2]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.second.get('generation'), 100)
+
+    def test_lock_keys_skip_l1(self):
+        self.assertTrue(self.first.add('page:lock', 1))
+        self.assertFalse(self.second.add('page:lock', 1))
+        self.first.delete('page:lock')
+        self.assertEqual(self.first.stats()['broadcasts']['sent'], 0)
+        self.assertIsNone(self.second.get('page:lock'))
+
+
+class SessionSerializerTests(SimpleTestCase):
+
+    def setUp(self):
+        from utils.session_serializer import CompactSessionSerializer
+        self.serializer = CompactSessionSerializer()
+
+    def test_cart_round_trips(self):
+        from home.management.commands.bench_sessions import sample_session
+        session = sample_session(20)
+        self.assertEqual(self.serializer.loads(self.serializer.dumps(session)), session)
+
+    def test_decimal_and_unusual_cart_round_trip(self):
+        from decimal import Decimal
+        session = {
+            'cart': {'7': {'name': 'Radio', 'price': Decimal('19.90'), 'quantity': 2}},
+            'custom': [1, 'two', {'three': None}],
+        }
+        self.assertEqual(self.serializer.loads(self.serializer.dumps(session)), session)
+
+    def test_json_sessions_still_load(self):
+        from django.core.signing import JSONSerializer
+        session = {'cart': {}, 'next_url': '/cart/'}
+        self.assertEqual(self.serializer.loads(JSONSerializer().dumps(session)), session)
+
+
+class PurgeSessionsTests(TestCase):
+
+    def test_deletes_only_expired_sessions_in_batches(self):
+        from datetime import timedelta
+        from io import StringIO
+        from django.contrib.sessions.models import Session
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1)) for i in range(7)]
+            + [Session(session_key='live', session_data='', expire_date=now + timedelta(days=1))]
+        )
+        output = StringIO()
+        call_command('purge_sessions', batch_size=3, sleep=0, verbosity=2, stdout=output)
+
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+        self.assertIn("Purged 7 expired sessions in 3 batches", output.getvalue())
+
+    def test_continuous_mode_refreshes_connections_before_each_pass(self):
+        from unittest import mock
+        from django.core.management import call_command
+        from home.management.commands.purge_sessions import Command
+
+        def wait(command, seconds):
+            command.stopping = wait.calls == 1
+            wait.calls += 1
+        wait.calls = 0
+
+        module = 'home.management.commands.purge_sessions'
+        with mock.patch(f'{module}.close_old_connections') as close_old_connections, \
+                mock.patch(f'{module}.signal.signal'), mock.patch.object(Command, 'wait', wait):
+            call_command('purge_sessions', continuous=True, sleep=0, stdout=StringIO())
+        self.assertEqual(close_old_connections.call_count, 2)
+
+
+class I18nTests(SimpleTestCase):
+
+    def test_ui_text_formats_and_falls_back_to_english(self):
+        from unittest import mock
+        from utils.i18n import MESSAGES, ui_text
+
+        self.assertEqual(ui_text('cart_item_added', 'sw', name='Radio'), "Radio imeongezwa kwenye gari la ununuzi!")
+        self.assertEqual(ui_text('cart_item_added', 'fr', name='Radio'), "Radio has been added to your cart!")
+        with mock.patch.dict(MESSAGES, {'test_english_only': {'en': "Only {what}"}}):
+            self.assertEqual(ui_text('test_english_only', 'sw', what='English'), "Only English")
+
+    def test_get_language_prefers_session_then_cookie(self):
+        from django.test import RequestFactory
+        from utils.i18n import LANGUAGE_KEY, get_language
+
+        def language(session, cookie):
+            request = RequestFactory().get('/', HTTP_COOKIE=f'{LANGUAGE_KEY}={cookie}' if cookie else '')
+            request.session = session
+            return get_language(request)
+
+        self.assertEqual(language({LANGUAGE_KEY: 'en'}, 'sw'), 'en')
+        self.assertEqual(language({}, 'sw'), 'sw')
+        self.assertEqual(language({}, None), 'en')
+        self.assertEqual(language({LANGUAGE_KEY: 'fr'}, None), 'en')
+
+
+class RateLimitTests(SimpleTestCase):
+
+    def setUp(self):
+        import uuid
+        from utils.rate_limit import RateLimit, _local
+        # Fresh bucket names: the shared cache outlives test runs
+        self.name = f"test-{uuid.uuid4().hex}"
+        self.limit = RateLimit(self.name, '60/m', burst=3, paths=[r'^/accounts/login/$'])
+        self.addCleanup(_local.clear)
+
+    def test_burst_then_refill(self):
+        now = 1000.0
+        self.assertEqual([self.limit.consume('ip:1', now) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(self.limit.consume('ip:1', now), 1.0)
+        # Another client has its own bucket
+        self.assertEqual(self.limit.consume('ip:2', now), 0)
+        # One token per second
+        self.assertEqual(self.limit.consume('ip:1', now + 1), 0)
+        self.assertGreater(self.limit.consume('ip:1', now + 1), 0)
+
+    def test_buckets_are_shared_between_workers(self):
+        from utils.rate_limit import _local
+        now = 1000.0
+        for _ in range(3):
+            self.limit.consume('ip:1', now)
+        # A worker that has not seen this client still finds the bucket empty
+        _local.clear()
+        self.assertGreater(self.limit.consume('ip:1', now), 0)
+
+    def test_middleware_answers_429_with_retry_after(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from utils.rate_limit import RateLimitMiddleware
+
+        middleware = RateLimitMiddleware(lambda request: HttpResponse('ok'))
+        middleware.limits = [self.limit]
+        factory = RequestFactory()
+        statuses = [
+            middleware(factory.post('/accounts/login/', REMOTE_ADDR='192.0.2.1')).status_code for _ in range(4)
+        ]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        response = middleware(factory.post('/accounts/login/', REMOTE_ADDR='192.0.2.1'))
+        self.assertEqual(response['Retry-After'], '1')
+        # Other clients, and GETs of the login page, are not affected
+        self.assertEqual(middleware(factory.post('/accounts/login/', REMOTE_ADDR='192.0.2.2')).status_code, 200)
+        self.assertEqual(middleware(factory.get('/accounts/login/', REMOTE_ADDR='192.0.2.1')).status_code, 200)
+
+
+    def test_decorator_limits_async_views(self):
+        from unittest import mock
+        from asgiref.sync import async_to_sync, iscoroutinefunction
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from utils import rate_limit as rate_limits
+
+        async def view(request):
+            return HttpResponse('ok')
+
+        with mock.patch.dict(rate_limits.LIMITS, {self.name: self.limit}):
+            limited = rate_limits.rate_limit(self.name)(view)
+        # Django must still see a coroutine view, or it runs it in a thread
+        self.assertTrue(iscoroutinefunction(limited))
+        factory = RequestFactory()
+        statuses = [
+            async_to_sync(limited)(factory.post('/anywhere/', REMOTE_ADDR='192.0.2.1')).status_code for _ in range(4)
+        ]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_every_order_view_is_limited(self):
+        from orders import async_views, views
+
+        for view in (views.place_order, async_views.place_order):
+            with self.subTest(view=view.__module__):
+                # Set by functools.wraps in rate_limit()
+                self.assertTrue(hasattr(view, '__wrapped__'))
+
+class MinifyHtmlTests(SimpleTestCase):
+
+    def test_attribute_values_survive_unchanged(self):
+        from utils.compression import minify_html
+
+        html = b'<p>a    b\n\n  c</p><input value="a    b" title="x\n\n  y" data-x=\'1 > 0   2\'>  <b> d </b>'
+        self.assertEqual(
+            minify_html(html),
+            b'<p>a b\nc</p><input value="a    b" title="x\n\n  y" data-x=\'1 > 0   2\'> <b> d </b>',
+        )
+
+    def test_admin_and_form_pages_are_not_minified(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory, override_settings
+        from utils.compression import CompressionMiddleware
+
+        middleware = CompressionMiddleware(lambda request: None)
+        pages = [
+            ('/products/', b'<p>a    b</p>', b'<p>a b</p>'),
+            ('/admin/products/product/1/change/', b'<p>a    b</p>', b'<p>a    b</p>'),
+            ('/contact/', b'<p>a    b</p><textarea name="m"></textarea>', b'<p>a    b</p><textarea name="m"></textarea>'),
+        ]
+        with override_settings(HTML_MINIFY=True):
+            for path, content, expected in pages:
+                with self.subTest(path=path):
+                    response = middleware.process_response(RequestFactory().get(path), HttpResponse(content))
+                    self.assertEqual(response.content, expected)
+
+
+class PageCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from products.models import Category, Product
+        cls.product = Product.objects.create(
+            name='Radio', description='', price=100, category=Category.objects.create(name='Audio'),
+            image='products/p.jpg',
+        )
+
+    def setUp(self):
+        from django.core.cache import cache
+        # Pages cached by earlier runs live in the shared file cache
+        cache.clear()
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+
+    def get(self, url, client=None, **extra):
+        return (client or self.client).get(url, secure=True, **extra)
+
+    def test_second_get_is_served_from_the_cache(self):
+        self.assertEqual(self.get('/')['X-Page-Cache'], 'miss')
+        # No session cookie: no view, no query
+        with self.assertNumQueries(0):
+            response = self.get('/')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+    def test_pages_are_keyed_by_query_string_and_language(self):
+        self.assertEqual(self.get('/products/?price=0-50000&video=1')['X-Page-Cache'], 'miss')
+        self.assertEqual(self.get('/products/?video=1&price=0-50000')['X-Page-Cache'], 'hit')
+        self.assertEqual(self.get('/products/')['X-Page-Cache'], 'miss')
+
+        self.client.cookies['ambertek_language'] = 'sw'
+        response = self.get('/products/')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Bidhaa Zote')
+        self.assertEqual(self.get('/products/')['X-Page-Cache'], 'hit')
+
+    def test_posts_and_other_paths_bypass_the_cache(self):
+        self.get('/products/')
+        self.assertFalse(self.client.post('/products/', secure=True).has_header('X-Page-Cache'))
+        for _ in range(2):
+            self.assertFalse(self.get('/accounts/login/').has_header('X-Page-Cache'))
+
+    def test_every_hit_gets_the_visitors_own_csrf_token(self):
+        import re
+        from django.test import Client
+        from utils.page_cache import CSRF_PLACEHOLDER
+
+        url = f"/products/{self.product.pk}/"
+        self.get(url)
+        tokens = []
+        for _ in range(2):
+            visitor = Client(enforce_csrf_checks=True, HTTP_HOST='localhost')
+            response = self.get(url, client=visitor)
+            self.assertEqual(response['X-Page-Cache'], 'hit')
+            self.assertNotIn(CSRF_PLACEHOLDER, response.content)
+            token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', response.content).group(1).decode()
+            tokens.append(token)
+            # The token pairs with the cookie this response set, so the form posts
+            response = visitor.post(
+                f"/cart/add/{self.product.pk}/", {'csrfmiddlewaretoken': token, 'quantity': 1},
+                secure=True, HTTP_REFERER=f"https://localhost{url}",
+            )
+            self.assertNotEqual(response.status_code, 403)
+        self.assertNotEqual(tokens[0], tokens[1])
+
+
+class PageShellTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+        from products.models import Category, Product
+        cls.user = User.objects.create_user('zawadi_k', 'zawadi@example.com', 'correct-horse-3')
+        cls.product = Product.objects.create(
+            name='Radio', description='', price=100, category=Category.objects.create(name='Audio'),
+            image='products/p.jpg',
+        )
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        self.client.force_login(self.user)
+        # Leaves a cart of two and an "added to cart" flash message in the session
+        self.client.post(f"/cart/add/{self.product.pk}/", {'quantity': 2}, secure=True)
+
+    def test_logged_in_hit_holds_nothing_about_the_user(self):
+        from django.test import Client
+
+        # Rendered for an anonymous visitor, then served to the logged-in one
+        Client(HTTP_HOST='localhost').get('/products/', secure=True)
+        response = self.client.get('/products/', secure=True)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertNotContains(response, 'zawadi_k')
+        self.assertNotContains(response, 'added to your cart')
+        self.assertContains(response, 'data-session="cart_count"></span>')
+
+        # A miss rendered for the logged-in user is just as anonymous
+        response = self.client.get('/', secure=True)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertNotContains(response, 'zawadi_k')
+
+    def test_session_state_fills_the_slots_once(self):
+        response = self.client.get('/session-state.json', secure=True)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-store', response['Cache-Control'])
+        state = response.json()
+        self.assertEqual(
+            (state['authenticated'], state['username'], state['cart_count']), (True, 'zawadi_k', 2),
+        )
+        self.assertEqual([message['level'] for message in state['messages']], ['success'])
+        self.assertEqual(state['messages'][0]['text'], 'Radio has been added to your cart!')
+        # Reading the state consumed the flash messages
+        self.assertEqual(self.client.get('/session-state.json', secure=True).json()['messages'], [])
+
+
+class WarmupTests(SimpleTestCase):
+
+    def test_broken_template_fails_the_stage(self):
+        import tempfile
+        from pathlib import Path
+        from django.conf import settings
+        from django.core.management import CommandError, call_command
+        from django.test import override_settings
+        from home.warmup import run_warmup
+
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, 'ok.html').write_text('{% if ok %}fine{% endif %}')
+            Path(directory, 'broken.html').write_text('{% if %}')
+            templates = [{**settings.TEMPLATES[0], 'DIRS': [directory]}]
+            with override_settings(TEMPLATES=templates), self.assertLogs('home.warmup', 'WARNING'):
+                [result] = run_warmup(['templates'])
+                self.assertFalse(result['ok'])
+                self.assertIn('1 failed (broken.html)', result['summary'])
+                with self.assertRaisesMessage(CommandError, 'Warm-up failed: templates'):
+                    call_command('warm_caches', '--stage', 'templates', '--fail-on-error', stdout=StringIO())
+
+
+class HomepageCacheTests(TestCase):
+
+    def test_banner_changes_move_the_generation_on_commit(self):
+        from home.models import HomepageBanner
+        from products.cache import get_catalogue_generation
+
+        generation = get_catalogue_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            HomepageBanner.objects.create(title='Sale', image='homepage/banners/sale.jpg')
+            self.assertEqual(get_catalogue_generation(), generation)
+        self.assertGreater(get_catalogue_generation(), generation)
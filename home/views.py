@@ -1,3 +1,27 @@
-from django.shortcuts import render
+from django.contrib.messages import get_messages
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from cart.context_processors import cart_items_count
+from utils.i18n import get_language
 
-# Create your views here.
+
+@never_cache
+def session_state(request):
+    """
+    Per-user parts of a cached page shell (see utils/page_cache.py): login
+    state, display name, cart count and pending flash messages. Reading it
+    consumes the messages, just like rendering them would.
+    """
+    user = request.user
+    is_authenticated = user.is_authenticated
+    return JsonResponse({
+        'authenticated': is_authenticated,
+        'username': user.get_username() if is_authenticated else '',
+        'display_name': (user.get_full_name() or user.get_username()) if is_authenticated else '',
+        'cart_count': cart_items_count(request)['cart_items_count'],
+        'language': get_language(request),
+        'messages': [
+            {'level': message.tags, 'text': str(message)}
+            for message in get_messages(request)
+        ],
+    })
@@ -0,0 +1,170 @@
+# home/warmup.py
+"""
+Cache warm-up run after a deploy (manage.py warm_caches) or in the gunicorn
+master before workers fork (see gunicorn.conf.py).
+
+Each stage returns a short summary string, or raises to mark itself failed;
+run_warmup() runs the selected stages in parallel threads and reports how
+long each one took.
+"""
+import time
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.test import Client
+from utils.i18n import LANGUAGE_KEY, SUPPORTED_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+# Product pages pre-rendered per language
+DEFAULT_PRODUCT_PAGES = 20
+
+
+class WarmupError(Exception):
+    """A stage finished but found problems (its message is the stage summary)"""
+
+
+def warm_templates():
+    """Compile every template under the template directories into the cached loader"""
+    compiled = 0
+    failed = []
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory)
+            for path in sorted(directory.rglob('*.html')):
+                name = path.relative_to(directory).as_posix()
+                try:
+                    engine.get_template(name)
+                    compiled += 1
+                except TemplateSyntaxError as e:
+                    failed.append(name)
+                    logger.warning(f"Template {name} does not compile: {e}")
+    summary = f"{compiled} templates compiled"
+    if failed:
+        # A broken template must fail the stage, and with it warm_caches --fail-on-error
+        raise WarmupError(f"{summary}, {len(failed)} failed ({', '.join(failed)})")
+    return summary
+
+
+def warm_catalogue():
+    """Fill the homepage, category and product-card caches"""
+    from products import cache as catalogue_cache
+    from home.cache import get_homepage_content
+
+    get_homepage_content()
+    categories = catalogue_cache.get_categories()
+    cards = len(catalogue_cache.get_products())
+    for category in categories:
+        catalogue_cache.get_products(category.id)
+    return f"homepage, {len(categories)} categories, {cards} product cards"
+
+
+def most_visited_products(limit=DEFAULT_PRODUCT_PAGES):
+    """
+    IDs of the products most likely to be visited: best sellers by quantity
+    ordered, topped up with the newest available products.
+    """
+    from products.models import Product
+    from products.rankings import BEST_SELLERS, ranked_product_ids
+
+    product_ids = ranked_product_ids(BEST_SELLERS, limit=limit)
+    if len(product_ids) < limit:
+        newest = (
+            Product.objects.filter(available=True)
+            .exclude(id__in=product_ids)
+            .order_by('-created_at')
+            .values_list('id', flat=True)[:limit - len(product_ids)]
+        )
+        product_ids.extend(newest)
+    return product_ids
+
+
+def warm_pages(limit=DEFAULT_PRODUCT_PAGES):
+    """
+    Render the storefront and most-visited product pages in every language
+    through the full middleware stack, so template fragments, query paths
+    and any page-level caches are hot.
+    """
+    from django.urls import reverse
+    from products import cache as catalogue_cache
+
+    paths = [reverse('home'), reverse('products'), reverse('contact')]
+    paths += [reverse('products_by_category', args=[category.id]) for category in catalogue_cache.get_categories()]
+    paths += [reverse('product_detail', args=[product_id]) for product_id in most_visited_products(limit)]
+
+    host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '0.0.0.0')), 'localhost')
+    rendered = 0
+    errors = 0
+    for language in SUPPORTED_LANGUAGES:
+        client = Client(HTTP_HOST=host)
+        client.cookies[LANGUAGE_KEY] = language
+        for path in paths:
+            response = client.get(path, secure=True)
+            if response.status_code == 200:
+                rendered += 1
+            else:
+                errors += 1
+                logger.warning(f"Warm-up of {path} ({language}) returned {response.status_code}")
+    summary = f"{rendered} pages rendered in {len(SUPPORTED_LANGUAGES)} languages"
+    if errors:
+        summary += f", {errors} errors"
+    return summary
+
+
+def warm_connections():
+    """
+    Open a connection to every database and run a trivial query. Wakes a
+    sleeping database server and fails the deploy early if it is unreachable.
+    """
+    timings = []
+    for alias in connections:
+        started = time.perf_counter()
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        timings.append(f"{alias} {(time.perf_counter() - started) * 1000:.0f} ms")
+    return f"connected ({', '.join(timings)})"
+
+
+STAGES = {
+    'templates': warm_templates,
+    'catalogue': warm_catalogue,
+    'pages': warm_pages,
+    'connections': warm_connections,
+}
+
+
+def _run_stage(name, **options):
+    started = time.perf_counter()
+    try:
+        summary = STAGES[name](**options)
+        ok = True
+    except WarmupError as e:
+        # The stage has already logged what it found
+        summary = f"failed: {e}"
+        ok = False
+    except Exception as e:
+        logger.exception(f"Warm-up stage {name} failed")
+        summary = f"failed: {e}"
+        ok = False
+    finally:
+        # Connections are per thread; never leave one behind in a pool thread
+        connections.close_all()
+    return {'stage': name, 'ok': ok, 'summary': summary, 'seconds': time.perf_counter() - started}
+
+
+def run_warmup(stages=None, threads=4, pages=DEFAULT_PRODUCT_PAGES):
+    """Run the given warm-up stages (default: all) in parallel; returns one result per stage"""
+    stages = list(stages or STAGES)
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown warm-up stage(s): {', '.join(unknown)}")
+
+    with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix='warmup') as executor:
+        futures = [
+            executor.submit(_run_stage, name, **({'limit': pages} if name == 'pages' else {}))
+            for name in stages
+        ]
+        return [future.result() for future in futures]
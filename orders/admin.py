@@ -1,7 +1,9 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Order, OrderItem
+from .models import Order, OrderItem, StockReservation
+from .inventory import OutOfStock, release_stock, restore_stock
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -23,13 +25,26 @@ class OrderItemInline(admin.TabularInline):
         return False
 
 
+class StockReservationInline(admin.TabularInline):
+    model = StockReservation
+    extra = 0
+    readonly_fields = ['product', 'quantity', 'created_at', 'released_at']
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_number', 'customer_name', 'customer_phone', 'get_total_amount_formatted', 
                    'get_payment_method_display', 'get_status_display', 'created_at', 'get_admin_actions']
     list_filter = ['status', 'payment_method', 'created_at', 'payment_status']
     search_fields = ['order_number', 'customer_name', 'customer_phone', 'customer_email']
     readonly_fields = ['order_number', 'created_at', 'updated_at', 'get_items_count']
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, StockReservationInline]
     date_hierarchy = 'created_at'
     list_per_page = 20
     
@@ -93,25 +108,58 @@ class OrderAdmin(admin.ModelAdmin):
         return obj.items.count()
     get_items_count.short_description = 'Items Count'
     
+    def save_model(self, request, obj, form, change):
+        """Release or re-take the order's stock when the change form moves it in or out of cancelled"""
+        if change and 'status' in form.changed_data:
+            if obj.status == 'cancelled':
+                super().save_model(request, obj, form, change)
+                release_stock([obj])
+                return
+            if form.initial.get('status') == 'cancelled':
+                try:
+                    restore_stock([obj])
+                except OutOfStock as e:
+                    obj.status = 'cancelled'
+                    self.message_user(request, f"Order left cancelled: {e}", messages.ERROR)
+        super().save_model(request, obj, form, change)
+    
     # Admin bulk actions
+    def set_status(self, request, queryset, status):
+        """Set status on queryset, taking stock again for reopened cancelled orders"""
+        try:
+            with transaction.atomic():
+                restored = restore_stock(queryset.filter(status='cancelled'))
+                updated = queryset.update(status=status)
+        except OutOfStock as e:
+            self.message_user(request, f"No orders changed: {e}", messages.ERROR)
+            return
+        message = f'{updated} order(s) marked as {status}.'
+        if restored:
+            message += f' {restored} stock reservation(s) taken again.'
+        self.message_user(request, message)
+    
     def mark_as_processing(self, request, queryset):
-        updated = queryset.update(status='processing')
-        self.message_user(request, f'{updated} order(s) marked as processing.')
+        self.set_status(request, queryset, 'processing')
     mark_as_processing.short_description = "Mark selected as Processing"
     
     def mark_as_shipped(self, request, queryset):
-        updated = queryset.update(status='shipped')
-        self.message_user(request, f'{updated} order(s) marked as shipped.')
+        self.set_status(request, queryset, 'shipped')
     mark_as_shipped.short_description = "Mark selected as Shipped"
     
     def mark_as_delivered(self, request, queryset):
-        updated = queryset.update(status='delivered')
-        self.message_user(request, f'{updated} order(s) marked as delivered.')
+        self.set_status(request, queryset, 'delivered')
     mark_as_delivered.short_description = "Mark selected as Delivered"
     
     def mark_as_cancelled(self, request, queryset):
-        updated = queryset.update(status='cancelled')
-        self.message_user(request, f'{updated} order(s) marked as cancelled.')
+        # Fixed ids: a changelist filtered by status would match nothing after the update
+        orders = Order.objects.filter(pk__in=list(queryset.values_list('pk', flat=True)))
+        with transaction.atomic():
+            released = release_stock(orders)
+            updated = orders.update(status='cancelled')
+        self.message_user(
+            request,
+            f'{updated} order(s) marked as cancelled, {released} stock reservation(s) released.'
+        )
     mark_as_cancelled.short_description = "Mark selected as Cancelled"
 
 
@@ -123,6 +171,7 @@ admin.site.register(Order, OrderAdmin)
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['get_order_number', 'product_name', 'quantity', 'get_price_display', 'get_item_total_display']
+    list_select_related = ['order']
     list_filter = ['order__status']
     search_fields = ['product_name', 'order__order_number']
     readonly_fields = ['order', 'product_id', 'product_name', 'quantity', 'get_price_display', 'get_item_total_display']
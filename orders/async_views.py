@@ -0,0 +1,119 @@
+# orders/async_views.py
+"""
+Async order placement for ASGI deployments (see ambertek/asgi.py).
+
+Same behaviour as orders.views.place_order, but the SMTP round trips and
+SMS/WhatsApp notifications run concurrently on the event loop instead of
+holding a worker for the whole slow notification path.
+"""
+import asyncio
+import logging
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import render, redirect
+from django.utils import timezone
+from products.models import Product
+from utils.i18n import ui_text
+from utils.rate_limit import rate_limit
+from cart.async_views import get_request_state
+from .models import Order
+from .inventory import OutOfStock
+from .views import (
+    cart_product_ids, price_cart_items, order_fields_from_post,
+    order_placed_message, render_order_success, send_order_notifications,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _no_email():
+    return False
+
+
+@rate_limit('place_order')
+async def place_order(request):
+    """Place order view (async)"""
+    is_authenticated, current_language = await get_request_state(request)
+
+    if request.method != 'POST':
+        return redirect('checkout')
+
+    user = request.user if is_authenticated else None
+
+    # A repeated submission of the same checkout form gets the order it already created
+    checkout_token = request.POST.get('checkout_token', '').strip()[:64]
+    existing_order = await sync_to_async(Order.objects.get_by_idempotency_key)(checkout_token, user)
+    if existing_order is not None:
+        return await sync_to_async(render_order_success)(request, existing_order, current_language)
+
+    try:
+        cart_items = request.session.get('cart', {})
+        if not cart_items:
+            messages.warning(request, ui_text('your_cart_empty_short', current_language))
+            return redirect('cart_detail')
+
+        # Calculate total and collect order items
+        products = {
+            product.id: product
+            async for product in Product.objects.filter(id__in=cart_product_ids(cart_items))
+        }
+        total_amount, order_items = price_cart_items(cart_items, products)
+
+        # Order creation is transactional, which the async ORM cannot do yet
+        order, created = await sync_to_async(Order.objects.create_idempotent)(
+            checkout_token,
+            order_items,
+            **order_fields_from_post(request, user, total_amount)
+        )
+
+        if not created:
+            return await sync_to_async(render_order_success)(request, order, current_language)
+
+        logger.info(f"Order created: id {order.id}, number {order.order_number}")
+
+        # Send SMS/WhatsApp and both emails concurrently
+        from utils.email_service import email_service
+        _, email_success, admin_email_success = await asyncio.gather(
+            sync_to_async(send_order_notifications)(order, cart_items, current_language),
+            email_service.asend_order_confirmation(order) if order.customer_email else _no_email(),
+            email_service.asend_admin_notification(order),
+        )
+
+        # Save email status
+        now = timezone.now()
+        if email_success:
+            order.confirmation_email_sent = True
+            order.confirmation_email_sent_at = now
+        if admin_email_success:
+            order.admin_email_sent = True
+            order.admin_email_sent_at = now
+        if email_success or admin_email_success:
+            await order.asave(update_fields=[
+                'confirmation_email_sent', 'confirmation_email_sent_at',
+                'admin_email_sent', 'admin_email_sent_at'
+            ])
+
+        # Clear cart
+        if 'cart' in request.session:
+            del request.session['cart']
+            request.session.modified = True
+
+        messages.success(request, order_placed_message(order, current_language, email_success))
+
+        return await sync_to_async(render)(request, 'orders/order_success.html', {
+            'order': order,
+            'current_language': current_language,
+            'cart_items_count': 0,
+            'email_sent': email_success,
+            'admin_email_sent': admin_email_success,
+        })
+
+    except OutOfStock as e:
+        messages.error(request, ui_text('out_of_stock', current_language, name=e.product_name))
+        return redirect('cart_detail')
+
+    except Exception as e:
+        logger.exception(f"Order placement error: {e}")
+
+        messages.error(request, ui_text('order_place_failed', current_language, error=str(e)))
+        return redirect('checkout')
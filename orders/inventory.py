@@ -0,0 +1,138 @@
+# orders/inventory.py
+"""
+Stock reservation for orders.
+
+Stock is taken with a single conditional UPDATE per product
+(stock = stock - n WHERE stock >= n), so concurrent checkouts can never
+oversell and no row lock outlives the order transaction. Products with
+stock left empty are not tracked and always succeed.
+
+Cancelling or deleting an order releases its reservations (release_stock);
+reopening a cancelled order takes the stock again (restore_stock). Both
+claim each StockReservation row with a conditional UPDATE of released_at
+first, so a reservation is returned or re-taken at most once.
+"""
+import logging
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from products.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class OutOfStock(Exception):
+    """Raised when a product does not have enough stock for an order"""
+
+    def __init__(self, product_id, product_name, requested):
+        self.product_id = product_id
+        self.product_name = product_name
+        self.requested = requested
+        super().__init__(f"Not enough stock for {product_name} (requested {requested})")
+
+
+def reserve_stock(order, items):
+    """
+    Take stock for every item of order and write the reservation ledger.
+
+    items is a list of dicts with product_id, product_name and quantity.
+    Raises OutOfStock, rolling back every reservation made so far.
+    """
+    from .models import StockReservation
+
+    # Merge duplicate lines and lock products in a fixed order to rule out deadlocks
+    quantities = {}
+    names = {}
+    for item in items:
+        quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+        names[item['product_id']] = item.get('product_name', str(item['product_id']))
+
+    reservations = []
+    with transaction.atomic():
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            updated = Product.objects.filter(
+                Q(stock__isnull=True) | Q(stock__gte=quantity),
+                id=product_id,
+            ).update(stock=F('stock') - quantity)
+            if not updated:
+                raise OutOfStock(product_id, names[product_id], quantity)
+            reservations.append(StockReservation(order=order, product_id=product_id, quantity=quantity))
+        StockReservation.objects.bulk_create(reservations)
+
+    return reservations
+
+
+def release_stock(orders):
+    """
+    Return the stock held by orders (an Order queryset or list) to inventory.
+    Each reservation is released at most once, however often this is called.
+    Returns the number of reservations released.
+    """
+    from .models import StockReservation
+
+    from products.rankings import remove_sales
+
+    pending = StockReservation.objects.filter(
+        order__in=orders,
+        released_at__isnull=True,
+    ).values_list('id', 'product_id', 'quantity', 'order__created_at')
+
+    released = 0
+    for reservation_id, product_id, quantity, ordered_at in pending:
+        with transaction.atomic():
+            # Claim the reservation first so a concurrent release cannot double-count it
+            claimed = StockReservation.objects.filter(
+                id=reservation_id,
+                released_at__isnull=True,
+            ).update(released_at=timezone.now())
+            if not claimed:
+                continue
+            Product.objects.filter(id=product_id).update(stock=F('stock') + quantity)
+            # A released order no longer counts towards best sellers and trending
+            remove_sales(product_id, quantity, ordered_at)
+        released += 1
+
+    if released:
+        logger.info(f"Released {released} stock reservation(s)")
+    return released
+
+
+def restore_stock(orders):
+    """
+    Take the stock of released reservations of orders (an Order queryset or
+    list) again, e.g. when a cancelled order is reopened. Raises OutOfStock,
+    rolling back everything restored so far, if a product no longer has
+    enough. Returns the number of reservations restored.
+    """
+    from .models import StockReservation
+
+    from products.rankings import record_sales
+
+    # Same product order as reserve_stock, so this cannot deadlock against checkouts
+    released = StockReservation.objects.filter(
+        order__in=orders,
+        released_at__isnull=False,
+    ).order_by('product_id', 'id').values_list('id', 'product_id', 'product__name', 'quantity', 'order__created_at')
+
+    restored = 0
+    with transaction.atomic():
+        for reservation_id, product_id, product_name, quantity, ordered_at in released:
+            claimed = StockReservation.objects.filter(
+                id=reservation_id,
+                released_at__isnull=False,
+            ).update(released_at=None)
+            if not claimed:
+                continue
+            updated = Product.objects.filter(
+                Q(stock__isnull=True) | Q(stock__gte=quantity),
+                id=product_id,
+            ).update(stock=F('stock') - quantity)
+            if not updated:
+                raise OutOfStock(product_id, product_name, quantity)
+            record_sales([{'product_id': product_id, 'quantity': quantity}], ordered_at)
+            restored += 1
+
+    if restored:
+        logger.info(f"Restored {restored} stock reservation(s)")
+    return restored
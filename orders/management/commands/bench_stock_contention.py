@@ -0,0 +1,88 @@
+# orders/management/commands/bench_stock_contention.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, OperationalError
+from django.db.models import Sum
+from products.models import Category, Product
+from orders.models import Order, StockReservation, new_checkout_token
+from orders.inventory import OutOfStock
+
+
+class Command(BaseCommand):
+    help = "Place many concurrent orders for one hot product and check nothing is oversold"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=2000, help="Orders to place")
+        parser.add_argument('--stock', type=int, default=500, help="Initial stock of the hot product")
+        parser.add_argument('--workers', type=int, default=32, help="Concurrent threads")
+        parser.add_argument('--keep', action='store_true', help="Keep the benchmark product and orders")
+
+    def handle(self, *args, **options):
+        category, _ = Category.objects.get_or_create(name='Benchmark')
+        product = Product.objects.create(
+            name='Benchmark hot SKU',
+            description='Created by bench_stock_contention',
+            price=1000,
+            category=category,
+            image='products/benchmark.jpg',
+            stock=options['stock'],
+        )
+        item = {
+            'product_id': product.id,
+            'product_name': product.name,
+            'quantity': 1,
+            'price': product.price,
+        }
+
+        def place_one(_):
+            try:
+                Order.objects.create_idempotent(
+                    new_checkout_token(),
+                    [item],
+                    customer_name='Benchmark',
+                    customer_email='bench@example.com',
+                    customer_phone='0',
+                    customer_address='-',
+                    total_amount=product.price,
+                )
+                return 'placed'
+            except OutOfStock:
+                return 'out_of_stock'
+            except OperationalError:
+                return 'failed'
+            finally:
+                connection.close()
+
+        self.stdout.write(
+            f"Placing {options['orders']} orders for a SKU with {options['stock']} units "
+            f"on {options['workers']} threads..."
+        )
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(place_one, range(options['orders'])))
+        elapsed = time.perf_counter() - start
+
+        product.refresh_from_db()
+        reserved = StockReservation.objects.filter(product=product).aggregate(
+            total=Sum('quantity')
+        )['total'] or 0
+
+        self.stdout.write(f"Elapsed:        {elapsed:.2f}s ({len(results) / elapsed:.0f} orders/sec)")
+        self.stdout.write(f"Placed:         {results.count('placed')}")
+        self.stdout.write(f"Out of stock:   {results.count('out_of_stock')}")
+        self.stdout.write(f"Failed (DB):    {results.count('failed')}")
+        self.stdout.write(f"Stock left:     {product.stock}")
+        self.stdout.write(f"Reserved units: {reserved}")
+
+        oversold = reserved + product.stock != options['stock'] or results.count('placed') != reserved
+
+        if not options['keep']:
+            Order.objects.filter(stock_reservations__product=product).delete()
+            product.delete()
+            if not category.product_set.exists():
+                category.delete()
+
+        if oversold:
+            raise CommandError("Stock ledger does not balance - inventory was oversold")
+        self.stdout.write(self.style.SUCCESS("No overselling: stock ledger balances"))
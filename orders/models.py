@@ -1,9 +1,73 @@
 # orders/models.py
-from django.db import models
+from django.db import models, transaction, IntegrityError, OperationalError
 from django.utils import timezone
+import time
 import uuid
 from datetime import datetime
 from django.contrib.auth.models import User
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from products.models import Product
+
+
+def new_checkout_token():
+    """Idempotency key handed out with each checkout form"""
+    return uuid.uuid4().hex
+
+
+class OrderManager(models.Manager):
+    
+    # Transient database errors are retried this many times before giving up
+    CREATE_ATTEMPTS = 3
+    
+    def get_by_idempotency_key(self, idempotency_key, user=None):
+        """Return the order already placed with this checkout token, if any"""
+        if not idempotency_key:
+            return None
+        order = self.filter(idempotency_key=idempotency_key).first()
+        if order is not None and user is not None and order.user_id not in (None, user.pk):
+            # Token belongs to somebody else - never hand their order out
+            return None
+        return order
+    
+    def create_idempotent(self, idempotency_key, items, **fields):
+        """
+        Create an order and its items exactly once per idempotency key.
+        
+        items is a list of OrderItem field dicts. Returns (order, created);
+        a concurrent or repeated submission with the same key by the same
+        user (fields['user']) gets the existing order back with
+        created=False.
+        """
+        for attempt in range(self.CREATE_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    order = self.create(idempotency_key=idempotency_key or None, **fields)
+                    OrderItem.objects.bulk_create([
+                        OrderItem(order=order, **item) for item in items
+                    ])
+                    # Raises OutOfStock and rolls the whole order back if
+                    # any product cannot be covered
+                    from .inventory import reserve_stock
+                    reserve_stock(order, items)
+                    from products.rankings import record_sales
+                    record_sales(items, order.created_at)
+                return order, True
+            except IntegrityError:
+                existing = self.get_by_idempotency_key(idempotency_key, fields.get('user'))
+                if existing is not None:
+                    return existing, False
+                # Otherwise most likely an order_number collision - retry,
+                # save() draws a fresh number for the new instance
+                if attempt == self.CREATE_ATTEMPTS - 1:
+                    raise
+            except OperationalError:
+                # Deadlock, lost connection and the like - safe to retry
+                # because the whole order is rolled back as one unit
+                if attempt == self.CREATE_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.1 * (2 ** attempt))
+
 
 class Order(models.Model):
     ORDER_STATUS = [
@@ -15,6 +79,9 @@ class Order(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
+    # Orders whose goods have left the warehouse: their stock is never returned
+    FULFILLED_STATUSES = ('shipped', 'delivered')
+    
     PAYMENT_METHODS = [
         ('cod', 'Cash on Delivery'),
         ('mobile', 'Mobile Money'),
@@ -24,6 +91,9 @@ class Order(models.Model):
     # Order number
     order_number = models.CharField(max_length=20, unique=True, blank=True)
     
+    # Checkout token - a repeated submission of the same form maps to this order
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    
     # User can be null for guest orders, but we'll require login for cart
    
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
@@ -58,6 +128,8 @@ class Order(models.Model):
     
     notes = models.TextField(blank=True)
     
+    objects = OrderManager()
+    
     def __str__(self):
         return f"Order #{self.order_number} - {self.customer_name}"
     
@@ -97,4 +169,33 @@ class OrderItem(models.Model):
     @property
     def total(self):
         """Alias for item_total for email templates"""
-        return self.item_total
\ No newline at end of file
+        return self.item_total
+
+
+class StockReservation(models.Model):
+    """Ledger of stock taken by an order, released again on cancellation or deletion"""
+    order = models.ForeignKey(Order, related_name='stock_reservations', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name='stock_reservations', on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} for order #{self.order_id}"
+    
+    @property
+    def is_released(self):
+        return self.released_at is not None
+
+
+# Reservations cascade away with their order: give their stock back first,
+# unless the goods already left (deleting old delivered orders keeps their sales)
+@receiver(pre_delete, sender=Order)
+def release_deleted_order_stock(sender, instance, **kwargs):
+    if instance.status in Order.FULFILLED_STATUSES:
+        return
+    from .inventory import release_stock
+    release_stock([instance])
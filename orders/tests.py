@@ -1,3 +1,293 @@
-from django.test import TestCase
+import threading
+import time
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError, connection
+from django.test import TestCase, TransactionTestCase
 
-# Create your tests here.
+from products.models import Category, Product
+from .inventory import OutOfStock, release_stock
+from .models import Order, StockReservation
+
+
+def place_order(product, quantity, token=None, user=None):
+    """Check out quantity units of product the way the order views do"""
+    return Order.objects.create_idempotent(
+        token,
+        [{'product_id': product.pk, 'product_name': product.name, 'quantity': quantity, 'price': 100}],
+        user=user, customer_name='Amina', customer_email='amina@example.com', customer_phone='255700000000',
+        customer_address='Dar es Salaam', total_amount=100 * quantity,
+    )
+
+
+class IdempotentOrderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.amina = User.objects.create_user('amina', 'amina@example.com', 'correct-horse-3')
+        cls.baraka = User.objects.create_user('baraka', 'baraka@example.com', 'correct-horse-3')
+        cls.radio = Product.objects.create(
+            name='Radio', description='', price=100, category=Category.objects.create(name='Audio'),
+            image='products/p.jpg', stock=5,
+        )
+
+    def place(self, token, user):
+        return place_order(self.radio, 1, token, user)
+
+    def test_repeated_token_returns_the_users_order(self):
+        order, created = self.place('token-1', self.amina)
+        self.assertTrue(created)
+        self.assertEqual(self.place('token-1', self.amina), (order, False))
+
+    def test_token_of_another_user_never_returns_their_order(self):
+        self.place('token-1', self.amina)
+        with self.assertRaises(IntegrityError):
+            self.place('token-1', self.baraka)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class StockReleaseTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'correct-horse-3')
+        cls.radio = Product.objects.create(
+            name='Radio', description='', price=100, category=Category.objects.create(name='Audio'),
+            image='products/p.jpg', stock=5,
+        )
+
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        self.client.force_login(self.admin)
+
+    def stock(self):
+        self.radio.refresh_from_db()
+        return self.radio.stock
+
+    def change_status(self, order, status):
+        from django.forms.models import model_to_dict
+
+        item = order.items.get()
+        data = {key: value for key, value in model_to_dict(order).items() if value is not None}
+        data.update({
+            'status': status,
+            'items-TOTAL_FORMS': 1, 'items-INITIAL_FORMS': 1, 'items-0-id': item.pk, 'items-0-order': order.pk,
+            'items-0-product_id': item.product_id, 'items-0-price': item.price,
+            'stock_reservations-TOTAL_FORMS': 1, 'stock_reservations-INITIAL_FORMS': 1,
+            'stock_reservations-0-id': order.stock_reservations.get().pk, 'stock_reservations-0-order': order.pk,
+        })
+        response = self.client.post(f"/admin/orders/order/{order.pk}/change/", data, secure=True, follow=True)
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        return response
+
+    def test_release_happens_once(self):
+        order, created = place_order(self.radio, 2)
+        self.assertEqual(self.stock(), 3)
+        self.assertEqual(release_stock([order]), 1)
+        self.assertEqual(release_stock([order]), 0)
+        self.assertEqual(self.stock(), 5)
+        # Deleting an already released order gives nothing back a second time
+        order.delete()
+        self.assertEqual(self.stock(), 5)
+
+    def test_deleting_an_order_returns_its_stock(self):
+        order, created = place_order(self.radio, 2)
+        order.delete()
+        self.assertEqual(self.stock(), 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_deleting_a_delivered_order_keeps_stock_and_sales(self):
+        from products.models import ProductSales
+
+        order, created = place_order(self.radio, 2)
+        Order.objects.filter(pk=order.pk).update(status='delivered')
+        Order.objects.get(pk=order.pk).delete()
+        self.assertEqual(self.stock(), 3)
+        self.assertEqual(ProductSales.objects.get(product=self.radio).units_sold, 2)
+
+    def test_cancel_action_on_a_status_filtered_changelist(self):
+        from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+
+        order, created = place_order(self.radio, 2)
+        response = self.client.post(
+            '/admin/orders/order/?status__exact=pending',
+            {'action': 'mark_as_cancelled', ACTION_CHECKBOX_NAME: [order.pk]}, secure=True, follow=True,
+        )
+        self.assertContains(response, '1 order(s) marked as cancelled, 1 stock reservation(s) released.')
+        order.refresh_from_db()
+        self.assertEqual((order.status, self.stock()), ('cancelled', 5))
+
+    def test_change_form_releases_and_retakes_stock(self):
+        order, created = place_order(self.radio, 2)
+        self.change_status(order, 'cancelled')
+        self.assertEqual((order.status, self.stock()), ('cancelled', 5))
+
+        self.change_status(order, 'processing')
+        self.assertEqual((order.status, self.stock()), ('processing', 3))
+
+        self.change_status(order, 'cancelled')
+        Product.objects.filter(pk=self.radio.pk).update(stock=1)
+        response = self.change_status(order, 'pending')
+        self.assertContains(response, 'Order left cancelled')
+        self.assertEqual((order.status, self.stock()), ('cancelled', 1))
+
+    def test_reopening_action_needs_stock(self):
+        order, created = place_order(self.radio, 2)
+        release_stock([order])
+        Order.objects.filter(pk=order.pk).update(status='cancelled')
+        Product.objects.filter(pk=self.radio.pk).update(stock=1)
+
+        def action(name):
+            from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+            return self.client.post(
+                '/admin/orders/order/', {'action': name, ACTION_CHECKBOX_NAME: [order.pk]}, secure=True, follow=True,
+            )
+
+        self.assertContains(action('mark_as_shipped'), 'No orders changed')
+        order.refresh_from_db()
+        self.assertEqual((order.status, self.stock()), ('cancelled', 1))
+
+        Product.objects.filter(pk=self.radio.pk).update(stock=4)
+        action('mark_as_shipped')
+        order.refresh_from_db()
+        self.assertEqual((order.status, self.stock()), ('shipped', 2))
+        self.assertEqual(release_stock([order]), 1)
+
+
+def retry_locked(operation):
+    """
+    Run operation until the database stops reporting lock conflicts: SQLite's
+    shared in-memory test database fails a blocked writer instead of waiting
+    """
+    while True:
+        try:
+            return operation()
+        except OperationalError:
+            time.sleep(0.01)
+
+
+class ConcurrentStockTests(TransactionTestCase):
+
+    def test_concurrent_checkouts_never_oversell(self):
+        radio = Product.objects.create(
+            name='Radio', description='', price=100, category=Category.objects.create(name='Audio'),
+            image='products/p.jpg', stock=3,
+        )
+        start = threading.Barrier(6)
+        results = []
+
+        def checkout():
+            start.wait()
+            try:
+                results.append(retry_locked(lambda: place_order(radio, 1)[1]))
+            except OutOfStock:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        radio.refresh_from_db()
+        self.assertEqual((results.count(True), results.count(False)), (3, 3))
+        self.assertEqual(radio.stock, 0)
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_concurrent_releases_return_stock_once(self):
+        radio = Product.objects.create(
+            name='Radio', description='', price=100, category=Category.objects.create(name='Audio'),
+            image='products/p.jpg', stock=3,
+        )
+        order, created = place_order(radio, 2)
+        start = threading.Barrier(4)
+        released = []
+
+        def release():
+            start.wait()
+            try:
+                released.append(retry_locked(lambda: release_stock(Order.objects.filter(pk=order.pk))))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=release) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        radio.refresh_from_db()
+        self.assertEqual(sorted(released), [0, 0, 0, 1])
+        self.assertEqual(radio.stock, 3)
+
+
+class PlaceOrderRateLimitTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        from utils.rate_limit import _local
+        # Buckets are keyed by user id, which the next run reuses
+        cache.clear()
+        self.addCleanup(_local.clear)
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        self.client.force_login(User.objects.create_user('amina', 'amina@example.com', 'correct-horse-3'))
+
+    def test_repeated_order_posts_are_refused(self):
+        statuses = [self.client.post('/place-order/', secure=True).status_code for _ in range(4)]
+        self.assertEqual(statuses[3], 429)
+        self.assertNotIn(429, statuses[:3])
+        # Showing the checkout is not throttled
+        self.assertNotEqual(self.client.get('/place-order/', secure=True).status_code, 429)
+
+
+class AsyncPlaceOrderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.radio = Product.objects.create(
+            name='Radio', description='', price=100, category=Category.objects.create(name='Audio'),
+            image='products/p.jpg', stock=5,
+        )
+
+    def setUp(self):
+        from django.core.cache import cache
+        from django.test import override_settings
+        from cart.tests import async_urlconf
+        from utils.rate_limit import _local
+
+        cache.clear()
+        self.addCleanup(_local.clear)
+        urlconf = override_settings(ROOT_URLCONF=async_urlconf())
+        urlconf.enable()
+        self.addCleanup(urlconf.disable)
+        self.async_client.defaults['HTTP_HOST'] = 'localhost'
+        self.async_client.force_login(User.objects.create_user('amina', 'amina@example.com', 'correct-horse-3'))
+        session = self.async_client.session
+        session['cart'] = {str(self.radio.pk): {'name': 'Radio', 'price': 100.0, 'quantity': 2}}
+        session.save()
+
+    async def place(self):
+        return await self.async_client.post('/place-order/', {
+            'checkout_token': 'token-1', 'customer_name': 'Amina', 'customer_email': 'amina@example.com',
+            'customer_phone': '255700000000', 'customer_address': 'Dar es Salaam',
+        }, secure=True)
+
+    async def test_replayed_checkout_token_returns_the_same_order(self):
+        from django.core import mail
+
+        response = await self.place()
+        self.assertEqual(response.status_code, 200)
+        order = await Order.objects.aget()
+        self.assertContains(response, order.order_number)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertTrue(order.confirmation_email_sent and order.admin_email_sent)
+
+        # The cart is gone by now; the token alone finds the order
+        response = await self.place()
+        self.assertContains(response, order.order_number)
+        self.assertEqual(await Order.objects.acount(), 1)
+        self.assertEqual(len(mail.outbox), 2)
+        await self.radio.arefresh_from_db()
+        self.assertEqual(self.radio.stock, 3)
@@ -3,84 +3,55 @@ from django.http import JsonResponse
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-from .models import Order, OrderItem
+from .models import Order, OrderItem, new_checkout_token
+from .inventory import OutOfStock
 from products.models import Product
 import json
 from datetime import datetime, timedelta
 from django.utils import timezone
+from utils.i18n import get_language, ui_text
+from utils.rate_limit import rate_limit
 
 
+@rate_limit('place_order')
 def place_order(request):
     """Place order view"""
-    current_language = request.session.get('ambertek_language') or request.COOKIES.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
     if request.method == 'POST':
+        # Handle user
+        user = request.user if request.user.is_authenticated else None
+        
+        # A repeated submission of the same checkout form gets the order it
+        # already created - no re-pricing and no second round of notifications
+        checkout_token = request.POST.get('checkout_token', '').strip()[:64]
+        existing_order = Order.objects.get_by_idempotency_key(checkout_token, user)
+        if existing_order is not None:
+            return render_order_success(request, existing_order, current_language)
+        
         try:
             # Get cart items from session
             cart_items = request.session.get('cart', {})
             if not cart_items:
-                messages.warning(request, 
-                    "Your cart is empty" if current_language != 'sw' else "Carti yako ni tupu"
-                )
+                messages.warning(request, ui_text('your_cart_empty_short', current_language))
                 return redirect('cart_detail')
             
-            # Calculate total
-            total_amount = 0
-            for product_id, item in cart_items.items():
-                try:
-                    product = Product.objects.get(id=int(product_id))
-                    total_amount += product.price * item['quantity']
-                except (Product.DoesNotExist, ValueError):
-                    continue
-            
-            # Handle user
-            user = request.user if request.user.is_authenticated else None
+            # Calculate total and collect order items
+            products = Product.objects.in_bulk(cart_product_ids(cart_items))
+            total_amount, order_items = price_cart_items(cart_items, products)
             
-            # Create order with all required fields
-            order = Order.objects.create(
-                # User field
-                user=user,
-                
-                # Customer information
-                customer_name=request.POST.get('customer_name', '').strip(),
-                customer_email=request.POST.get('customer_email', '').strip(),
-                customer_phone=request.POST.get('customer_phone', '').strip(),
-                customer_address=request.POST.get('customer_address', '').strip(),
-                customer_city=request.POST.get('customer_city', '').strip(),
-                customer_region=request.POST.get('customer_region', '').strip(),
-                
-                # Order details
-                total_amount=total_amount,
-                payment_method=request.POST.get('payment_method', 'cod'),
-                notes=request.POST.get('notes', '').strip(),
-                estimated_delivery=timezone.now().date() + timedelta(days=3),
-                
-                # Status fields with defaults
-                status='pending',
-                payment_status=False,
-                sms_sent=False,
-                whatsapp_sent=False,
-                customer_notified=False,
-                admin_notified=False,
-                admin_email_sent=False,
-                confirmation_email_sent=False,
+            # Create order and items once per checkout token
+            order, created = Order.objects.create_idempotent(
+                checkout_token,
+                order_items,
+                **order_fields_from_post(request, user, total_amount)
             )
             
-            print(f"✅ Order created successfully! Order ID: {order.id}, Order Number: {order.order_number}")
+            if not created:
+                # Lost the race against a concurrent submission of the same form
+                return render_order_success(request, order, current_language)
             
-            # Create order items
-            for product_id, item in cart_items.items():
-                try:
-                    product = Product.objects.get(id=int(product_id))
-                    OrderItem.objects.create(
-                        order=order,
-                        product_id=product.id,
-                        product_name=product.name,
-                        quantity=item['quantity'],
-                        price=product.price
-                    )
-                except (Product.DoesNotExist, ValueError):
-                    continue
+            print(f"✅ Order created successfully! Order ID: {order.id}, Order Number: {order.order_number}")
             
             # Send SMS/WhatsApp notifications
             send_order_notifications(order, cart_items, current_language)
@@ -121,22 +92,7 @@ def place_order(request):
                 request.session.modified = True
             
             # Prepare success message
-            if current_language == 'sw':
-                success_msg = f"Oda #{order.order_number} imewekwa kikamilifu!"
-                if order.customer_email and email_success:
-                    success_msg += f" Uthibitishaji umetumwa kwenye barua pepe: {order.customer_email}"
-                elif order.customer_email and not email_success:
-                    success_msg += " Barua pepe haikutumwa, angalia spam folder."
-                success_msg += " Tumetuma ujumbe wa uthibitisho kwa simu yako."
-            else:
-                success_msg = f"Order #{order.order_number} placed successfully!"
-                if order.customer_email and email_success:
-                    success_msg += f" Confirmation sent to email: {order.customer_email}"
-                elif order.customer_email and not email_success:
-                    success_msg += " Email not sent, please check spam folder."
-                success_msg += " We've sent confirmation message to your phone."
-            
-            messages.success(request, success_msg)
+            messages.success(request, order_placed_message(order, current_language, email_success))
             
             return render(request, 'orders/order_success.html', {
                 'order': order,
@@ -146,16 +102,16 @@ def place_order(request):
                 'admin_email_sent': admin_email_success,
             })
             
+        except OutOfStock as e:
+            messages.error(request, ui_text('out_of_stock', current_language, name=e.product_name))
+            return redirect('cart_detail')
+        
         except Exception as e:
             print(f"❌ Order placement error: {e}")
             import traceback
             traceback.print_exc()
             
-            error_msg = (
-                f"Error placing order: {str(e)}"
-                if current_language != 'sw' else
-                f"Hitilafu katika kuweka oda: {str(e)}"
-            )
+            error_msg = ui_text('order_place_failed', current_language, error=str(e))
             messages.error(request, error_msg)
             return redirect('checkout')
     
@@ -163,82 +119,127 @@ def place_order(request):
     return redirect('checkout')
 
 
+def cart_product_ids(cart_items):
+    """Product IDs in a session cart, skipping malformed keys"""
+    product_ids = []
+    for product_id in cart_items:
+        try:
+            product_ids.append(int(product_id))
+        except ValueError:
+            continue
+    return product_ids
+
+
+def price_cart_items(cart_items, products):
+    """
+    Total amount and OrderItem field dicts for a session cart.
+    products maps product id to Product; lines for missing products are skipped.
+    """
+    total_amount = 0
+    order_items = []
+    for product_id, item in cart_items.items():
+        try:
+            product = products[int(product_id)]
+        except (KeyError, ValueError):
+            continue
+        total_amount += product.price * item['quantity']
+        order_items.append({
+            'product_id': product.id,
+            'product_name': product.name,
+            'quantity': item['quantity'],
+            'price': product.price,
+        })
+    return total_amount, order_items
+
+
+def order_fields_from_post(request, user, total_amount):
+    """Order model fields from the checkout form"""
+    return {
+        # User field
+        'user': user,
+        
+        # Customer information
+        'customer_name': request.POST.get('customer_name', '').strip(),
+        'customer_email': request.POST.get('customer_email', '').strip(),
+        'customer_phone': request.POST.get('customer_phone', '').strip(),
+        'customer_address': request.POST.get('customer_address', '').strip(),
+        'customer_city': request.POST.get('customer_city', '').strip(),
+        'customer_region': request.POST.get('customer_region', '').strip(),
+        
+        # Order details
+        'total_amount': total_amount,
+        'payment_method': request.POST.get('payment_method', 'cod'),
+        'notes': request.POST.get('notes', '').strip(),
+        'estimated_delivery': timezone.now().date() + timedelta(days=3),
+        
+        # Status fields with defaults
+        'status': 'pending',
+        'payment_status': False,
+        'sms_sent': False,
+        'whatsapp_sent': False,
+        'customer_notified': False,
+        'admin_notified': False,
+        'admin_email_sent': False,
+        'confirmation_email_sent': False,
+    }
+
+
+def order_placed_message(order, current_language, email_success):
+    """Flash message shown after an order was placed"""
+    success_msg = ui_text('order_placed', current_language, order_number=order.order_number)
+    if order.customer_email and email_success:
+        success_msg += ui_text('order_email_sent', current_language, email=order.customer_email)
+    elif order.customer_email and not email_success:
+        success_msg += ui_text('order_email_not_sent', current_language)
+    success_msg += ui_text('order_phone_notified', current_language)
+    return success_msg
+
+
+def render_order_success(request, order, current_language):
+    """Success page for an order that was already placed with this checkout token"""
+    if 'cart' in request.session:
+        del request.session['cart']
+        request.session.modified = True
+    
+    return render(request, 'orders/order_success.html', {
+        'order': order,
+        'current_language': current_language,
+        'cart_items_count': 0,
+        'email_sent': order.confirmation_email_sent,
+        'admin_email_sent': order.admin_email_sent,
+    })
+
+
 def send_order_notifications(order, cart_items, language='en'):
     """Send SMS and WhatsApp notifications"""
     try:
         # Compose messages based on language
-        if language == 'sw':
-            customer_sms = (
-                f"Ahsante {order.customer_name}!\n"
-                f"Oda #{order.order_number} imepokelewa.\n"
-                f"Jumla: TZS {order.total_amount:,.0f}\n"
-                f"Njia ya malipo: {order.get_payment_method_display()}\n"
-                f"Tutaungana nawe hivi punde."
-            )
-            
-            customer_whatsapp = (
-                f"*AMBERTEK EXPORT*\n\n"
-                f"*Oda Mpya Imewekwa!*\n"
-                f"-------------------\n"
-                f"*Nambari ya Oda:* {order.order_number}\n"
-                f"*Mteja:* {order.customer_name}\n"
-                f"*Simu:* {order.customer_phone}\n"
-                f"*Anwani:* {order.customer_address}\n"
-                f"*Jumla:* TZS {order.total_amount:,.0f}\n"
-                f"*Njia ya Malipo:* {order.get_payment_method_display()}\n\n"
-                f"*Bidhaa:*\n"
-            )
-            
-            admin_sms = (
-                f"Oda Mpya!\n"
-                f"Nambari: {order.order_number}\n"
-                f"Mteja: {order.customer_name}\n"
-                f"Simu: {order.customer_phone}\n"
-                f"Jumla: TZS {order.total_amount:,.0f}"
-            )
-            
-        else:
-            customer_sms = (
-                f"Thank you {order.customer_name}!\n"
-                f"Order #{order.order_number} received.\n"
-                f"Total: TZS {order.total_amount:,.0f}\n"
-                f"Payment: {order.get_payment_method_display()}\n"
-                f"We'll contact you shortly."
-            )
-            
-            customer_whatsapp = (
-                f"*AMBERTEK EXPORT*\n\n"
-                f"*New Order Placed!*\n"
-                f"-------------------\n"
-                f"*Order No:* {order.order_number}\n"
-                f"*Customer:* {order.customer_name}\n"
-                f"*Phone:* {order.customer_phone}\n"
-                f"*Address:* {order.customer_address}\n"
-                f"*Total:* TZS {order.total_amount:,.0f}\n"
-                f"*Payment Method:* {order.get_payment_method_display()}\n\n"
-                f"*Items:*\n"
-            )
-            
-            admin_sms = (
-                f"New Order!\n"
-                f"Order #: {order.order_number}\n"
-                f"Customer: {order.customer_name}\n"
-                f"Phone: {order.customer_phone}\n"
-                f"Total: TZS {order.total_amount:,.0f}"
-            )
+        params = {
+            'order_number': order.order_number,
+            'customer_name': order.customer_name,
+            'customer_phone': order.customer_phone,
+            'customer_address': order.customer_address,
+            'total': order.total_amount,
+            'payment_method': order.get_payment_method_display(),
+        }
+        customer_sms = ui_text('sms_customer', language, **params)
+        customer_whatsapp = ui_text('whatsapp_customer', language, **params)
+        admin_sms = ui_text('sms_admin', language, **params)
         
         # Add items to WhatsApp message
         for product_id, item in cart_items.items():
             try:
                 product = Product.objects.get(id=int(product_id))
-                if language == 'sw':
-                    customer_whatsapp += f"• {product.name} x{item['quantity']} - TZS {product.price * item['quantity']:,.0f}\n"
-                else:
-                    customer_whatsapp += f"• {product.name} x{item['quantity']} - TZS {product.price * item['quantity']:,.0f}\n"
+                customer_whatsapp += ui_text(
+                    'whatsapp_item', language,
+                    name=product.name,
+                    quantity=item['quantity'],
+                    total=product.price * item['quantity'],
+                )
             except (Product.DoesNotExist, ValueError):
                 continue
         
-        customer_whatsapp += f"\n*Grand Total: TZS {order.total_amount:,.0f}*"
+        customer_whatsapp += ui_text('whatsapp_grand_total', language, total=order.total_amount)
         
         # Print notifications for debugging
         print("\n" + "="*50)
@@ -266,7 +267,7 @@ def send_order_notifications(order, cart_items, language='en'):
 
 def order_success(request, order_id):
     """Order success page"""
-    current_language = request.session.get('ambertek_language') or request.COOKIES.get('ambertek_language', 'en')
+    current_language = get_language(request)
     order = get_object_or_404(Order, id=order_id)
     
     context = {
@@ -280,15 +281,13 @@ def order_success(request, order_id):
 
 def checkout(request):
     """Display checkout form"""
-    current_language = request.session.get('ambertek_language') or 'en'
+    current_language = get_language(request)
     
     # Get cart from session
     cart_items = request.session.get('cart', {})
     
     if not cart_items:
-        messages.warning(request, 
-            "Your cart is empty" if current_language != 'sw' else "Carti yako ni tupu"
-        )
+        messages.warning(request, ui_text('your_cart_empty_short', current_language))
         return redirect('cart_detail')
     
     # Calculate cart total
@@ -312,6 +311,7 @@ def checkout(request):
         'cart_items': items_list,
         'cart_total': cart_total,
         'cart_items_count': len(cart_items),
+        'checkout_token': new_checkout_token(),
     }
     
     return render(request, 'orders/checkout.html', context)
@@ -319,7 +319,7 @@ def checkout(request):
 
 def order_confirmation(request, order_id):
     """Order confirmation page"""
-    current_language = request.session.get('ambertek_language') or 'en'
+    current_language = get_language(request)
     
     try:
         order = Order.objects.get(id=order_id)
@@ -335,13 +335,13 @@ def order_confirmation(request, order_id):
         return render(request, 'orders/confirmation.html', context)
         
     except Order.DoesNotExist:
-        messages.error(request, "Order not found")
+        messages.error(request, ui_text('order_not_found', current_language))
         return redirect('home')
 
 
 def order_track(request, order_number):
     """Track order by order number"""
-    current_language = request.session.get('ambertek_language') or 'en'
+    current_language = get_language(request)
     
     try:
         order = Order.objects.get(order_number=order_number)
@@ -357,8 +357,8 @@ def order_track(request, order_number):
         return render(request, 'orders/track.html', context)
         
     except Order.DoesNotExist:
-        messages.error(request, 
-            f"Order #{order_number} not found" if current_language != 'sw' 
-            else f"Oda #{order_number} haipatikani"
+        messages.error(
+            request,
+            ui_text('order_number_not_found', current_language, order_number=order_number)
         )
         return redirect('home')
\ No newline at end of file
@@ -1,5 +1,19 @@
-from django.contrib import admin
-from .models import Category, Product, ProductImage
+import os
+import logging
+import tempfile
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db import DatabaseError, DataError
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from utils.admin_filters import (
+    AutocompleteFilter, AutocompleteFilterMixin, CachedBooleanFacetsFilter, CachedCountPaginator,
+)
+from .models import Category, PriceChange, Product, ProductImage
+
+logger = logging.getLogger(__name__)
 
 # Inline for Product Images
 class ProductImageInline(admin.TabularInline):
@@ -7,6 +21,36 @@ class ProductImageInline(admin.TabularInline):
     extra = 1  # Number of empty forms to show
     max_num = 5  # Maximum images per product
 
+    def get_queryset(self, request):
+        # Each row's label ("Image for <product>") reads the product
+        return super().get_queryset(request).select_related('product')
+
+class ProductImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX with sku, name, category and price columns (see products/importer.py)")
+    dry_run = forms.BooleanField(required=False, initial=True, help_text="Only validate, write nothing")
+
+class PriceAdjustmentForm(forms.Form):
+    mode = forms.ChoiceField(choices=[('percent', 'Percentage'), ('amount', 'Fixed amount (TZS)')])
+    value = forms.DecimalField(max_digits=10, decimal_places=2, help_text="Negative to lower prices, e.g. -10")
+    reason = forms.CharField(max_length=200, required=False)
+
+    def __init__(self, *args, products=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The selected products, checked for prices the change would wipe out
+        self.products = products
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.products is not None and 'mode' in cleaned_data and 'value' in cleaned_data:
+            from products.pricing import priced_out
+            too_low = priced_out(self.products, **{cleaned_data['mode']: cleaned_data['value']})
+            count = too_low.count()
+            if count:
+                raise forms.ValidationError(
+                    f"This would take {count} price(s) to zero or below, e.g. {too_low.first().name}."
+                )
+        return cleaned_data
+
 # Category Admin
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -16,23 +60,27 @@ class CategoryAdmin(admin.ModelAdmin):
 
 # Product Admin
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     # What to display in the list view
-    list_display = ['name', 'category', 'price', 'available', 'created_at']
+    list_display = ['name', 'category', 'price', 'available', 'stock', 'created_at']
+    list_select_related = ['category']
     
-    # Filters on the right side
-    list_filter = ['category', 'available', 'created_at']
+    # Filters on the right side: categories are searched, not listed
+    list_filter = [('category', AutocompleteFilter), ('available', CachedBooleanFacetsFilter), 'created_at']
     
     # Search functionality
     search_fields = ['name', 'description']
     
+    # Category picked by search instead of a <select> of every category
+    autocomplete_fields = ['category']
+    
     # Inline images
     inlines = [ProductImageInline]
     
     # Fields to display in edit form
     fieldsets = (
         ('Basic Information', {
-            'fields': ('name', 'category', 'price', 'available')
+            'fields': ('name', 'category', 'price', 'available', 'stock')
         }),
         ('Description', {
             'fields': ('description',)
@@ -45,16 +93,132 @@ class ProductAdmin(admin.ModelAdmin):
     # Ordering - newest first
     ordering = ['-created_at']
     
-    # Pagination
+    # Pagination: cached total, and no second count of the unfiltered table
     list_per_page = 25
+    paginator = CachedCountPaginator
+    show_full_result_count = False
     
     # Date hierarchy for filtering by date
     date_hierarchy = 'created_at'
+    
+    # Set-based bulk edits (products.pricing); filter by category and
+    # "select all" to reprice a whole category in one UPDATE
+    actions = ['adjust_prices', 'mark_available', 'mark_unavailable']
+    
+    def adjust_prices(self, request, queryset):
+        from products import pricing
+
+        form = PriceAdjustmentForm(request.POST if 'apply' in request.POST else None, products=queryset)
+        if form.is_valid():
+            adjustment = {form.cleaned_data['mode']: form.cleaned_data['value']}
+            try:
+                changed = pricing.adjust_prices(
+                    queryset, user=request.user, reason=form.cleaned_data['reason'], **adjustment,
+                )
+            except DataError:
+                self.message_user(request, 'New prices do not fit the price column; nothing was changed.', messages.ERROR)
+            except ValueError as e:
+                # A price changed between the form check and the update
+                self.message_user(request, f'{e}; nothing was changed.', messages.ERROR)
+            else:
+                self.message_user(request, f'{changed} price(s) changed.')
+            return None
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Adjust prices',
+            'form': form,
+            'count': queryset.count(),
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, 'admin/products/product/adjust_prices.html', context)
+    adjust_prices.short_description = "Adjust prices of selected products"
+    
+    def mark_available(self, request, queryset):
+        from products.pricing import set_availability
+        updated = set_availability(queryset, True)
+        self.message_user(request, f'{updated} product(s) marked as available.')
+    mark_available.short_description = "Mark selected as available"
+    
+    def mark_unavailable(self, request, queryset):
+        from products.pricing import set_availability
+        updated = set_availability(queryset, False)
+        self.message_user(request, f'{updated} product(s) marked as unavailable.')
+    mark_unavailable.short_description = "Mark selected as unavailable"
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='products_product_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a catalogue file; large files are better run with manage.py import_products"""
+        from products.importer import RowError, import_products
+
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            return redirect('admin:products_product_changelist')
+
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+        stats = None
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            suffix = os.path.splitext(upload.name)[1].lower()
+            with tempfile.NamedTemporaryFile(suffix=suffix) as temporary:
+                for chunk in upload.chunks():
+                    temporary.write(chunk)
+                temporary.flush()
+                try:
+                    stats = import_products(temporary.name, dry_run=form.cleaned_data['dry_run'])
+                except (OSError, RowError) as e:
+                    messages.error(request, str(e))
+                except DatabaseError as e:
+                    logger.exception("Product import failed")
+                    messages.error(request, f"Import stopped by a database error; earlier batches were saved: {e}")
+            if stats is not None:
+                level = messages.WARNING if stats['failed'] else messages.SUCCESS
+                messages.add_message(
+                    request, level,
+                    f"{'Dry run: ' if stats['dry_run'] else ''}{stats['rows']} rows, {stats['created']} created, "
+                    f"{stats['updated']} updated, {stats['failed']} failed ({stats['rows_per_sec']:.0f} rows/s)",
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import products',
+            'form': form,
+            'stats': stats,
+        }
+        return TemplateResponse(request, 'admin/products/product/import.html', context)
 
 # ProductImage Admin
 @admin.register(ProductImage)
-class ProductImageAdmin(admin.ModelAdmin):
+class ProductImageAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ['product', 'id', 'caption']
-    list_filter = ['product']
+    list_select_related = ['product']
+    list_filter = [('product', AutocompleteFilter)]
     search_fields = ['product__name', 'caption']
-    list_per_page = 20
\ No newline at end of file
+    autocomplete_fields = ['product']
+    list_per_page = 20
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+# Price change audit trail, written by the bulk price actions
+@admin.register(PriceChange)
+class PriceChangeAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
+    list_display = ['product', 'old_price', 'new_price', 'changed_by', 'reason', 'changed_at']
+    list_select_related = ['product', 'changed_by']
+    list_filter = [('product', AutocompleteFilter)]
+    search_fields = ['product__name', 'reason']
+    date_hierarchy = 'changed_at'
+    list_per_page = 50
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
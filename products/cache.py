@@ -0,0 +1,202 @@
+# products/cache.py
+"""
+Read-through cache for the product catalogue.
+
+Every key is prefixed with a catalogue generation number. Saving or deleting
+a Category, Product or ProductImage bumps the generation (see the signal
+receivers in products/models.py), so stale entries are simply never read
+again and expire on their own.
+
+Bulk changes (imports, price updates) run inside deferred_generation_bump()
+so their many saves and deletes move the generation once, not per row.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'catalogue:generation'
+
+# How long a catalogue entry lives before it is rebuilt even without a change
+CATALOGUE_CACHE_TIMEOUT = getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 300)
+
+# Stampede protection: only one worker rebuilds a missing entry, the others
+# wait up to CATALOGUE_LOCK_WAIT seconds for it before querying themselves
+CATALOGUE_LOCK_TIMEOUT = 10
+CATALOGUE_LOCK_WAIT = 2.0
+CATALOGUE_LOCK_POLL = 0.05
+
+_MISSING = object()
+
+# Per-thread nesting depth of deferred_generation_bump() blocks
+_deferred = threading.local()
+
+
+def get_catalogue_generation():
+    """Return the current catalogue generation, initialising it if needed"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Seed with the clock so a lost counter never reuses old keys
+        cache.add(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_catalogue_generation():
+    """Invalidate every catalogue entry by moving to a new generation"""
+    if getattr(_deferred, 'depth', 0):
+        _deferred.pending = True
+        return None
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Counter not set yet (or evicted) - start a fresh one
+        return get_catalogue_generation()
+
+
+@contextmanager
+def deferred_generation_bump():
+    """Collapse every generation bump inside the block into one, made on exit"""
+    depth = getattr(_deferred, 'depth', 0)
+    if not depth:
+        _deferred.pending = False
+    _deferred.depth = depth + 1
+    try:
+        yield
+    finally:
+        _deferred.depth = depth
+        if not depth and _deferred.pending:
+            bump_catalogue_generation()
+
+
+def catalogue_key(*parts, generation=None):
+    """Build a cache key inside the current catalogue generation"""
+    if generation is None:
+        generation = get_catalogue_generation()
+    return ':'.join(['catalogue', str(generation)] + [str(part) for part in parts])
+
+
+def get_or_build(key, builder, timeout=None):
+    """
+    Return the cached value for key, building it with builder() on a miss.
+    Concurrent misses for the same key are collapsed onto a single builder.
+    """
+    if timeout is None:
+        timeout = CATALOGUE_CACHE_TIMEOUT
+
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, CATALOGUE_LOCK_TIMEOUT):
+        try:
+            value = builder()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    # Someone else is rebuilding this entry - wait for their result
+    deadline = time.monotonic() + CATALOGUE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(CATALOGUE_LOCK_POLL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    logger.warning(f"Catalogue cache lock wait expired for {key}")
+    return builder()
+
+
+def get_categories():
+    """All categories, ordered by id"""
+    from .models import Category
+    return get_or_build(
+        catalogue_key('categories'),
+        lambda: list(Category.objects.order_by('id')),
+    )
+
+
+def get_category(category_id):
+    """A single category from the cached category list, or None"""
+    try:
+        category_id = int(category_id)
+    except (TypeError, ValueError):
+        return None
+    for category in get_categories():
+        if category.id == category_id:
+            return category
+    return None
+
+
+def get_product_ids(category_id=None):
+    """IDs of available products, optionally restricted to one category"""
+    from .models import Product
+
+    def build():
+        products = Product.objects.filter(available=True)
+        if category_id:
+            products = products.filter(category_id=category_id)
+        return list(products.order_by('id').values_list('id', flat=True))
+
+    return get_or_build(catalogue_key('product_ids', category_id or 'all'), build)
+
+
+def get_product_cards(product_ids):
+    """
+    Product instances for the given IDs, in the same order.
+    Cached per product so a listing only queries the products it is missing.
+    """
+    from .models import Product
+
+    if not product_ids:
+        return []
+
+    generation = get_catalogue_generation()
+    keys = {
+        product_id: catalogue_key('product', product_id, generation=generation)
+        for product_id in product_ids
+    }
+    cached = cache.get_many(keys.values())
+
+    cards = {}
+    missing = []
+    for product_id, key in keys.items():
+        if key in cached:
+            cards[product_id] = cached[key]
+        else:
+            missing.append(product_id)
+
+    if missing:
+        fetched = Product.objects.in_bulk(missing)
+        cards.update(fetched)
+        cache.set_many(
+            {keys[product_id]: product for product_id, product in fetched.items()},
+            CATALOGUE_CACHE_TIMEOUT,
+        )
+
+    return [cards[product_id] for product_id in product_ids if product_id in cards]
+
+
+def get_products(category_id=None):
+    """Available products for a listing page, served from the cache"""
+    return get_product_cards(get_product_ids(category_id))
+
+
+def get_ranked_products(kind, category_id=None):
+    """
+    Best sellers or trending products (products.rankings) for a listing,
+    served from the cache. Sales do not move the generation, so a ranking
+    is at most CATALOGUE_CACHE_TIMEOUT seconds behind.
+    """
+    from .rankings import ranked_product_ids
+    product_ids = get_or_build(
+        catalogue_key('ranking', kind, category_id or 'all'),
+        lambda: ranked_product_ids(kind, category_id),
+    )
+    return get_product_cards(product_ids)
@@ -0,0 +1,271 @@
+# products/facets.py
+"""
+Faceted filtering for the product list: category, price bucket,
+availability and has-video.
+
+Each worker process keeps a FacetIndex in memory: every product gets a slot
+(a bit position, in id order) and every facet value a bitmap, a Python int
+with the bits of the products that have it. Filtering is a union of the
+selected values' bitmaps within a facet and an intersection across facets.
+A value's count is a popcount of its bitmap intersected with the filters of
+the other facets. No SQL runs per filter or per count.
+
+The index follows the catalogue generation (products/cache.py). Once a
+save or delete of a Product commits, the signal receiver in
+products/models.py bumps the generation and records the product's id under
+it (record_change). A worker that finds the generation moved re-reads just
+those products, so it never sees rows of an uncommitted or rolled-back
+transaction.
+Changes without a record, such as bulk updates, deferred bumps or more than
+FACET_INCREMENTAL_LIMIT generations, make it rebuild the whole index. That
+is a single query of five columns.
+"""
+import logging
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+from .cache import CATALOGUE_CACHE_TIMEOUT, get_catalogue_generation
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (TZS) of the price buckets; the last bucket is open-ended
+PRODUCT_PRICE_BUCKETS = getattr(settings, 'PRODUCT_PRICE_BUCKETS', [50000, 100000, 250000, 500000, 1000000])
+FACET_INCREMENTAL_LIMIT = getattr(settings, 'FACET_INCREMENTAL_LIMIT', 200)
+
+CHANGES_KEY = 'catalogue:facet_changes:{}'
+
+CATEGORY = 'category'
+PRICE = 'price'
+AVAILABLE = 'available'
+VIDEO = 'video'
+FACETS = (CATEGORY, PRICE, AVAILABLE, VIDEO)
+
+# With no availability chosen the list shows what it always has: products in stock
+DEFAULT_SELECTION = {AVAILABLE: ('1',)}
+
+FIELDS = ('id', 'category_id', 'price', 'available', 'video')
+
+# Bit positions set in each byte value, for turning a bitmap back into slots
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def price_bucket(price):
+    """Key of the price bucket holding price, e.g. '50000-100000' or '1000000-'"""
+    lower = 0
+    for upper in PRODUCT_PRICE_BUCKETS:
+        if price < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}-"
+
+
+def price_buckets():
+    """(key, label) for every price bucket, cheapest first"""
+    buckets = []
+    lower = 0
+    for upper in PRODUCT_PRICE_BUCKETS:
+        buckets.append((f"{lower}-{upper}", f"{lower:,} – {upper:,}"))
+        lower = upper
+    buckets.append((f"{lower}-", f"{lower:,}+"))
+    return buckets
+
+
+def facet_values(row):
+    """{facet: value} for a (id, category_id, price, available, video) row"""
+    product_id, category_id, price, available, video = row
+    return {
+        CATEGORY: str(category_id),
+        PRICE: price_bucket(price),
+        AVAILABLE: '1' if available else '0',
+        VIDEO: '1' if video else '0',
+    }
+
+
+def bitmap(slots):
+    """Bitmap with the given slot bits set"""
+    data = bytearray((max(slots) >> 3) + 1) if len(slots) else bytearray()
+    for slot in slots:
+        data[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(data, 'little')
+
+
+def slots_of(bits):
+    """Set bit positions of a bitmap, lowest first"""
+    data = bits.to_bytes((bits.bit_length() + 7) >> 3, 'little')
+    return [offset << 3 | bit for offset, byte in enumerate(data) if byte for bit in BYTE_BITS[byte]]
+
+
+class FacetIndex:
+    """Bitmaps over one generation of the catalogue; never changed once built"""
+
+    def __init__(self, generation, product_ids, slots, values, bitmaps, all_products):
+        self.generation = generation
+        # slot -> product id (None for a deleted product), product id -> slot
+        self.product_ids = product_ids
+        self.slots = slots
+        # product id -> {facet: value}, to clear a changed product's old bits
+        self.values = values
+        # facet -> {value: bitmap}, and the bitmap of every product
+        self.bitmaps = bitmaps
+        self.all = all_products
+
+    @classmethod
+    def build(cls, generation):
+        from .models import Product
+
+        product_ids = []
+        values = {}
+        slots = {facet: {} for facet in FACETS}
+        for slot, row in enumerate(Product.objects.order_by('id').values_list(*FIELDS).iterator()):
+            product_ids.append(row[0])
+            values[row[0]] = facet_values(row)
+            for facet, value in values[row[0]].items():
+                slots[facet].setdefault(value, []).append(slot)
+        bitmaps = {facet: {value: bitmap(found) for value, found in by_value.items()} for facet, by_value in slots.items()}
+        return cls(
+            generation, product_ids, {product_id: slot for slot, product_id in enumerate(product_ids)},
+            values, bitmaps, bitmap(range(len(product_ids))),
+        )
+
+    def updated(self, generation, changed_ids):
+        """A new index with the changed products re-read from the database"""
+        from .models import Product
+
+        product_ids = list(self.product_ids)
+        slots = dict(self.slots)
+        values = dict(self.values)
+        bitmaps = {facet: dict(by_value) for facet, by_value in self.bitmaps.items()}
+        all_products = self.all
+        rows = {row[0]: row for row in Product.objects.filter(id__in=changed_ids).values_list(*FIELDS)}
+
+        for product_id in sorted(changed_ids):
+            slot = slots.get(product_id)
+            if slot is not None:
+                bit = 1 << slot
+                for facet, value in values.pop(product_id).items():
+                    bitmaps[facet][value] &= ~bit
+                if product_id not in rows:
+                    # The slot stays empty until the next full build
+                    product_ids[slot] = None
+                    del slots[product_id]
+                    all_products &= ~bit
+            if product_id in rows:
+                if slot is None:
+                    slot = slots[product_id] = len(product_ids)
+                    product_ids.append(product_id)
+                    all_products |= 1 << slot
+                bit = 1 << slot
+                values[product_id] = facet_values(rows[product_id])
+                for facet, value in values[product_id].items():
+                    bitmaps[facet][value] = bitmaps[facet].get(value, 0) | bit
+        return FacetIndex(generation, product_ids, slots, values, bitmaps, all_products)
+
+    def matching(self, facet, selected):
+        """Bitmap of the products having any of the selected values of facet"""
+        if not selected:
+            return self.all
+        found = 0
+        for value in selected:
+            found |= self.bitmaps[facet].get(value, 0)
+        return found
+
+    def search(self, selection):
+        """
+        (product ids in id order, {facet: {value: count}}) for a selection
+        of {facet: [values]}. A facet's counts apply every filter but its own.
+        """
+        matches = {facet: self.matching(facet, selection.get(facet)) for facet in FACETS}
+        result = self.all
+        for bits in matches.values():
+            result &= bits
+
+        counts = {}
+        for facet in FACETS:
+            others = self.all
+            for other, bits in matches.items():
+                if other != facet:
+                    others &= bits
+            counts[facet] = {value: (bits & others).bit_count() for value, bits in self.bitmaps[facet].items()}
+
+        product_ids = self.product_ids
+        return [product_ids[slot] for slot in slots_of(result)], counts
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def record_change(generation, product_id=None):
+    """Note which product (or None: no product) moved the catalogue to generation"""
+    cache.set(CHANGES_KEY.format(generation), [product_id] if product_id else [], CATALOGUE_CACHE_TIMEOUT)
+
+
+def get_index():
+    """This process's index, brought up to the current catalogue generation"""
+    global _index
+    generation = get_catalogue_generation()
+    index = _index
+    if index is not None and index.generation == generation:
+        return index
+
+    with _index_lock:
+        index = _index
+        if index is not None and index.generation == generation:
+            return index
+        changed = None
+        if index is not None and 0 < generation - index.generation <= FACET_INCREMENTAL_LIMIT:
+            keys = [CHANGES_KEY.format(number) for number in range(index.generation + 1, generation + 1)]
+            records = cache.get_many(keys)
+            if len(records) == len(keys):
+                changed = {product_id for record in records.values() for product_id in record}
+        if changed is not None:
+            index = index.updated(generation, changed)
+        else:
+            index = FacetIndex.build(generation)
+            logger.info(f"Facet index rebuilt: {len(index.slots)} products, generation {generation}")
+        _index = index
+        return index
+
+
+def parse_selection(params, category_id=None):
+    """{facet: [values]} from the list page's query parameters (a QueryDict)"""
+    selection = {facet: [value for value in params.getlist(facet) if value] for facet in FACETS}
+    if category_id:
+        selection[CATEGORY] = [str(category_id)]
+    for facet, default in DEFAULT_SELECTION.items():
+        if not selection[facet]:
+            selection[facet] = list(default)
+    return selection
+
+
+def filter_products(params, categories, category_id=None, language='en'):
+    """
+    Product ids for the list page and the options of its filter sidebar:
+    categories with their counts, and (key, label, count, selected) options
+    for the price, availability and video filters.
+    """
+    from utils.i18n import ui_text
+
+    selection = parse_selection(params, category_id)
+    product_ids, counts = get_index().search(selection)
+
+    def options(facet, choices):
+        return [
+            {'key': key, 'label': label, 'count': counts[facet].get(key, 0), 'selected': key in selection[facet]}
+            for key, label in choices
+        ]
+
+    facets = {
+        CATEGORY: [
+            {'category': category, 'count': counts[CATEGORY].get(str(category.id), 0)} for category in categories
+        ],
+        PRICE: options(PRICE, price_buckets()),
+        AVAILABLE: options(AVAILABLE, [
+            ('1', ui_text('filter_in_stock', language)), ('0', ui_text('filter_out_of_stock', language)),
+        ]),
+        VIDEO: options(VIDEO, [('1', ui_text('filter_has_video', language))]),
+        # The filters other than category, carried over by the category links
+        'query': urlencode({facet: selection[facet] for facet in (PRICE, AVAILABLE, VIDEO)}, doseq=True),
+    }
+    return product_ids, facets
@@ -0,0 +1,72 @@
+# products/image_ingest.py
+"""
+Image processing for bulk imports (products.importer), run in worker
+processes. Only Pillow and the standard library are imported here so a
+spawned worker starts without loading Django.
+"""
+import os
+import hashlib
+from PIL import Image, ImageOps
+
+# Stored under MEDIA_ROOT
+IMPORT_IMAGE_DIR = 'products/import'
+JPEG_QUALITY = 85
+
+
+def stored_names(data):
+    """Names of the display image and thumbnail for these source bytes"""
+    digest = hashlib.sha1(data).hexdigest()
+    base = f"{IMPORT_IMAGE_DIR}/{digest[:2]}/{digest}"
+    return f"{base}.jpg", f"{base}_thumb.jpg"
+
+
+def flatten(image):
+    """Upright RGB copy, with transparency composited onto white"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def save_jpeg(image, path):
+    # Written next to the target and renamed so readers never see half a file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    image.save(temporary, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    os.replace(temporary, path)
+
+
+def process_image(source, media_root, max_size, thumbnail_size, dry_run=False):
+    """
+    Validate one source file and write its display image (at most max_size
+    pixels on the long side) and thumbnail under media_root.
+
+    Returns (source, stored name, None) or (source, None, error message).
+    Files already ingested (same bytes) are not processed again.
+    """
+    try:
+        with open(source, 'rb') as f:
+            data = f.read()
+        name, thumbnail_name = stored_names(data)
+        target = os.path.join(media_root, name)
+        if os.path.exists(target):
+            return source, name, None
+
+        with Image.open(source) as image:
+            image.verify()
+        if dry_run:
+            return source, name, None
+
+        with Image.open(source) as image:
+            image = flatten(image)
+        image.thumbnail((max_size, max_size))
+        save_jpeg(image, target)
+        image.thumbnail((thumbnail_size, thumbnail_size))
+        save_jpeg(image, os.path.join(media_root, thumbnail_name))
+        return source, name, None
+    except Exception as e:
+        # Pillow raises many types for broken files; one bad image must not stop the pool
+        return source, None, f"{type(e).__name__}: {e}"
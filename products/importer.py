@@ -0,0 +1,365 @@
+# products/importer.py
+"""
+Bulk catalogue import from a CSV or XLSX file (manage.py import_products and
+the "Import" page of the product admin).
+
+The file is read one row at a time and written in batches of batch_size
+rows, each in its own transaction, so an interrupted import can simply be
+run again:
+
+- categories are matched by name and the missing ones created with one
+  bulk_create
+- products are upserted on their sku with one
+  bulk_create(update_conflicts=True)
+- a non-empty images column replaces the product's gallery
+
+Image files named in the file are read from image_dir by a pool of worker
+processes (products.image_ingest): verified, rotated upright, capped at
+PRODUCT_IMAGE_MAX_SIZE pixels and stored as JPEG under MEDIA_ROOT with a
+PRODUCT_THUMBNAIL_SIZE thumbnail. The next batch's images are processed
+while the current batch is written.
+
+Bulk writes send no signals; the catalogue generation moves once, when the
+import finishes. A dry run reads and validates everything, images included,
+and writes nothing.
+
+Columns (header row, any order): sku, name, category and price are
+required; description, available (yes/no), stock, image (file name in
+image_dir) and images (extra file names separated by '|', or '-' to clear
+the gallery) are optional. A gallery is only replaced when at least one of
+its images could be stored.
+"""
+import csv
+import os
+import time
+import logging
+import multiprocessing
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from .cache import bump_catalogue_generation, deferred_generation_bump
+from .image_ingest import process_image
+from .models import Category, Product, ProductImage
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_IMPORT_BATCH_SIZE = getattr(settings, 'PRODUCT_IMPORT_BATCH_SIZE', 1000)
+PRODUCT_IMPORT_IMAGE_DIR = getattr(settings, 'PRODUCT_IMPORT_IMAGE_DIR', None)
+PRODUCT_IMAGE_MAX_SIZE = getattr(settings, 'PRODUCT_IMAGE_MAX_SIZE', 1600)
+PRODUCT_THUMBNAIL_SIZE = getattr(settings, 'PRODUCT_THUMBNAIL_SIZE', 400)
+
+REQUIRED_COLUMNS = ('sku', 'name', 'category', 'price')
+GALLERY_SEPARATOR = '|'
+# images column value that removes a product's gallery
+GALLERY_CLEAR = '-'
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+# numeric(10, 2) price column and the PositiveIntegerField stock column
+MAX_PRICE = Decimal('99999999.99')
+MAX_STOCK = 2147483647
+# Errors kept for the report; all of them are counted
+MAX_REPORTED_ERRORS = 100
+
+# Columns written when a product with the same sku already exists
+UPDATE_FIELDS = ['name', 'description', 'price', 'category', 'available', 'stock', 'image']
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(path):
+    """(line number, {column: text}) for each data row of a .csv or .xlsx file"""
+    if str(path).lower().endswith('.xlsx'):
+        return read_xlsx(path)
+    return read_csv(path)
+
+
+def read_csv(path):
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {
+                    name.strip().lower(): (value or '').strip() for name, value in row.items() if name
+                }
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise RowError(f"Unreadable CSV file (expected UTF-8): {e}")
+
+
+def read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RowError("Reading .xlsx files needs openpyxl (pip install openpyxl); export the sheet as CSV instead")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell or '').strip().lower() for cell in next(rows, ())]
+        for number, values in enumerate(rows, start=2):
+            yield number, {
+                name: '' if value is None else str(value).strip() for name, value in zip(header, values) if name
+            }
+    finally:
+        workbook.close()
+
+
+def parse_row(row):
+    """Validated field values for one row; raises RowError"""
+    missing = [column for column in REQUIRED_COLUMNS if not row.get(column)]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+    if len(row['sku']) > 64:
+        raise RowError("sku longer than 64 characters")
+    price = parse_price(row['price'])
+    stock = parse_stock(row['stock']) if row.get('stock') else None
+    images = row.get('images', '').strip()
+    return {
+        'sku': row['sku'],
+        'name': row['name'][:200],
+        'category': row['category'][:100],
+        'price': price,
+        'description': row.get('description', ''),
+        'available': row.get('available', '').lower() not in FALSE_VALUES,
+        'stock': stock,
+        'image': row.get('image', ''),
+        'images': [] if images == GALLERY_CLEAR else [
+            name.strip() for name in images.split(GALLERY_SEPARATOR) if name.strip()
+        ],
+        'clear_gallery': images == GALLERY_CLEAR,
+    }
+
+
+def parse_price(text):
+    """A price that fits the price column: finite, not negative, at most 2 decimal places"""
+    try:
+        price = Decimal(text.replace(',', ''))
+    except InvalidOperation:
+        raise RowError(f"invalid price {text!r}")
+    if not price.is_finite() or price < 0 or price > MAX_PRICE:
+        raise RowError(f"price {text!r} is not between 0 and {MAX_PRICE}")
+    if price != price.quantize(Decimal('0.01')):
+        raise RowError(f"price {text!r} has more than 2 decimal places")
+    return price
+
+
+def parse_stock(text):
+    """A whole, non-negative number of units"""
+    try:
+        stock = Decimal(text.replace(',', ''))
+    except InvalidOperation:
+        raise RowError(f"invalid stock {text!r}")
+    if not stock.is_finite() or stock != stock.to_integral_value():
+        raise RowError(f"stock {text!r} is not a whole number")
+    if stock < 0 or stock > MAX_STOCK:
+        raise RowError(f"stock {text!r} is not between 0 and {MAX_STOCK}")
+    return int(stock)
+
+
+def image_path(image_dir, name):
+    """Absolute path of name inside image_dir, or None if it points outside"""
+    root = os.path.realpath(image_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    return path if path.startswith(root + os.sep) else None
+
+
+class ProductImport:
+    """One run over one file; see import_products()"""
+
+    def __init__(self, image_dir=None, batch_size=PRODUCT_IMPORT_BATCH_SIZE, workers=None, dry_run=False, progress=None):
+        self.image_dir = image_dir or PRODUCT_IMPORT_IMAGE_DIR
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.dry_run = dry_run
+        self.progress = progress
+        self.executor = None
+        # Source path -> stored name (None if the file was rejected), for the whole run
+        self.images = {}
+        self.image_failures = {}
+        self.submitted = set()
+        self.categories = {}
+        self.stats = {
+            'rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'duplicates': 0,
+            'categories_created': 0, 'images': 0, 'image_errors': 0,
+            'errors': [], 'elapsed': 0.0, 'rows_per_sec': 0.0, 'dry_run': dry_run,
+        }
+        self.started = None
+
+    def error(self, line, message):
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append((line, message))
+
+    def run(self, path):
+        self.started = time.perf_counter()
+        rows = read_rows(path)
+        pending = None
+        try:
+            with deferred_generation_bump():
+                while True:
+                    batch = self.parse_batch(islice(rows, self.batch_size))
+                    if batch is None:
+                        break
+                    futures = self.submit_images(batch)
+                    if pending:
+                        self.write_batch(*pending)
+                    pending = (batch, futures)
+                if pending:
+                    self.write_batch(*pending)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+            # Also after a failure: the batches written so far are committed
+            if not self.dry_run and (self.stats['created'] or self.stats['updated']):
+                bump_catalogue_generation()
+        self.measure()
+        stats = self.stats
+        logger.info(
+            f"Product import of {path}{' (dry run)' if self.dry_run else ''}: {stats['created']} created, "
+            f"{stats['updated']} updated, {stats['failed']} failed, {stats['rows_per_sec']:.0f} rows/s"
+        )
+        return stats
+
+    def parse_batch(self, rows):
+        """{sku: (line, fields)} for the next rows, None when the file is exhausted"""
+        batch = {}
+        seen = False
+        for line, row in rows:
+            seen = True
+            self.stats['rows'] += 1
+            try:
+                fields = parse_row(row)
+            except RowError as e:
+                self.stats['failed'] += 1
+                self.error(line, str(e))
+                continue
+            if fields['sku'] in batch:
+                # The last row for a sku wins
+                self.stats['duplicates'] += 1
+            batch[fields['sku']] = (line, fields)
+        return batch if seen else None
+
+    def submit_images(self, batch):
+        """Start processing the batch's new image files; returns {source: future}"""
+        futures = {}
+        if not self.image_dir:
+            return futures
+        for line, fields in batch.values():
+            for name in [fields['image']] + fields['images']:
+                source = name and image_path(self.image_dir, name)
+                if source and source not in self.submitted:
+                    self.submitted.add(source)
+                    if self.executor is None:
+                        # spawn: the workers need no Django, and forking a threaded server is unsafe
+                        self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                    futures[source] = self.executor.submit(
+                        process_image, source, str(settings.MEDIA_ROOT),
+                        PRODUCT_IMAGE_MAX_SIZE, PRODUCT_THUMBNAIL_SIZE, self.dry_run,
+                    )
+        return futures
+
+    def stored_image(self, line, name):
+        """Stored name for an image column value, or None (with the error recorded)"""
+        if not self.image_dir:
+            self.error(line, f"image {name!r}: no image directory given")
+            return None
+        source = image_path(self.image_dir, name)
+        if source is None:
+            self.error(line, f"image {name!r} is outside the image directory")
+            return None
+        stored = self.images.get(source)
+        if stored is None:
+            self.stats['image_errors'] += 1
+            self.error(line, f"image {name!r} rejected: {self.image_failures.get(source)}")
+        return stored
+
+    def collect_images(self, futures):
+        for source, future in futures.items():
+            source, stored, error = future.result()
+            self.images[source] = stored
+            if stored:
+                self.stats['images'] += 1
+            else:
+                self.image_failures[source] = error
+
+    def resolve_categories(self, names):
+        missing = names - self.categories.keys()
+        if not missing:
+            return
+        for pk, name in Category.objects.filter(name__in=missing).order_by('-pk').values_list('pk', 'name'):
+            # Oldest category wins when names repeat
+            self.categories[name] = pk
+        new = missing - self.categories.keys()
+        self.stats['categories_created'] += len(new)
+        if self.dry_run:
+            self.categories.update({name: None for name in new})
+        elif new:
+            Category.objects.bulk_create([Category(name=name) for name in sorted(new)])
+            self.categories.update(Category.objects.filter(name__in=new).values_list('name', 'pk'))
+
+    def write_batch(self, batch, futures):
+        self.collect_images(futures)
+        if batch:
+            with transaction.atomic():
+                self.write_products(batch)
+        self.report()
+
+    def write_products(self, batch):
+        existing = dict(Product.objects.filter(sku__in=batch.keys()).values_list('sku', 'image'))
+        self.resolve_categories({fields['category'] for line, fields in batch.values()})
+
+        products = []
+        galleries = {}
+        for sku, (line, fields) in batch.items():
+            image = self.stored_image(line, fields['image']) if fields['image'] else None
+            if image is None:
+                # Keep the current image; new products need one
+                image = existing.get(sku)
+                if not image:
+                    self.stats['failed'] += 1
+                    self.error(line, "no usable image for a new product")
+                    continue
+            gallery = [stored for stored in (self.stored_image(line, name) for name in fields['images']) if stored]
+            # A gallery whose images were all rejected keeps the current one
+            if gallery or fields['clear_gallery']:
+                galleries[sku] = gallery
+            products.append(Product(
+                sku=sku,
+                name=fields['name'],
+                description=fields['description'],
+                price=fields['price'],
+                category_id=self.categories[fields['category']],
+                available=fields['available'],
+                stock=fields['stock'],
+                image=image,
+            ))
+            self.stats['updated' if sku in existing else 'created'] += 1
+
+        if self.dry_run or not products:
+            return
+        Product.objects.bulk_create(
+            products, update_conflicts=True, unique_fields=['sku'], update_fields=UPDATE_FIELDS,
+        )
+        if galleries:
+            ids = dict(Product.objects.filter(sku__in=galleries.keys()).values_list('sku', 'pk'))
+            ProductImage.objects.filter(product_id__in=ids.values()).delete()
+            ProductImage.objects.bulk_create([
+                ProductImage(product_id=ids[sku], image=stored)
+                for sku, images in galleries.items() for stored in images
+            ])
+
+    def measure(self):
+        elapsed = time.perf_counter() - self.started
+        self.stats['elapsed'] = elapsed
+        self.stats['rows_per_sec'] = self.stats['rows'] / elapsed if elapsed else 0.0
+
+    def report(self):
+        self.measure()
+        if self.progress:
+            self.progress(self.stats)
+
+
+def import_products(path, **options):
+    """Import the catalogue file at path; returns the stats dict (see ProductImport)"""
+    return ProductImport(**options).run(path)
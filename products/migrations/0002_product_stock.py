@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-19 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, help_text='Units in stock. Leave empty to sell without stock tracking.', null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSales',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales', serialize=False, to='products.product')),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('trending_score', models.FloatField(default=0)),
+                ('last_sold_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Product sales',
+                'indexes': [models.Index(fields=['-units_sold', 'product'], name='productsales_best_sellers'), models.Index(fields=['-trending_score', 'product'], name='productsales_trending')],
+            },
+        ),
+    ]
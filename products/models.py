@@ -1,4 +1,7 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -12,6 +15,8 @@ class Category(models.Model):
         return self.name
 
 class Product(models.Model):
+    # Catalogue file key for bulk imports (products.importer)
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=200)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -19,6 +24,11 @@ class Product(models.Model):
     image = models.ImageField(upload_to='products/')
     video = models.FileField(upload_to='product_videos/', blank=True, null=True)
     available = models.BooleanField(default=True)
+    stock = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Units in stock. Leave empty to sell without stock tracking."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -30,4 +40,82 @@ class ProductImage(models.Model):
     caption = models.CharField(max_length=200, blank=True)
     
     def __str__(self):
-        return f"Image for {self.product.name}"
\ No newline at end of file
+        return f"Image for {self.product.name}"
+
+
+class PriceChange(models.Model):
+    """Audit trail of bulk price adjustments (products.pricing), one row per product"""
+    product = models.ForeignKey(Product, related_name='price_changes', on_delete=models.CASCADE)
+    old_price = models.DecimalField(max_digits=10, decimal_places=2)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2)
+    changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    reason = models.CharField(max_length=200, blank=True)
+    changed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-changed_at']
+    
+    def __str__(self):
+        return f"{self.product_id}: {self.old_price} -> {self.new_price}"
+
+
+class ProductRecommendation(models.Model):
+    """Top products bought together with a product, rebuilt by products.recommendations"""
+    product = models.ForeignKey(Product, related_name='recommendations', on_delete=models.CASCADE)
+    recommended = models.ForeignKey(Product, related_name='+', on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    # Orders containing both products
+    orders = models.PositiveIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_recommendation_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_id} (#{self.rank})"
+
+
+class ProductSales(models.Model):
+    """Running sales counters behind the best-seller and trending rankings (products.rankings)"""
+    product = models.OneToOneField(Product, primary_key=True, related_name='sales', on_delete=models.CASCADE)
+    units_sold = models.PositiveIntegerField(default=0)
+    # Units sold, each weighted by when it was sold; see products.rankings
+    trending_score = models.FloatField(default=0)
+    last_sold_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Product sales"
+        # The rankings are read in exactly this order
+        indexes = [
+            models.Index(fields=['-units_sold', 'product'], name='productsales_best_sellers'),
+            models.Index(fields=['-trending_score', 'product'], name='productsales_trending'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.units_sold} sold"
+
+
+# Signal to invalidate the catalogue cache whenever catalogue data changes
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_catalogue_cache(sender, instance, **kwargs):
+    """Move the catalogue cache to a new generation once the change is committed"""
+    from .cache import bump_catalogue_generation
+    from .facets import record_change
+    product_id = instance.pk if sender is Product else None
+
+    def bump():
+        generation = bump_catalogue_generation()
+        if generation is not None:
+            # Lets the facet indexes re-read just this product
+            record_change(generation, product_id)
+
+    # Bumping before commit would let a request rebuild entries from the old rows
+    transaction.on_commit(bump)
@@ -0,0 +1,98 @@
+# products/pricing.py
+"""
+Set-based price and availability changes for many products at once (the
+product admin's actions and manage.py adjust_prices).
+
+Each change is a single UPDATE over the selected rows computed with F()
+expressions, not a save() per product. Price changes record one PriceChange
+row per product with bulk_create, and the catalogue generation moves once,
+after the transaction commits. A price change that would take any selected
+price to zero or below is refused as a whole (ValueError), never clamped.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Value
+from django.db.models.functions import Round
+from .cache import bump_catalogue_generation
+from .models import PriceChange, Product
+
+# Products read back per query when writing the audit trail
+AUDIT_CHUNK_SIZE = 1000
+
+
+def price_expression(percent=None, amount=None):
+    """
+    The new price as an expression of the current one: percent (e.g. -10
+    for a 10% cut) or a fixed amount added, rounded to cents
+    """
+    if (percent is None) == (amount is None):
+        raise ValueError("Give exactly one of percent or amount")
+    if percent is not None:
+        new_price = F('price') * Value(1 + Decimal(percent) / 100)
+    else:
+        new_price = F('price') + Value(Decimal(amount))
+    return Round(new_price, 2, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def plain_queryset(queryset):
+    """
+    The same products as a queryset update() and FOR UPDATE accept, whatever
+    ordering, joins or DISTINCT the admin changelist added
+    """
+    return Product.objects.filter(pk__in=queryset.order_by().values('pk'))
+
+
+def priced_out(queryset, percent=None, amount=None):
+    """
+    Products in queryset the change would give a price of zero or below
+    (products already at zero may stay there, e.g. on a percentage change)
+    """
+    return plain_queryset(queryset).alias(
+        new_price=price_expression(percent, amount),
+    ).filter(Q(new_price__lt=0) | Q(new_price=0, price__gt=0))
+
+
+def adjust_prices(queryset, percent=None, amount=None, user=None, reason=''):
+    """
+    Reprice every product in queryset with one UPDATE; returns how many
+    prices changed. Raises ValueError, changing nothing, if any price would
+    end up zero or below.
+    """
+    new_price = price_expression(percent, amount)
+    products = plain_queryset(queryset)
+    with transaction.atomic():
+        old_prices = dict(products.select_for_update().values_list('pk', 'price'))
+        if not old_prices:
+            return 0
+        # Checked under the row locks, so no concurrent edit can slip past it
+        too_low = priced_out(products, percent, amount).count()
+        if too_low:
+            raise ValueError(f"The change would take {too_low} price(s) to zero or below")
+        products.update(price=new_price)
+
+        product_ids = list(old_prices)
+        changes = []
+        for start in range(0, len(product_ids), AUDIT_CHUNK_SIZE):
+            chunk = product_ids[start:start + AUDIT_CHUNK_SIZE]
+            for product_id, price in Product.objects.filter(pk__in=chunk).values_list('pk', 'price'):
+                if price != old_prices[product_id]:
+                    changes.append(PriceChange(
+                        product_id=product_id,
+                        old_price=old_prices[product_id],
+                        new_price=price,
+                        changed_by=user,
+                        reason=reason[:200],
+                    ))
+        PriceChange.objects.bulk_create(changes, batch_size=AUDIT_CHUNK_SIZE)
+        if changes:
+            transaction.on_commit(bump_catalogue_generation)
+    return len(changes)
+
+
+def set_availability(queryset, available):
+    """Mark every product in queryset (un)available with one UPDATE; returns how many changed"""
+    with transaction.atomic():
+        updated = plain_queryset(queryset).exclude(available=available).update(available=available)
+        if updated:
+            transaction.on_commit(bump_catalogue_generation)
+    return updated
@@ -0,0 +1,126 @@
+# products/rankings.py
+"""
+Best-seller and trending rankings, maintained as orders come in.
+
+record_sales() runs inside the checkout transaction
+(OrderManager.create_idempotent) and adds each product's quantity to its
+ProductSales row with F() increments; release_stock() takes a cancelled
+order's units out again the same way. Ranking a page is an ORDER BY on an
+indexed ProductSales column, never a scan of the order history.
+
+Trending uses forward decay: a unit sold at time t adds
+2 ** ((t - TRENDING_EPOCH) / TRENDING_HALF_LIFE_HOURS) to trending_score, so
+a sale one half-life later weighs twice as much. Ordering by the stored sum
+is the same as ordering by scores decayed to the present, and no row has to
+be rewritten as time passes. Products not sold within the last
+TRENDING_WINDOW_DAYS drop out of the trending list.
+
+The weights leave float range about a thousand half-lives after
+TRENDING_EPOCH (some eight years at 72 hours): before then move the epoch
+forward and run manage.py rebuild_rankings, which recomputes every counter
+from the order history (also used to backfill existing orders).
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from .models import Product, ProductSales
+
+logger = logging.getLogger(__name__)
+
+RANKING_SIZE = getattr(settings, 'RANKING_SIZE', 4)
+TRENDING_HALF_LIFE_HOURS = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 72)
+TRENDING_WINDOW_DAYS = getattr(settings, 'TRENDING_WINDOW_DAYS', 14)
+TRENDING_EPOCH = datetime.fromisoformat(getattr(settings, 'TRENDING_EPOCH', '2026-01-01')).replace(
+    tzinfo=dt_timezone.utc,
+)
+
+BEST_SELLERS = 'best_sellers'
+TRENDING = 'trending'
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def trending_weight(when):
+    """What one unit sold at when adds to a trending score"""
+    hours = (when - TRENDING_EPOCH).total_seconds() / 3600
+    return 2.0 ** (hours / TRENDING_HALF_LIFE_HOURS)
+
+
+def sold_quantities(items):
+    """{product_id: quantity} for OrderItem field dicts, duplicate lines merged"""
+    quantities = {}
+    for item in items:
+        quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+    return quantities
+
+
+def record_sales(items, sold_at=None):
+    """Count the units of items (OrderItem field dicts) as sold at sold_at"""
+    sold_at = sold_at or timezone.now()
+    weight = trending_weight(sold_at)
+    quantities = sold_quantities(items)
+    with transaction.atomic():
+        ProductSales.objects.bulk_create(
+            [ProductSales(product_id=product_id) for product_id in quantities], ignore_conflicts=True,
+        )
+        # Fixed order, as in reserve_stock, so concurrent checkouts cannot deadlock
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            ProductSales.objects.filter(product_id=product_id).update(
+                units_sold=F('units_sold') + quantity,
+                trending_score=F('trending_score') + quantity * weight,
+                # Coalesce: GREATEST is NULL with a NULL argument on some databases
+                last_sold_at=Greatest(Coalesce(F('last_sold_at'), Value(sold_at)), Value(sold_at)),
+            )
+
+
+def remove_sales(product_id, quantity, sold_at):
+    """Take back units counted by record_sales(), e.g. for a cancelled order"""
+    ProductSales.objects.filter(product_id=product_id).update(
+        units_sold=Greatest(F('units_sold') - quantity, Value(0)),
+        trending_score=Greatest(F('trending_score') - quantity * trending_weight(sold_at), Value(0.0)),
+    )
+
+
+def ranked_product_ids(kind, category_id=None, limit=RANKING_SIZE):
+    """IDs of the top available products by units sold (BEST_SELLERS) or TRENDING score"""
+    sales = ProductSales.objects.filter(product__available=True)
+    if category_id:
+        sales = sales.filter(product__category_id=category_id)
+    if kind == TRENDING:
+        cutoff = timezone.now() - timedelta(days=TRENDING_WINDOW_DAYS)
+        sales = sales.filter(last_sold_at__gte=cutoff, trending_score__gt=0).order_by('-trending_score', 'product')
+    else:
+        sales = sales.filter(units_sold__gt=0).order_by('-units_sold', 'product')
+    return list(sales.values_list('product_id', flat=True)[:limit])
+
+
+def rebuild_rankings():
+    """
+    Recompute every ProductSales row from the non-cancelled orders; returns
+    the number of products with sales
+    """
+    from orders.models import OrderItem
+
+    totals = {}
+    lines = (
+        OrderItem.objects.exclude(order__status='cancelled')
+        .filter(product_id__in=Product.objects.values('pk'))
+        .values_list('product_id', 'quantity', 'order__created_at')
+    )
+    for product_id, quantity, sold_at in lines.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        units, score, last_sold_at = totals.get(product_id, (0, 0.0, sold_at))
+        totals[product_id] = (units + quantity, score + quantity * trending_weight(sold_at), max(last_sold_at, sold_at))
+
+    with transaction.atomic():
+        ProductSales.objects.all().delete()
+        ProductSales.objects.bulk_create([
+            ProductSales(product_id=product_id, units_sold=units, trending_score=score, last_sold_at=last_sold_at)
+            for product_id, (units, score, last_sold_at) in totals.items()
+        ], batch_size=REBUILD_BATCH_SIZE)
+    logger.info(f"Rankings rebuilt for {len(totals)} products")
+    return len(totals)
@@ -0,0 +1,167 @@
+# products/recommendations.py
+"""
+"Frequently bought together" recommendations from order history.
+
+build_recommendations() (manage.py build_recommendations, run from cron)
+reads every OrderItem line of non-cancelled orders in chunks of chunk_size
+lines, keyed on order_id so an order is never split between chunks. Each
+chunk becomes a sparse orders x products 0/1 matrix X and X.T @ X is added
+to a products x products co-occurrence matrix, so memory grows with the
+number of product pairs ever bought together, not with the order lines.
+
+Pairs sharing at least min_orders orders are scored by cosine similarity
+(orders with both / sqrt(orders with each)), so best-sellers do not crowd
+out everything else, and the top_k per product replace the whole
+ProductRecommendation table in one transaction.
+
+The detail page reads them back with recommended_products(): one query on
+the (product, rank) index.
+"""
+import time
+import logging
+from django.conf import settings
+from django.db import transaction
+from .cache import bump_catalogue_generation
+from .models import Product, ProductRecommendation
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATIONS_TOP_K = getattr(settings, 'RECOMMENDATIONS_TOP_K', 8)
+RECOMMENDATIONS_CHUNK_SIZE = getattr(settings, 'RECOMMENDATIONS_CHUNK_SIZE', 20000)
+RECOMMENDATIONS_MIN_ORDERS = getattr(settings, 'RECOMMENDATIONS_MIN_ORDERS', 2)
+
+WRITE_BATCH_SIZE = 1000
+
+
+def recommended_products(product, limit=RECOMMENDATIONS_TOP_K):
+    """Available products most often bought together with product, best first"""
+    recommendations = (
+        ProductRecommendation.objects
+        .filter(product=product, recommended__available=True)
+        .select_related('recommended')
+        .order_by('rank')[:limit]
+    )
+    return [recommendation.recommended for recommendation in recommendations]
+
+
+def order_line_chunks(chunk_size):
+    """
+    Arrays of (order_id, product_id) rows, ordered by order_id, each holding
+    only complete orders
+    """
+    import numpy as np
+    from orders.models import OrderItem
+
+    lines = OrderItem.objects.exclude(order__status='cancelled').order_by('order_id')
+    last_order = 0
+    while True:
+        rows = np.array(
+            list(lines.filter(order_id__gt=last_order).values_list('order_id', 'product_id')[:chunk_size]),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        if not len(rows):
+            return
+        if len(rows) == chunk_size:
+            # The last order may continue in the next chunk: leave it for that one
+            complete = rows[:, 0] < rows[-1, 0]
+            if complete.any():
+                rows = rows[complete]
+            else:
+                # One order longer than a whole chunk
+                rows = np.array(
+                    list(lines.filter(order_id=rows[-1, 0]).values_list('order_id', 'product_id')), dtype=np.int64,
+                )
+        last_order = int(rows[-1, 0])
+        yield rows
+
+
+def cooccurrence_matrix(product_ids, chunk_size):
+    """
+    Sparse products x products matrix of how many orders contain both (the
+    diagonal: orders containing each), plus the orders and lines read
+    """
+    import numpy as np
+    from scipy import sparse
+
+    size = len(product_ids)
+    matrix = sparse.csr_matrix((size, size), dtype=np.int32)
+    orders = lines = 0
+    for rows in order_line_chunks(chunk_size):
+        lines += len(rows)
+        # Lines for products that no longer exist are dropped
+        columns = np.searchsorted(product_ids, rows[:, 1])
+        known = columns < size
+        known[known] = product_ids[columns[known]] == rows[known, 1]
+        order_index, row_index = np.unique(rows[known, 0], return_inverse=True)
+        orders += len(order_index)
+
+        basket = sparse.csr_matrix(
+            (np.ones(len(row_index), dtype=np.int32), (row_index, columns[known])),
+            shape=(len(order_index), size),
+        )
+        # The same product on two lines of one order still counts once
+        basket.sum_duplicates()
+        basket.data[:] = 1
+        matrix = matrix + (basket.T @ basket).tocsr()
+    return matrix, orders, lines
+
+
+def top_neighbours(matrix, top_k, min_orders):
+    """(product index, neighbour index, rank, orders, score) arrays, top_k per product"""
+    import numpy as np
+
+    totals = matrix.diagonal().astype(np.float64)
+    pairs = matrix.tocoo()
+    keep = (pairs.row != pairs.col) & (pairs.data >= min_orders)
+    rows, columns, counts = pairs.row[keep], pairs.col[keep], pairs.data[keep]
+    scores = counts / np.sqrt(totals[rows] * totals[columns])
+
+    # Per product: best score first, then most orders, then lowest id
+    order = np.lexsort((columns, -counts, -scores, rows))
+    rows, columns, counts, scores = rows[order], columns[order], counts[order], scores[order]
+    ranks = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+    best = ranks < top_k
+    return rows[best], columns[best], ranks[best], counts[best], scores[best]
+
+
+def build_recommendations(top_k=RECOMMENDATIONS_TOP_K, chunk_size=RECOMMENDATIONS_CHUNK_SIZE,
+                          min_orders=RECOMMENDATIONS_MIN_ORDERS):
+    """Recompute the whole ProductRecommendation table; returns a stats dict"""
+    import numpy as np
+
+    started = time.perf_counter()
+    product_ids = np.fromiter(
+        Product.objects.order_by('pk').values_list('pk', flat=True).iterator(), dtype=np.int64,
+    )
+    matrix, orders, lines = cooccurrence_matrix(product_ids, chunk_size)
+    rows, columns, ranks, counts, scores = top_neighbours(matrix, top_k, min_orders)
+
+    with transaction.atomic():
+        ProductRecommendation.objects.all().delete()
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            batch = slice(start, start + WRITE_BATCH_SIZE)
+            ProductRecommendation.objects.bulk_create([
+                ProductRecommendation(
+                    product_id=product, recommended_id=recommended, rank=rank, orders=count, score=score,
+                )
+                for product, recommended, rank, count, score in zip(
+                    product_ids[rows[batch]].tolist(), product_ids[columns[batch]].tolist(),
+                    ranks[batch].tolist(), counts[batch].tolist(), scores[batch].tolist(),
+                )
+            ])
+        # Detail pages are cached inside the catalogue generation
+        transaction.on_commit(bump_catalogue_generation)
+
+    stats = {
+        'orders': orders,
+        'lines': lines,
+        'pairs': int(matrix.nnz - np.count_nonzero(matrix.diagonal())) // 2,
+        'products': len(np.unique(rows)),
+        'recommendations': len(rows),
+        'elapsed': time.perf_counter() - started,
+    }
+    logger.info(
+        f"Recommendations rebuilt from {orders} orders ({lines} lines): "
+        f"{stats['recommendations']} for {stats['products']} products in {stats['elapsed']:.1f}s"
+    )
+    return stats
@@ -1,3 +1,552 @@
+import csv
+import os
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from .models import Category, Product, ProductImage
+
+
+class CatalogueCacheTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_generation_moves_when_the_change_commits(self):
+        from products.cache import get_categories, get_catalogue_generation
+
+        self.assertEqual(get_categories(), [])
+        generation = get_catalogue_generation()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            audio = Category.objects.create(name='Audio')
+            # Until the commit other requests must keep reading the old entries
+            self.assertEqual(get_catalogue_generation(), generation)
+        self.assertEqual(len(callbacks), 1)
+        self.assertGreater(get_catalogue_generation(), generation)
+        self.assertEqual(get_categories(), [audio])
+
+    def test_concurrent_miss_waits_for_the_builder(self):
+        import threading
+        from django.core.cache import cache
+        from products.cache import get_or_build
+
+        key = 'catalogue:test:entry'
+        # Another worker holds the lock and stores its result a moment later
+        cache.add(f"{key}:lock", 1)
+        threading.Timer(0.1, cache.set, (key, 'built elsewhere')).start()
+        builds = []
+        self.assertEqual(get_or_build(key, lambda: builds.append(1) or 'built here'), 'built elsewhere')
+        self.assertEqual(builds, [])
+
+    def test_lock_is_released_and_wait_is_bounded(self):
+        from unittest import mock
+        from django.core.cache import cache
+        from products.cache import get_or_build
+
+        self.assertEqual(get_or_build('catalogue:test:a', lambda: 'a'), 'a')
+        self.assertIsNone(cache.get('catalogue:test:a:lock'))
+        self.assertEqual(get_or_build('catalogue:test:a', lambda: 'rebuilt'), 'a')
+
+        # A lock holder that never finishes: build after the wait rather than fail
+        cache.add('catalogue:test:b:lock', 1)
+        with mock.patch('products.cache.CATALOGUE_LOCK_WAIT', 0.1):
+            self.assertEqual(get_or_build('catalogue:test:b', lambda: 'b'), 'b')
+
+
+class AdminChangelistQueryTests(TestCase):
+    """Product and image changelists must not grow with the catalogue"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'correct-horse-3')
+
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        self.client.force_login(self.admin)
+
+    def add_products(self, count):
+        category = Category.objects.create(name=f"Category {Category.objects.count()}")
+        for number in range(count):
+            product = Product.objects.create(
+                name=f"Product {number}", description='', price=1000, category=category, image='products/p.jpg',
+            )
+            ProductImage.objects.create(product=product, image='product_images/p.jpg')
+
+    def changelist_queries(self, url):
+        # First request fills the cached counts, the second is measured
+        self.assertEqual(self.client.get(url, secure=True).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        pages = [
+            ('/admin/products/product/', 'available__exact=1'),
+            ('/admin/products/productimage/', 'q=Product'),
+        ]
+        for url, query in pages:
+            with self.subTest(url=url):
+                self.add_products(2)
+                small = self.changelist_queries(url)
+                self.add_products(30)
+                self.assertEqual(self.changelist_queries(url), small)
+                self.assertEqual(self.changelist_queries(f"{url}?{query}"), small)
+
+    def test_filters_by_autocomplete_selection(self):
+        self.add_products(3)
+        product = Product.objects.first()
+        response = self.client.get(f"/admin/products/productimage/?product__id__exact={product.pk}", secure=True)
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertContains(response, 'admin-autocomplete-filter')
+        self.assertContains(response, 'js/admin_filters.')
+
+
+class ProductImportTests(TestCase):
+
+    def setUp(self):
+        import tempfile
+        from PIL import Image
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        self.images = os.path.join(self.root, 'images')
+        os.makedirs(self.images)
+        Image.new('RGBA', (3000, 1500), (200, 30, 30, 128)).save(os.path.join(self.images, 'radio.png'))
+        Image.new('RGB', (300, 300), 'blue').save(os.path.join(self.images, 'side.jpg'))
+        with open(os.path.join(self.images, 'broken.jpg'), 'w') as f:
+            f.write('not an image')
+        settings_override = self.settings(MEDIA_ROOT=os.path.join(self.root, 'media'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write_csv(self, rows):
+        path = os.path.join(self.root, 'catalogue.csv')
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['sku', 'name', 'category', 'price', 'stock', 'image', 'images'])
+            writer.writerows(rows)
+        return path
+
+    def run_import(self, rows, **options):
+        from products.importer import import_products
+        return import_products(self.write_csv(rows), image_dir=self.images, batch_size=2, workers=1, **options)
+
+    def test_creates_then_updates_on_sku(self):
+        from products.cache import get_catalogue_generation
+
+        generation = get_catalogue_generation()
+        stats = self.run_import([
+            ['R1', 'Radio', 'Audio', '1,500', '3', 'radio.png', 'side.jpg|broken.jpg'],
+            ['R2', 'Speaker', 'Audio', '900', '', 'radio.png', ''],
+            ['R3', 'Lamp', 'Home', 'cheap', '', 'radio.png', ''],
+            ['R4', 'Fan', 'Home', '100', '', 'broken.jpg', ''],
+        ])
+        self.assertEqual((stats['created'], stats['failed'], stats['image_errors']), (2, 2, 2))
+        self.assertEqual(get_catalogue_generation(), generation + 1)
+
+        radio = Product.objects.get(sku='R1')
+        self.assertEqual((radio.price, radio.stock, radio.category.name), (1500, 3, 'Audio'))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'media', radio.image.name)))
+        self.assertEqual(radio.images.count(), 1)
+
+        # A new price, no image column: the stored image is kept
+        stats = self.run_import([['R1', 'Radio', 'Audio', '1700', '3', '', '']])
+        self.assertEqual((stats['created'], stats['updated']), (0, 1))
+        radio.refresh_from_db()
+        self.assertEqual(radio.price, 1700)
+        self.assertTrue(radio.image.name.startswith('products/import/'))
+        self.assertEqual(Category.objects.filter(name='Audio').count(), 1)
+
+    def test_rejects_values_that_do_not_fit_the_columns(self):
+        bad = [
+            ('NaN', ''), ('Infinity', ''), ('-5', ''), ('1e20', ''), ('1.234', ''),
+            ('100', 'NaN'), ('100', 'inf'), ('100', '2.5'), ('100', '-1'),
+        ]
+        rows = [[f"B{number}", 'Bad', 'Audio', price, stock, 'radio.png', ''] for number, (price, stock) in enumerate(bad)]
+        rows.append(['G1', 'Good', 'Audio', '99999999.99', '7', 'radio.png', ''])
+        stats = self.run_import(rows)
+        self.assertEqual((stats['created'], stats['failed']), (1, len(bad)))
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['G1'])
+
+    def test_gallery_kept_when_every_image_is_rejected(self):
+        self.run_import([['R1', 'Radio', 'Audio', '1500', '', 'radio.png', 'side.jpg']])
+        radio = Product.objects.get(sku='R1')
+        stats = self.run_import([['R1', 'Radio', 'Audio', '1500', '', '', 'broken.jpg|missing.jpg']])
+        self.assertEqual(stats['image_errors'], 2)
+        self.assertEqual(radio.images.count(), 1)
+        self.run_import([['R1', 'Radio', 'Audio', '1500', '', '', '-']])
+        self.assertEqual(radio.images.count(), 0)
+
+    def test_admin_reports_unreadable_upload(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'correct-horse-3')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('catalogue.csv', b'sku,name,category,price\nR1,R\xe4dio,Audio,100\n')
+        response = self.client.post(
+            '/admin/products/product/import/', {'file': upload}, secure=True, HTTP_HOST='localhost', follow=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Unreadable CSV file')
+        self.assertFalse(Product.objects.exists())
+
+    def test_dry_run_writes_nothing(self):
+        stats = self.run_import([['R1', 'Radio', 'Audio', '1500', '', 'radio.png', '']], dry_run=True)
+        self.assertEqual((stats['created'], stats['images']), (1, 1))
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(Category.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'media')))
+
+
+class PricingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.radios = Category.objects.create(name='Radios')
+        cls.lamps = Category.objects.create(name='Lamps')
+        for number, price in enumerate(['1000.00', '250.50', '0.00']):
+            Product.objects.create(
+                name=f"Radio {number}", description='', price=price, category=cls.radios, image='products/p.jpg',
+            )
+        Product.objects.create(name='Lamp', description='', price='400.00', category=cls.lamps, image='products/p.jpg')
+
+    def test_category_reprice_is_one_update_with_audit(self):
+        from products.cache import get_catalogue_generation
+        from products.models import PriceChange
+        from products.pricing import adjust_prices
+
+        generation = get_catalogue_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                changed = adjust_prices(Product.objects.filter(category=self.radios), percent=-10, reason='Sale')
+        self.assertEqual(changed, 2)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(get_catalogue_generation(), generation + 1)
+
+        prices = dict(Product.objects.values_list('name', 'price'))
+        self.assertEqual(str(prices['Radio 0']), '900.00')
+        self.assertEqual(str(prices['Radio 1']), '225.45')
+        self.assertEqual(str(prices['Lamp']), '400.00')
+        change = PriceChange.objects.get(product__name='Radio 0')
+        self.assertEqual((str(change.old_price), str(change.new_price), change.reason), ('1000.00', '900.00', 'Sale'))
+        self.assertEqual(PriceChange.objects.count(), 2)
+
+    def test_changes_that_zero_a_price_are_refused(self):
+        from django.core.management import CommandError, call_command
+        from products.models import PriceChange
+        from products.pricing import adjust_prices
+
+        before = dict(Product.objects.values_list('name', 'price'))
+        for adjustment in ({'amount': -500}, {'amount': Decimal('-250.50')}, {'percent': -100}):
+            with self.subTest(**adjustment), self.assertRaises(ValueError):
+                adjust_prices(Product.objects.all(), **adjustment)
+        with self.assertRaisesMessage(CommandError, 'Radio 1'):
+            call_command('adjust_prices', '--all', '--amount=-300', stdout=StringIO())
+        self.assertEqual(dict(Product.objects.values_list('name', 'price')), before)
+        self.assertFalse(PriceChange.objects.exists())
+
+        # Prices may go down to a cent; one already at zero only stays there
+        self.assertEqual(adjust_prices(Product.objects.exclude(price=0), amount=Decimal('-250.49')), 3)
+        self.assertEqual(str(Product.objects.get(name='Radio 1').price), '0.01')
+        self.assertEqual(adjust_prices(Product.objects.filter(name__in=['Radio 0', 'Radio 2']), percent=-50), 1)
+        with self.assertRaises(ValueError):
+            adjust_prices(Product.objects.filter(price=0), amount=-1)
+        with self.assertRaises(ValueError):
+            adjust_prices(Product.objects.all(), percent=5, amount=5)
+
+    def test_set_availability_and_admin_action(self):
+        from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+        from products.pricing import set_availability
+
+        self.assertEqual(set_availability(Product.objects.filter(category=self.lamps), False), 1)
+        self.assertEqual(set_availability(Product.objects.filter(category=self.lamps), False), 0)
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'correct-horse-3')
+        self.client.force_login(admin)
+        data = {
+            'action': 'adjust_prices', 'select_across': '1', 'index': '0',
+            ACTION_CHECKBOX_NAME: [Product.objects.first().pk],
+        }
+        url = f"/admin/products/product/?category__id__exact={self.radios.pk}"
+        response = self.client.post(url, data, secure=True, HTTP_HOST='localhost')
+        self.assertContains(response, 'name="apply"')
+
+        data.pop('index')
+        data.update({'apply': '1', 'mode': 'amount', 'value': '100', 'reason': 'Duty'})
+        response = self.client.post(url, data, secure=True, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 302)
+        prices = dict(Product.objects.values_list('name', 'price'))
+        self.assertEqual((str(prices['Radio 2']), str(prices['Lamp'])), ('100.00', '400.00'))
+
+        data.update({'mode': 'percent', 'value': '-100'})
+        response = self.client.post(url, data, secure=True, HTTP_HOST='localhost')
+        self.assertContains(response, 'This would take 3 price(s) to zero or below')
+        self.assertEqual(str(Product.objects.get(name='Radio 2').price), '100.00')
+
+
+class RecommendationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from orders.models import Order, OrderItem
+
+        category = Category.objects.create(name='Audio')
+        cls.radio, cls.speaker, cls.cable, cls.lamp = [
+            Product.objects.create(name=name, description='', price=100, category=category, image='products/p.jpg')
+            for name in ('Radio', 'Speaker', 'Cable', 'Lamp')
+        ]
+        baskets = [
+            ([cls.radio, cls.speaker], 'delivered'),
+            ([cls.radio, cls.speaker, cls.speaker], 'pending'),
+            ([cls.radio, cls.speaker, cls.cable], 'pending'),
+            ([cls.radio, cls.cable], 'pending'),
+            ([cls.cable, cls.lamp], 'cancelled'),
+            ([cls.cable, cls.lamp], 'cancelled'),
+        ]
+        for products, status in baskets:
+            order = Order.objects.create(
+                customer_name='Amina', customer_email='amina@example.com', customer_phone='255700000000',
+                customer_address='Dar es Salaam', total_amount=100, status=status,
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=product.pk, product_name=product.name, price=100)
+                for product in products
+            ])
+
+    def build(self, **options):
+        from products.recommendations import build_recommendations
+        with self.captureOnCommitCallbacks(execute=True):
+            return build_recommendations(**{'top_k': 8, 'chunk_size': 3, 'min_orders': 2, **options})
+
+    def test_counts_shared_orders_in_chunks(self):
+        from products.models import ProductRecommendation
+
+        stats = self.build()
+        self.assertEqual((stats['orders'], stats['lines']), (4, 10))
+        rows = list(ProductRecommendation.objects.filter(product=self.radio).values_list('recommended', 'rank', 'orders'))
+        self.assertEqual(rows, [(self.speaker.pk, 0, 3), (self.cable.pk, 1, 2)])
+        # Cable and speaker share one order only; cable and lamp only cancelled ones
+        self.assertEqual(
+            list(ProductRecommendation.objects.filter(product=self.cable).values_list('recommended', flat=True)),
+            [self.radio.pk],
+        )
+        self.assertEqual(self.build(chunk_size=1000, top_k=1)['recommendations'], 3)
+
+    def test_detail_page_lists_available_recommendations(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.build()
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        response = self.client.get(f"/products/{self.radio.pk}/", secure=True)
+        self.assertEqual(response.context['bought_together'], [self.speaker, self.cable])
+        self.assertContains(response, 'Frequently Bought Together')
+        self.client.get('/language/sw/', secure=True)
+        self.assertContains(self.client.get(f"/products/{self.radio.pk}/", secure=True), 'Mara Nyingi Hununuliwa Pamoja')
+
+        Product.objects.filter(pk=self.speaker.pk).update(available=False)
+        from products.recommendations import recommended_products
+        self.assertEqual(recommended_products(self.radio), [self.cable])
+
+
+class RankingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.audio = Category.objects.create(name='Audio')
+        cls.radio, cls.speaker, cls.cable = [
+            Product.objects.create(name=name, description='', price=100, category=cls.audio, image='products/p.jpg')
+            for name in ('Radio', 'Speaker', 'Cable')
+        ]
+
+    def setUp(self):
+        from django.core.cache import cache
+        # Pages and rankings cached by earlier runs would hide these orders
+        cache.clear()
+
+    def order(self, *lines):
+        from orders.models import Order
+
+        order, created = Order.objects.create_idempotent(
+            None,
+            [{'product_id': p.pk, 'product_name': p.name, 'quantity': quantity, 'price': 100} for p, quantity in lines],
+            customer_name='Amina', customer_email='amina@example.com', customer_phone='255700000000',
+            customer_address='Dar es Salaam', total_amount=100,
+        )
+        return order
+
+    def test_checkout_and_cancellation_update_counters(self):
+        from orders.inventory import release_stock
+        from products.models import ProductSales
+        from products.rankings import BEST_SELLERS, TRENDING, ranked_product_ids
+
+        self.order((self.radio, 1), (self.speaker, 2))
+        cancelled = self.order((self.speaker, 1), (self.cable, 5))
+        self.assertEqual(ranked_product_ids(BEST_SELLERS), [self.cable.pk, self.speaker.pk, self.radio.pk])
+
+        release_stock([cancelled])
+        release_stock([cancelled])
+        sales = {row.product_id: row for row in ProductSales.objects.all()}
+        self.assertEqual(sales[self.speaker.pk].units_sold, 2)
+        self.assertEqual(sales[self.cable.pk].units_sold, 0)
+        self.assertEqual(ranked_product_ids(BEST_SELLERS), [self.speaker.pk, self.radio.pk])
+        self.assertEqual(ranked_product_ids(TRENDING), [self.speaker.pk, self.radio.pk])
+
+    def test_trending_favours_recent_sales_within_window(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from products.rankings import BEST_SELLERS, TRENDING, ranked_product_ids, record_sales
+
+        now = timezone.now()
+        record_sales([{'product_id': self.radio.pk, 'quantity': 5}], now - timedelta(days=10))
+        record_sales([{'product_id': self.speaker.pk, 'quantity': 2}], now)
+        record_sales([{'product_id': self.cable.pk, 'quantity': 50}], now - timedelta(days=30))
+        self.assertEqual(ranked_product_ids(BEST_SELLERS), [self.cable.pk, self.radio.pk, self.speaker.pk])
+        self.assertEqual(ranked_product_ids(TRENDING), [self.speaker.pk, self.radio.pk])
+
+    def test_rebuild_matches_incremental_counters(self):
+        from products.models import ProductSales
+        from products.rankings import rebuild_rankings
+
+        self.order((self.radio, 1), (self.speaker, 2))
+        self.order((self.radio, 3))
+        fields = ('product_id', 'units_sold', 'trending_score', 'last_sold_at')
+        incremental = sorted(ProductSales.objects.values_list(*fields))
+        self.assertEqual(rebuild_rankings(), 2)
+        rebuilt = sorted(ProductSales.objects.values_list(*fields))
+        self.assertEqual([row[:2] for row in rebuilt], [row[:2] for row in incremental])
+        for (*_, score, sold_at), (*_, expected_score, expected_sold_at) in zip(rebuilt, incremental):
+            self.assertAlmostEqual(score / expected_score, 1.0)
+            self.assertEqual(sold_at, expected_sold_at)
+
+    def test_listing_pages_show_rankings(self):
+        self.order((self.cable, 2))
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        for url in ('/', '/products/', f"/products/category/{self.audio.pk}/"):
+            with self.subTest(url=url):
+                response = self.client.get(url, secure=True)
+                self.assertEqual(response.context['best_sellers'], [self.cable])
+                self.assertContains(response, 'Best Sellers')
+                self.assertContains(response, 'Trending Now')
+
+        self.client.get('/language/sw/', secure=True)
+        response = self.client.get('/products/', secure=True)
+        self.assertContains(response, 'Zinazouzwa Zaidi')
+        self.assertContains(response, 'Zinazovuma Sasa')
+        self.assertContains(response, 'Weka kwenye Carti')
+        self.assertNotContains(response, 'Best Sellers')
+
+
+class FacetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.audio = Category.objects.create(name='Audio')
+        cls.lights = Category.objects.create(name='Lights')
+        rows = [
+            ('Radio', cls.audio, 30000, True, 'product_videos/radio.mp4'),
+            ('Speaker', cls.audio, 120000, True, ''),
+            ('Amplifier', cls.audio, 2000000, False, ''),
+            ('Lamp', cls.lights, 45000, True, ''),
+            ('Torch', cls.lights, 20000, True, 'product_videos/torch.mp4'),
+        ]
+        cls.products = {
+            name: Product.objects.create(
+                name=name, description='', category=category, price=price, available=available,
+                video=video or None, image='products/p.jpg',
+            )
+            for name, category, price, available, video in rows
+        }
+
+    def setUp(self):
+        from products import facets
+        # Rolled-back test data leaves other tests' products in a live index
+        facets._index = None
+
+    def search(self, category_id=None, **params):
+        from django.http import QueryDict
+        from products.facets import filter_products
+
+        query = QueryDict(mutable=True)
+        for name, values in params.items():
+            query.setlist(name, values)
+        product_ids, facets = filter_products(query, list(Category.objects.order_by('id')), category_id)
+        names = {product.pk: name for name, product in self.products.items()}
+        return [names[product_id] for product_id in product_ids], facets
+
+    def counts(self, options):
+        return {option['key']: option['count'] for option in options}
+
+    def test_filters_intersect_and_counts_skip_their_own_facet(self):
+        names, facets = self.search()
+        self.assertEqual(names, ['Radio', 'Speaker', 'Lamp', 'Torch'])
+
+        names, facets = self.search(price=['0-50000'], video=['1'])
+        self.assertEqual(names, ['Radio', 'Torch'])
+        self.assertEqual(self.counts(facets['price'])['0-50000'], 2)
+        self.assertEqual(self.counts(facets['price'])['100000-250000'], 0)
+        self.assertEqual(self.counts(facets['video']), {'1': 2})
+        self.assertEqual([option['count'] for option in facets['category']], [1, 1])
+
+        names, facets = self.search(self.audio.pk, available=['1', '0'], price=['100000-250000', '1000000-'])
+        self.assertEqual(names, ['Speaker', 'Amplifier'])
+        self.assertEqual(self.counts(facets['available']), {'1': 1, '0': 1})
+        self.assertIn('available=1&available=0', facets['query'])
+
+    def test_index_follows_product_changes(self):
+        from unittest import mock
+        from products.facets import FacetIndex
+        from products.pricing import adjust_prices
+
+        self.search()
+        with mock.patch.object(FacetIndex, 'build', side_effect=AssertionError("full rebuild")):
+            with self.captureOnCommitCallbacks(execute=True):
+                lamp = self.products['Lamp']
+                lamp.price = 60000
+                lamp.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.products['Torch'].delete()
+            names, facets = self.search(price=['50000-100000'])
+            self.assertEqual(names, ['Lamp'])
+            self.assertEqual(self.counts(facets['price'])['0-50000'], 1)
+
+        # Bulk updates record no product ids: the index is rebuilt
+        with self.captureOnCommitCallbacks(execute=True):
+            adjust_prices(Product.objects.filter(category=self.audio), percent=100)
+        names, facets = self.search(price=['50000-100000'])
+        self.assertEqual(names, ['Radio', 'Lamp'])
+
+    def test_index_ignores_uncommitted_changes(self):
+        from django.core.cache import cache
+        from django.db import transaction
+        from products.cache import get_catalogue_generation
+        from products.facets import CHANGES_KEY
+
+        self.search()
+        generation = get_catalogue_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                lamp = self.products['Lamp']
+                lamp.available = False
+                lamp.save()
+                # Not committed yet: the index keeps serving the committed rows
+                self.assertIn('Lamp', self.search()[0])
+            self.assertIsNone(cache.get(CHANGES_KEY.format(generation + 1)))
+        self.assertEqual(cache.get(CHANGES_KEY.format(generation + 1)), [lamp.pk])
+        self.assertNotIn('Lamp', self.search()[0])
+
+    def test_list_page_filters_without_count_queries(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        url = f"/products/category/{self.lights.pk}/?video=1"
+        self.assertEqual(self.client.get(url, secure=True).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{url}&price=0-50000", secure=True)
+        self.assertEqual(response.context['products'], [self.products['Torch']])
+        self.assertContains(response, 'name="video" value="1" id="video-1" checked')
+        self.assertFalse([query for query in queries if 'COUNT' in query['sql'].upper()])
@@ -1,11 +1,17 @@
 # products/views.py
 from django.shortcuts import render, get_object_or_404
-from .models import Product, Category
+from django.http import Http404
+from .models import Product
+from . import cache as catalogue_cache
+from .facets import filter_products
+from .rankings import BEST_SELLERS, TRENDING
+from .recommendations import recommended_products
+from utils.i18n import get_language, ui_text
 from home.models import CategoryBanner, HomepageBanner, FeaturedProduct
 
 def home(request):
     # Get current language from session or cookie
-    current_language = request.session.get('ambertek_language') or request.COOKIES.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
     # Get active banners and content
     homepage_banners = HomepageBanner.objects.filter(is_active=True)
@@ -18,34 +24,38 @@ def home(request):
         'homepage_banners': homepage_banners,
         'category_banners': category_banners,
         'featured_products': featured_products,
+        'best_sellers': catalogue_cache.get_ranked_products(BEST_SELLERS),
+        'trending_products': catalogue_cache.get_ranked_products(TRENDING),
     }
     return render(request, 'index.html', context)
 
 def product_list(request, category_id=None):
-    current_language = request.session.get('ambertek_language') or request.COOKIES.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
-    # Get all active products
-    products = Product.objects.filter(available=True)
-    categories = Category.objects.all()
+    # Categories and active products come from the catalogue cache
+    categories = catalogue_cache.get_categories()
     
     active_category = None
-    active_category_name = "All Products"
+    active_category_name = ui_text('all_products', current_language)
     
     # Filter by category if specified
     if category_id:
-        products = products.filter(category_id=category_id)
+        category_obj = catalogue_cache.get_category(category_id)
+        if category_obj is None:
+            raise Http404("No Category matches the given query.")
         active_category = category_id
-        category_obj = get_object_or_404(Category, id=category_id)
         active_category_name = category_obj.name
-        # Update name for Swahili
-        if current_language == 'sw':
-            active_category_name = category_obj.name
-    elif current_language == 'sw':
-        active_category_name = "Bidhaa Zote"
+    
+    # Filters from the query string, counted from the in-memory facet index
+    product_ids, facets = filter_products(request.GET, categories, category_id, current_language)
+    products = catalogue_cache.get_product_cards(product_ids)
     
     context = {
         'products': products,
+        'best_sellers': catalogue_cache.get_ranked_products(BEST_SELLERS, category_id),
+        'trending_products': catalogue_cache.get_ranked_products(TRENDING, category_id),
         'categories': categories,
+        'facets': facets,
         'active_category': active_category,
         'active_category_name': active_category_name,
         'current_language': current_language,
@@ -54,19 +64,20 @@ def product_list(request, category_id=None):
     return render(request, 'products/product_list.html', context)
 
 def product_detail(request, product_id):
-    current_language = request.session.get('ambertek_language') or request.COOKIES.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
     product = get_object_or_404(Product, id=product_id)
     
     context = {
         'product': product,
+        'bought_together': recommended_products(product),
         'current_language': current_language,
         'cart_items_count': 0,
     }
     return render(request, 'products/product_detail.html', context)
 
 def contact(request):
-    current_language = request.session.get('ambertek_language') or request.COOKIES.get('ambertek_language', 'en')
+    current_language = get_language(request)
     
     context = {
         'current_language': current_language,
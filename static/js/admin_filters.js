@@ -0,0 +1,13 @@
+// Apply an AutocompleteFilter (utils/admin_filters.py) as soon as an object is picked
+(function ($) {
+    $(document).on('change', 'select.admin-autocomplete-filter', function () {
+        var url = new URL(window.location.href);
+        url.searchParams.delete('p');
+        if (this.value) {
+            url.searchParams.set(this.getAttribute('data-lookup'), this.value);
+        } else {
+            url.searchParams.delete(this.getAttribute('data-lookup'));
+        }
+        window.location.href = url.href;
+    });
+})(django.jQuery);
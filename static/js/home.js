@@ -0,0 +1,33 @@
+// Banner carousel functionality
+document.addEventListener('DOMContentLoaded', function() {
+    const bannerDots = document.querySelectorAll('.banner-dot');
+    const bannerContents = document.querySelectorAll('.banner-content');
+    const bannerBackgrounds = document.querySelectorAll('.banner-bg');
+
+    if (bannerDots.length > 0) {
+        bannerDots.forEach(dot => {
+            dot.addEventListener('click', function() {
+                const bannerId = this.getAttribute('data-banner');
+
+                // Hide all banners
+                bannerContents.forEach(content => content.classList.add('d-none'));
+                bannerBackgrounds.forEach(bg => bg.classList.remove('active'));
+
+                // Show selected banner
+                document.getElementById(bannerId).classList.remove('d-none');
+                document.querySelector(`.banner-bg[data-banner="${bannerId}"]`).classList.add('active');
+
+                // Update active dot
+                bannerDots.forEach(d => d.classList.remove('active'));
+                this.classList.add('active');
+            });
+        });
+
+        // Auto-rotate banners every 5 seconds
+        let currentBanner = 0;
+        setInterval(() => {
+            currentBanner = (currentBanner + 1) % bannerDots.length;
+            bannerDots[currentBanner].click();
+        }, 5000);
+    }
+});
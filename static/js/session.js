@@ -0,0 +1,54 @@
+// Fill in the per-user parts of a cached page shell from /session-state.json
+(function () {
+    var root = document.documentElement;
+    var url = root.getAttribute('data-session-state-url');
+    if (!url) {
+        return;
+    }
+
+    var icons = {success: 'check-circle', error: 'exclamation-circle'};
+
+    function showMessages(messages) {
+        var container = document.getElementById('session-messages');
+        if (!container || !messages.length) {
+            return;
+        }
+        messages.forEach(function (message) {
+            var alert = document.createElement('div');
+            alert.className = 'alert alert-' + message.level + ' alert-dismissible fade show';
+            alert.setAttribute('role', 'alert');
+
+            var icon = document.createElement('i');
+            icon.className = 'fas fa-' + (icons[message.level] || 'info-circle') + ' me-2';
+            alert.appendChild(icon);
+            alert.appendChild(document.createTextNode(message.text));
+
+            var close = document.createElement('button');
+            close.type = 'button';
+            close.className = 'btn-close';
+            close.setAttribute('data-bs-dismiss', 'alert');
+            alert.appendChild(close);
+
+            container.appendChild(alert);
+        });
+        container.classList.remove('d-none');
+    }
+
+    fetch(url, {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+        .then(function (response) { return response.json(); })
+        .then(function (state) {
+            root.classList.toggle('session-authenticated', state.authenticated);
+
+            document.querySelectorAll('[data-session="username"]').forEach(function (element) {
+                element.textContent = state.username;
+            });
+            document.querySelectorAll('[data-session="cart_count"]').forEach(function (element) {
+                element.textContent = state.cart_count;
+                element.classList.toggle('d-none', !state.cart_count);
+            });
+            showMessages(state.messages);
+        })
+        .catch(function () {
+            // Leave the anonymous shell as it is
+        });
+})();
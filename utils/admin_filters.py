@@ -0,0 +1,107 @@
+# utils/admin_filters.py
+"""
+Changelist helpers for tables too large to list in full.
+
+AutocompleteFilter replaces the sidebar list of every related object with
+the admin's select2 autocomplete box; the related model's admin needs
+search_fields. ModelAdmins using it must include AutocompleteFilterMixin
+for the select2 media.
+
+CachedBooleanFacetsFilter and CachedCountPaginator keep their COUNT queries,
+which scan the whole table, in the catalogue cache. Entries live inside the
+catalogue generation (products/cache.py), so only use them for catalogue
+models: any Category, Product or ProductImage change refreshes them.
+"""
+import hashlib
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from products.cache import catalogue_key, get_or_build
+
+_ALL = object()
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """Filter on a foreign key by picking one related object from an autocomplete box"""
+
+    template = 'admin/filters/autocomplete.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': _('All'),
+        }
+
+    def rendered_widget(self):
+        # One query, for the selected object's label only
+        return self.form_field.widget.render(
+            self.lookup_kwarg,
+            self.lookup_val,
+            attrs={'class': 'admin-autocomplete-filter', 'data-lookup': self.lookup_kwarg, 'style': 'width: 100%'},
+        )
+
+
+class AutocompleteFilterMixin:
+    """ModelAdmin mixin adding the select2 media AutocompleteFilter needs"""
+
+    @property
+    def media(self):
+        media = super().media
+        for list_filter in self.list_filter:
+            if isinstance(list_filter, (list, tuple)) and issubclass(list_filter[1], AutocompleteFilter):
+                field = self.model._meta.get_field(list_filter[0])
+                media += AutocompleteSelect(field, self.admin_site).media
+                media += forms.Media(js=['js/admin_filters.js'])
+                break
+        return media
+
+
+class CachedBooleanFacetsFilter(admin.BooleanFieldListFilter):
+    """Yes/No filter showing how many rows have each value, from one cached GROUP BY"""
+
+    def choices(self, changelist):
+        counts = get_or_build(
+            catalogue_key('admin-facets', self.field.model._meta.label_lower, self.field_path),
+            lambda: dict(
+                changelist.root_queryset.order_by().values_list(self.field_path).annotate(count=Count('pk'))
+            ),
+        )
+        # BooleanFieldListFilter lists All, Yes, No and, for nullable fields, Unknown
+        for choice, value in zip(super().choices(changelist), (_ALL, True, False, None)):
+            if value is not _ALL:
+                choice['display'] = f"{choice['display']} ({counts.get(value, 0)})"
+            yield choice
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator whose total count is cached per query"""
+
+    @cached_property
+    def count(self):
+        uncached_count = Paginator.count.func
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return uncached_count(self)
+        digest = hashlib.md5(str(query).encode(), usedforsecurity=False).hexdigest()
+        return get_or_build(catalogue_key('admin-count', digest), lambda: uncached_count(self))
@@ -0,0 +1,216 @@
+# utils/compression.py
+"""
+Brotli/gzip compression and optional HTML minification for dynamic responses.
+
+Static files are already precompressed by WhiteNoise; this covers rendered
+pages and JSON. Like Django's GZipMiddleware it varies on Accept-Encoding,
+skips tiny or already-encoded responses and weakens strong ETags.
+
+BREACH: Django masks the CSRF token differently in every response, and pages
+containing a CSRF form also get a random amount of length padding (in the
+gzip header, or as an incompressible HTML comment for Brotli) so response
+sizes cannot be used to guess secrets one byte at a time.
+"""
+import re
+import zlib
+import secrets
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it responses are gzip-compressed only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/xml',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+# Responses smaller than this are sent as they are
+COMPRESSION_MIN_SIZE = getattr(settings, 'COMPRESSION_MIN_SIZE', 500)
+# Brotli 4-5 is close to gzip -6 in CPU cost but noticeably smaller
+BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+GZIP_LEVEL = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+# Upper bound of the random length padding added to pages with CSRF tokens
+BREACH_MAX_PADDING = 100
+
+CSRF_FIELD = b'name="csrfmiddlewaretoken"'
+
+ACCEPT_ENCODING_RE = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+# Blocks whose whitespace is significant or that may be sensitive to it
+PRESERVE_RE = re.compile(rb'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.S | re.I)
+# A whole tag, quoted attribute values included even when they contain '>'
+TAG_RE = re.compile(rb'(<(?:[^>"\']|"[^"]*"|\'[^\']*\')*>)')
+WHITESPACE_RE = re.compile(rb'\s{2,}')
+# Pages with form fields are never minified, and neither is anything under these paths
+FORM_FIELD_RE = re.compile(rb'<(?:input|textarea|select)\b', re.I)
+HTML_MINIFY_EXCLUDE = getattr(settings, 'HTML_MINIFY_EXCLUDE', ['/admin/'])
+
+
+def choose_encoding(accept_encoding):
+    """Best encoding we support from an Accept-Encoding header: 'br', 'gzip' or None"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        match = ACCEPT_ENCODING_RE.fullmatch(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1).lower()] = quality
+
+    wildcard = accepted.get('*', 0)
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+def collapse_whitespace(text):
+    return WHITESPACE_RE.sub(lambda match: b'\n' if b'\n' in match.group() else b' ', text)
+
+
+def minify_html(content):
+    """
+    Collapse runs of whitespace between tags to a single space or newline.
+    Tags and their attribute values are left as they are, and so are <pre>,
+    <textarea>, <script> and <style> blocks. Rendering is unchanged because
+    browsers collapse that whitespace anyway.
+    """
+    parts = PRESERVE_RE.split(content)
+    minified = []
+    # split() returns text, block, tag name, text, block, tag name, ...
+    for index, part in enumerate(parts):
+        kind = index % 3
+        if kind == 0:
+            # TAG_RE.split() alternates text nodes and tags
+            for position, piece in enumerate(TAG_RE.split(part)):
+                minified.append(piece if position % 2 else collapse_whitespace(piece))
+        elif kind == 1:
+            minified.append(part)
+    return b''.join(minified)
+
+
+def should_minify(request, response):
+    """HTML_MINIFY is on and the page has no form fields whose values could be altered"""
+    if not getattr(settings, 'HTML_MINIFY', False):
+        return False
+    if any(request.path.startswith(prefix) for prefix in HTML_MINIFY_EXCLUDE):
+        return False
+    return not FORM_FIELD_RE.search(response.content)
+
+
+def breach_padding():
+    """An HTML comment of random length and incompressible content"""
+    length = secrets.randbelow(BREACH_MAX_PADDING) + 1
+    return b'<!-- ' + secrets.token_hex(length).encode()[:length] + b' -->'
+
+
+def compress(content, encoding, pad=False):
+    """Compress a complete body; pad adds random length (BREACH mitigation)"""
+    if encoding == 'br':
+        if pad:
+            content += breach_padding()
+        return brotli.compress(content, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+    if pad:
+        # Django's "Heal the Breach" random gzip filename
+        return compress_string(content, max_random_bytes=BREACH_MAX_PADDING)
+    return zlib_compress(content)
+
+
+def zlib_compress(content):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(content) + compressor.flush()
+
+
+def _stream_compressor(encoding):
+    """(compress_chunk, finish) callables for one streamed body"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+        # Flush every chunk so the client can render it as it arrives
+        return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+def compress_stream(chunks, encoding):
+    compress_chunk, finish = _stream_compressor(encoding)
+    for chunk in chunks:
+        if chunk:
+            yield compress_chunk(chunk)
+    yield finish()
+
+
+async def acompress_stream(chunks, encoding):
+    compress_chunk, finish = _stream_compressor(encoding)
+    async for chunk in chunks:
+        if chunk:
+            yield compress_chunk(chunk)
+    yield finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress dynamic responses with Brotli or gzip and optionally minify HTML"""
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(response):
+            return response
+
+        is_html = response.get('Content-Type', '').startswith('text/html')
+
+        if not response.streaming:
+            if is_html and should_minify(request, response):
+                response.content = minify_html(response.content)
+                response.headers['Content-Length'] = str(len(response.content))
+            if len(response.content) < COMPRESSION_MIN_SIZE:
+                return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            # pull to a local so a later reassignment cannot loop back on itself
+            original = response.streaming_content
+            if response.is_async:
+                response.streaming_content = acompress_stream(original, encoding)
+            else:
+                response.streaming_content = compress_stream(original, encoding)
+            # The compressed size is unknown until the stream has been sent
+            del response.headers['Content-Length']
+        else:
+            pad = is_html and CSRF_FIELD in response.content
+            compressed = compress(response.content, encoding, pad=pad)
+            # Only worth it if it actually got smaller
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag no longer matches the encoded bytes (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+
+        return response
@@ -1,38 +1,31 @@
 # utils/email_service.py - Fix the logging issue
 import logging
-from django.core.mail import EmailMultiAlternatives, send_mail
+from asgiref.sync import sync_to_async
+from django.core.mail import EmailMessage, EmailMultiAlternatives, send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+try:
+    import aiosmtplib
+except ImportError:
+    # Optional: only needed to send email natively from async views
+    aiosmtplib = None
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
 logger = logging.getLogger(__name__)
 
 class EmailService:
     
     def __init__(self):
-        print("[EmailService] Initialized")
+        logger.debug("[EmailService] Initialized")
     
-    def send_order_confirmation(self, order):
-        """Send order confirmation email to customer"""
-        print(f"[EmailService] Sending order confirmation to: {order.customer_email}")
+    def build_order_confirmation(self, order, order_items):
+        """Subject and plain-text body of the customer confirmation email"""
+        subject = f"Order Confirmation #{order.order_number} - Ambertek Exports"
         
-        try:
-            if not order.customer_email:
-                print("[EmailService] No email address provided")
-                return False
-            
-            # Check if email settings exist
-            if not hasattr(settings, 'EMAIL_BACKEND'):
-                print("[EmailService] EMAIL_BACKEND not set in settings")
-                return False
-            
-            # Get order items
-            from orders.models import OrderItem
-            order_items = OrderItem.objects.filter(order=order)
-            
-            # Prepare simple email
-            subject = f"Order Confirmation #{order.order_number} - Ambertek Exports"
-            
-            message = f"""
+        message = f"""
 Order Confirmation #{order.order_number}
 
 Dear {order.customer_name},
@@ -57,11 +50,11 @@ Phone: {order.customer_phone}
 ORDER ITEMS:
 ------------
 """
-            
-            for item in order_items:
-                message += f"- {item.product_name} x {item.quantity}: TZS {item.price * item.quantity:,.0f}\n"
-            
-            message += f"""
+        
+        for item in order_items:
+            message += f"- {item.product_name} x {item.quantity}: TZS {item.price * item.quantity:,.0f}\n"
+        
+        message += f"""
 Total: TZS {order.total_amount:,.0f}
 
 DELIVERY INFORMATION:
@@ -79,6 +72,63 @@ Thank you for choosing Ambertek Exports!
 Best regards,
 Ambertek Exports Team
 """
+        return subject, message
+    
+    def build_admin_notification(self, order, order_items):
+        """Subject and plain-text body of the admin new-order email"""
+        subject = f"New Order: #{order.order_number}"
+        
+        message = f"""
+NEW ORDER NOTIFICATION
+======================
+
+Order #{order.order_number}
+Customer: {order.customer_name}
+Phone: {order.customer_phone}
+Email: {order.customer_email or 'Not provided'}
+Total: TZS {order.total_amount:,.0f}
+Payment Method: {order.get_payment_method_display()}
+
+SHIPPING ADDRESS:
+{order.customer_address}
+{order.customer_city}, {order.customer_region}
+
+ORDER ITEMS:
+"""
+        
+        for item in order_items:
+            message += f"- {item.product_name} x {item.quantity}: TZS {item.price * item.quantity:,.0f}\n"
+        
+        message += f"""
+TOTAL: TZS {order.total_amount:,.0f}
+
+CUSTOMER NOTES:
+{order.notes or 'No notes provided'}
+
+---
+View order in admin: {getattr(settings, 'SITE_URL', 'http://localhost:8000')}/admin/orders/order/{order.id}/
+"""
+        return subject, message
+    
+    def send_order_confirmation(self, order):
+        """Send order confirmation email to customer"""
+        print(f"[EmailService] Sending order confirmation to: {order.customer_email}")
+        
+        try:
+            if not order.customer_email:
+                print("[EmailService] No email address provided")
+                return False
+            
+            # Check if email settings exist
+            if not hasattr(settings, 'EMAIL_BACKEND'):
+                print("[EmailService] EMAIL_BACKEND not set in settings")
+                return False
+            
+            # Get order items
+            from orders.models import OrderItem
+            order_items = OrderItem.objects.filter(order=order)
+            
+            subject, message = self.build_order_confirmation(order, order_items)
             
             # Send email
             from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'Ambertek Exports <noreply@ambertek.com>')
@@ -106,41 +156,10 @@ Ambertek Exports Team
                 print("[EmailService] No admin email configured")
                 return False
             
-            subject = f"New Order: #{order.order_number}"
-            
-            message = f"""
-NEW ORDER NOTIFICATION
-======================
-
-Order #{order.order_number}
-Customer: {order.customer_name}
-Phone: {order.customer_phone}
-Email: {order.customer_email or 'Not provided'}
-Total: TZS {order.total_amount:,.0f}
-Payment Method: {order.get_payment_method_display()}
-
-SHIPPING ADDRESS:
-{order.customer_address}
-{order.customer_city}, {order.customer_region}
-
-ORDER ITEMS:
-"""
-            
             from orders.models import OrderItem
             order_items = OrderItem.objects.filter(order=order)
             
-            for item in order_items:
-                message += f"- {item.product_name} x {item.quantity}: TZS {item.price * item.quantity:,.0f}\n"
-            
-            message += f"""
-TOTAL: TZS {order.total_amount:,.0f}
-
-CUSTOMER NOTES:
-{order.notes or 'No notes provided'}
-
----
-View order in admin: {getattr(settings, 'SITE_URL', 'http://localhost:8000')}/admin/orders/order/{order.id}/
-"""
+            subject, message = self.build_admin_notification(order, order_items)
             
             from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'Ambertek Exports <noreply@ambertek.com>')
             
@@ -158,6 +177,72 @@ View order in admin: {getattr(settings, 'SITE_URL', 'http://localhost:8000')}/ad
         except Exception as e:
             print(f"[EmailService] Admin notification error: {e}")
             return False
+    
+    async def asend_order_confirmation(self, order):
+        """Async version of send_order_confirmation for ASGI views"""
+        if not order.customer_email:
+            logger.warning("[EmailService] No email address provided")
+            return False
+        
+        from orders.models import OrderItem
+        order_items = [item async for item in OrderItem.objects.filter(order=order)]
+        
+        subject, message = self.build_order_confirmation(order, order_items)
+        sent = await self._asend(subject, message, [order.customer_email])
+        if sent:
+            logger.info(f"[EmailService] Order confirmation sent to {order.customer_email}")
+        return sent
+    
+    async def asend_admin_notification(self, order):
+        """Async version of send_admin_notification for ASGI views"""
+        admin_email = getattr(settings, 'ORDER_NOTIFICATION_EMAIL', None)
+        if not admin_email:
+            logger.warning("[EmailService] No admin email configured")
+            return False
+        
+        from orders.models import OrderItem
+        order_items = [item async for item in OrderItem.objects.filter(order=order)]
+        
+        subject, message = self.build_admin_notification(order, order_items)
+        sent = await self._asend(subject, message, [admin_email])
+        if sent:
+            logger.info(f"[EmailService] Admin notification sent for order #{order.order_number}")
+        return sent
+    
+    async def _asend(self, subject, message, recipient_list):
+        """
+        Send a plain-text email without blocking the event loop.
+        Talks SMTP directly through aiosmtplib when the SMTP backend is
+        configured; any other backend (console, locmem) runs in a thread.
+        """
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'Ambertek Exports <noreply@ambertek.com>')
+        
+        try:
+            if aiosmtplib is not None and settings.EMAIL_BACKEND == SMTP_BACKEND:
+                email = EmailMessage(subject, message, from_email, recipient_list)
+                await aiosmtplib.send(
+                    email.message(),
+                    hostname=settings.EMAIL_HOST,
+                    port=settings.EMAIL_PORT,
+                    username=settings.EMAIL_HOST_USER or None,
+                    password=settings.EMAIL_HOST_PASSWORD or None,
+                    start_tls=settings.EMAIL_USE_TLS,
+                    use_tls=settings.EMAIL_USE_SSL,
+                    timeout=getattr(settings, 'EMAIL_TIMEOUT', None) or 30,
+                )
+            else:
+                await sync_to_async(send_mail, thread_sensitive=False)(
+                    subject=subject,
+                    message=message,
+                    from_email=from_email,
+                    recipient_list=recipient_list,
+                    fail_silently=False,
+                )
+            return True
+            
+        except Exception as e:
+            logger.exception(f"[EmailService] Async send error: {e}")
+            return False
 
-# Create global instance
-email_service = EmailService()
\ No newline at end of file
+# Global instance, created the first time an email is actually sent
+email_service = SimpleLazyObject(EmailService)
\ No newline at end of file
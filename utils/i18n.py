@@ -0,0 +1,357 @@
+# utils/i18n.py
+"""
+Central English/Swahili catalogue for UI and notification strings.
+
+Views call ui_text(key, language, **params) instead of branching on
+current_language == 'sw'; templates get the whole catalogue for the active
+language as {{ ui.<key> }} through the ui_strings context processor.
+Lookups are memoized per process since the catalogue never changes at runtime.
+"""
+from functools import lru_cache
+from types import MappingProxyType
+
+LANGUAGE_KEY = 'ambertek_language'  # Session key and cookie name
+SUPPORTED_LANGUAGES = ('en', 'sw')
+DEFAULT_LANGUAGE = 'en'
+
+# key -> {language: message}. Messages may use str.format placeholders.
+MESSAGES = {
+    # Navigation (base.html)
+    'nav_home': {'en': "Home", 'sw': "Nyumbani"},
+    'nav_products': {'en': "Products", 'sw': "Bidhaa"},
+    'nav_contact': {'en': "Contact", 'sw': "Wasiliana Nasi"},
+    'nav_cart': {'en': "Cart", 'sw': "Carti"},
+    'nav_language': {'en': "English", 'sw': "Swahili"},
+    'nav_language_flag': {'en': "🇺🇸", 'sw': "🇹🇿"},
+    'nav_my_profile': {'en': "My Profile", 'sw': "Wasifu Wangu"},
+    'nav_edit_profile': {'en': "Edit Profile", 'sw': "Badilisha Wasifu"},
+    'nav_change_password': {'en': "Change Password", 'sw': "Badilisha Nywila"},
+    'nav_logout': {'en': "Logout", 'sw': "Toka"},
+    'nav_login': {'en': "Login", 'sw': "Ingia"},
+    'nav_register': {'en': "Register", 'sw': "Jisajili"},
+
+    # Catalogue
+    'all_products': {'en': "All Products", 'sw': "Bidhaa Zote"},
+    'filter_heading': {'en': "Filter", 'sw': "Chuja"},
+    'filter_price': {'en': "Price (TZS)", 'sw': "Bei (TZS)"},
+    'filter_availability': {'en': "Availability", 'sw': "Upatikanaji"},
+    'filter_in_stock': {'en': "In Stock", 'sw': "Ipo Stock"},
+    'filter_out_of_stock': {'en': "Out of Stock", 'sw': "Haipo"},
+    'filter_video': {'en': "Media", 'sw': "Vyombo vya Habari"},
+    'filter_has_video': {'en': "Has video", 'sw': "Ina video"},
+    'filter_apply': {'en': "Apply Filters", 'sw': "Tumia Vichujio"},
+    'filter_clear': {'en': "Clear", 'sw': "Futa"},
+    'best_sellers': {'en': "Best Sellers", 'sw': "Zinazouzwa Zaidi"},
+    'trending': {'en': "Trending Now", 'sw': "Zinazovuma Sasa"},
+    'add_to_cart': {'en': "Add to Cart", 'sw': "Weka kwenye Carti"},
+    'bought_together': {'en': "Frequently Bought Together", 'sw': "Mara Nyingi Hununuliwa Pamoja"},
+
+    # Cart
+    'login_to_order': {
+        'en': "You must login to place an order.",
+        'sw': "Lazima uingie ili kuweka agizo.",
+    },
+    'login_to_add_to_cart': {
+        'en': "You must login to add items to cart!",
+        'sw': "Lazima uingie ili kuongeza bidhaa kwenye gari!",
+    },
+    'login_to_view_cart': {
+        'en': "You must login to view your shopping cart!",
+        'sw': "Lazima uingie ili kuona gari lako la ununuzi!",
+    },
+    'cart_item_added': {
+        'en': "{name} has been added to your cart!",
+        'sw': "{name} imeongezwa kwenye gari la ununuzi!",
+    },
+    'cart_item_updated': {
+        'en': "{name} has been updated in your cart!",
+        'sw': "{name} imesasishwa kwenye gari la ununuzi!",
+    },
+    'cart_item_removed': {
+        'en': "{name} has been removed from your cart!",
+        'sw': "{name} imeondolewa kwenye gari la ununuzi!",
+    },
+    'cart_quantity_updated': {
+        'en': "Quantity updated for {name}",
+        'sw': "Idadi imesasishwa kwa {name}",
+    },
+    'cart_update_error': {
+        'en': "Error updating quantity. Please try again.",
+        'sw': "Hitilafu katika kusasisha idadi. Tafadhali jaribu tena.",
+    },
+    'cart_cleared': {
+        'en': "Your shopping cart has been cleared!",
+        'sw': "Gari la ununuzi limefutwa!",
+    },
+    'cart_empty': {
+        'en': "Shopping cart is empty.",
+        'sw': "Gari la ununuzi ni tupu.",
+    },
+    'your_cart_empty': {
+        'en': "Your shopping cart is empty.",
+        'sw': "Gari lako la ununuzi ni tupu.",
+    },
+    'your_cart_empty_short': {
+        'en': "Your cart is empty",
+        'sw': "Carti yako ni tupu",
+    },
+
+    # Checkout and orders
+    'required_fields': {
+        'en': "Please fill in all required fields.",
+        'sw': "Tafadhali jaza sehemu zote zinazohitajika.",
+    },
+    'order_received': {
+        'en': "Thank you! Your order #{order_number} has been received.",
+        'sw': "Asante! Agizo lako #{order_number} limepokelewa.",
+    },
+    'order_error': {
+        'en': "An error occurred while placing order. Please try again.",
+        'sw': "Hitilafu imetokea wakati wa kuweka agizo. Tafadhali jaribu tena.",
+    },
+    'order_placed': {
+        'en': "Order #{order_number} placed successfully!",
+        'sw': "Oda #{order_number} imewekwa kikamilifu!",
+    },
+    'order_email_sent': {
+        'en': " Confirmation sent to email: {email}",
+        'sw': " Uthibitishaji umetumwa kwenye barua pepe: {email}",
+    },
+    'order_email_not_sent': {
+        'en': " Email not sent, please check spam folder.",
+        'sw': " Barua pepe haikutumwa, angalia spam folder.",
+    },
+    'order_phone_notified': {
+        'en': " We've sent confirmation message to your phone.",
+        'sw': " Tumetuma ujumbe wa uthibitisho kwa simu yako.",
+    },
+    'order_place_failed': {
+        'en': "Error placing order: {error}",
+        'sw': "Hitilafu katika kuweka oda: {error}",
+    },
+    'out_of_stock': {
+        'en': "Sorry, {name} does not have enough stock for your order.",
+        'sw': "Samahani, {name} haina bidhaa za kutosha kwa agizo lako.",
+    },
+    'order_not_found': {
+        'en': "Order not found",
+        'sw': "Oda haipatikani",
+    },
+    'order_number_not_found': {
+        'en': "Order #{order_number} not found",
+        'sw': "Oda #{order_number} haipatikani",
+    },
+
+    # Order notifications (SMS / WhatsApp)
+    'sms_customer': {
+        'en': (
+            "Thank you {customer_name}!\n"
+            "Order #{order_number} received.\n"
+            "Total: TZS {total:,.0f}\n"
+            "Payment: {payment_method}\n"
+            "We'll contact you shortly."
+        ),
+        'sw': (
+            "Ahsante {customer_name}!\n"
+            "Oda #{order_number} imepokelewa.\n"
+            "Jumla: TZS {total:,.0f}\n"
+            "Njia ya malipo: {payment_method}\n"
+            "Tutaungana nawe hivi punde."
+        ),
+    },
+    'whatsapp_customer': {
+        'en': (
+            "*AMBERTEK EXPORT*\n\n"
+            "*New Order Placed!*\n"
+            "-------------------\n"
+            "*Order No:* {order_number}\n"
+            "*Customer:* {customer_name}\n"
+            "*Phone:* {customer_phone}\n"
+            "*Address:* {customer_address}\n"
+            "*Total:* TZS {total:,.0f}\n"
+            "*Payment Method:* {payment_method}\n\n"
+            "*Items:*\n"
+        ),
+        'sw': (
+            "*AMBERTEK EXPORT*\n\n"
+            "*Oda Mpya Imewekwa!*\n"
+            "-------------------\n"
+            "*Nambari ya Oda:* {order_number}\n"
+            "*Mteja:* {customer_name}\n"
+            "*Simu:* {customer_phone}\n"
+            "*Anwani:* {customer_address}\n"
+            "*Jumla:* TZS {total:,.0f}\n"
+            "*Njia ya Malipo:* {payment_method}\n\n"
+            "*Bidhaa:*\n"
+        ),
+    },
+    'whatsapp_item': {
+        'en': "• {name} x{quantity} - TZS {total:,.0f}\n",
+    },
+    'whatsapp_grand_total': {
+        'en': "\n*Grand Total: TZS {total:,.0f}*",
+    },
+    'sms_admin': {
+        'en': (
+            "New Order!\n"
+            "Order #: {order_number}\n"
+            "Customer: {customer_name}\n"
+            "Phone: {customer_phone}\n"
+            "Total: TZS {total:,.0f}"
+        ),
+        'sw': (
+            "Oda Mpya!\n"
+            "Nambari: {order_number}\n"
+            "Mteja: {customer_name}\n"
+            "Simu: {customer_phone}\n"
+            "Jumla: TZS {total:,.0f}"
+        ),
+    },
+
+    # Accounts
+    'already_logged_in': {
+        'en': "You are already logged in.",
+        'sw': "Tayari umeingia.",
+    },
+    'welcome_back': {
+        'en': "Welcome back, {username}!",
+        'sw': "Karibu tena, {username}!",
+    },
+    'invalid_login': {
+        'en': "Invalid username or password.",
+        'sw': "Jina la mtumiaji au nywila sio sahihi.",
+    },
+    'passwords_mismatch': {
+        'en': "Passwords do not match.",
+        'sw': "Nywila hazifanani.",
+    },
+    'password_too_short': {
+        'en': "Password must be at least 8 characters.",
+        'sw': "Nywila lazima iwe na angalau herufi 8.",
+    },
+    'terms_required': {
+        'en': "You must agree to the terms and conditions.",
+        'sw': "Lazima ukubali masharti na mashariti.",
+    },
+    'username_taken': {
+        'en': "Username already taken.",
+        'sw': "Jina la mtumiaji tayari limechukuliwa.",
+    },
+    'email_registered': {
+        'en': "Email already registered.",
+        'sw': "Barua pepe tayari imesajiliwa.",
+    },
+    'account_created': {
+        'en': "Your account has been created successfully! Welcome, {username}!",
+        'sw': "Akaunti yako imeundwa kikamilifu! Karibu, {username}!",
+    },
+    'registration_error': {
+        'en': "An error occurred during registration.",
+        'sw': "Hitilafu imetokea wakati wa kujisajili.",
+    },
+    'logged_out': {
+        'en': "You have been logged out. Goodbye, {username}!",
+        'sw': "Umetoka kwenye akaunti yako. Kwaheri, {username}!",
+    },
+    'email_in_use': {
+        'en': "Email is already used by another user.",
+        'sw': "Barua pepe tayari inatumiwa na mtu mwingine.",
+    },
+    'profile_updated': {
+        'en': "Your profile has been updated successfully!",
+        'sw': "Wasifu wako umesasishwa kikamilifu!",
+    },
+    'profile_update_error': {
+        'en': "An error occurred while updating profile.",
+        'sw': "Hitilafu imetokea wakati wa kusasisha wasifu.",
+    },
+    'old_password_incorrect': {
+        'en': "Old password is incorrect.",
+        'sw': "Nywila ya zamani sio sahihi.",
+    },
+    'new_passwords_mismatch': {
+        'en': "New passwords do not match.",
+        'sw': "Nywila mpya hazifanani.",
+    },
+    'new_password_too_short': {
+        'en': "New password must be at least 8 characters.",
+        'sw': "Nywila mpya lazima iwe na angalau herufi 8.",
+    },
+    'password_changed': {
+        'en': "Your password has been changed successfully!",
+        'sw': "Nywila yako imebadilishwa kikamilifu!",
+    },
+    'password_change_error': {
+        'en': "An error occurred while changing password.",
+        'sw': "Hitilafu imetokea wakati wa kubadilisha nywila.",
+    },
+    'password_reset_sent': {
+        'en': "Password reset email sent to {email}.",
+        'sw': "Ujumbe wa kuweka upya nywila umetumwa kwa {email}.",
+    },
+    'email_not_registered': {
+        'en': "This email is not registered.",
+        'sw': "Barua pepe hii haijasajiliwa.",
+    },
+    'rate_limited': {
+        'en': "Too many requests. Please try again in {seconds} seconds.",
+        'sw': "Maombi mengi mno. Tafadhali jaribu tena baada ya sekunde {seconds}.",
+    },
+}
+
+
+def normalize_language(language_code):
+    """Return language_code if supported, otherwise the default language"""
+    if language_code in SUPPORTED_LANGUAGES:
+        return language_code
+    return DEFAULT_LANGUAGE
+
+
+def get_language(request):
+    """
+    Resolve the visitor's language: session first, then the cookie.
+    The result is memoized on the request so repeated calls are free.
+    """
+    language = getattr(request, '_ambertek_language', None)
+    if language is None:
+        session = getattr(request, 'session', None)
+        language = (session.get(LANGUAGE_KEY) if session is not None else None) \
+            or request.COOKIES.get(LANGUAGE_KEY)
+        language = normalize_language(language)
+        request._ambertek_language = language
+    return language
+
+
+def set_language(request, response, language_code):
+    """Persist language_code in the session and cookie; False if unsupported"""
+    if language_code not in SUPPORTED_LANGUAGES:
+        return False
+    request.session[LANGUAGE_KEY] = language_code
+    request._ambertek_language = language_code
+    response.set_cookie(LANGUAGE_KEY, language_code)
+    return True
+
+
+@lru_cache(maxsize=None)
+def get_message(key, language):
+    """Raw message for key in language, falling back to English"""
+    translations = MESSAGES[key]
+    return translations.get(language) or translations[DEFAULT_LANGUAGE]
+
+
+def ui_text(key, language, **params):
+    """Message for key in language, formatted with params"""
+    message = get_message(key, language)
+    return message.format(**params) if params else message
+
+
+@lru_cache(maxsize=None)
+def get_catalogue(language):
+    """Read-only {key: message} mapping for one language, shared by templates"""
+    language = normalize_language(language)
+    return MappingProxyType({key: get_message(key, language) for key in MESSAGES})
+
+
+def ui_strings(request):
+    """Context processor exposing the catalogue for the active language as `ui`"""
+    return {'ui': get_catalogue(get_language(request))}
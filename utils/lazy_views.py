@@ -0,0 +1,58 @@
+# utils/lazy_views.py
+"""
+Views that import their module on first request instead of at URLconf load.
+
+Cold starts only pay for the URLconf itself; cart, orders and accounts views
+(and everything they import) are loaded by the first request that needs them.
+"""
+from importlib import import_module
+from threading import Lock
+from asgiref.sync import iscoroutinefunction, sync_to_async
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def lazy_view(dotted_path, fallback=None, is_async=False):
+    """
+    Return a view that imports dotted_path ('app.views.name') when first called.
+
+    If the module or view does not exist, fallback is used instead (like the
+    old try/except ImportError in ambertek.urls). Async views must be declared
+    with is_async=True because Django decides how to call a view before it runs.
+    """
+    module_path, view_name = dotted_path.rsplit('.', 1)
+    resolved = []
+    lock = Lock()
+
+    def load():
+        if not resolved:
+            with lock:
+                if not resolved:
+                    try:
+                        target = getattr(import_module(module_path), view_name)
+                    except (ImportError, AttributeError) as e:
+                        if fallback is None:
+                            raise
+                        logger.warning(f"View {dotted_path} unavailable ({e}), using fallback")
+                        target = fallback
+                    resolved.append(target)
+        return resolved[0]
+
+    if is_async:
+        async def view(request, *args, **kwargs):
+            target = load()
+            if not iscoroutinefunction(target):
+                # e.g. a sync fallback
+                target = sync_to_async(target)
+            return await target(request, *args, **kwargs)
+    else:
+        def view(request, *args, **kwargs):
+            return load()(request, *args, **kwargs)
+
+    view.__name__ = view_name
+    view.__qualname__ = view_name
+    view.__module__ = module_path
+    view.lazy_path = dotted_path
+    view.load = load
+    return view
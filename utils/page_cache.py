@@ -0,0 +1,136 @@
+# utils/page_cache.py
+"""
+Full-page cache for catalogue pages.
+
+Pages are keyed by path, query string and language, and live inside the
+catalogue generation (products/cache.py), so any Category, Product,
+ProductImage or banner change invalidates every cached page at once.
+
+Cached pages are rendered as shared "page shells": nothing in them depends
+on the visitor. The login-dependent navigation, cart badge and flash
+messages are left as slots that static/js/session.js fills in from
+/session-state.json (home.views.session_state), so logged-in visitors are
+served the same cached HTML as anonymous ones.
+
+A hit is answered straight from the cache: no view, ORM query or template
+rendering. Visitors without a session cookie never touch the database at
+all; with one the session is still loaded to resolve the language.
+
+CSRF tokens are replaced with a placeholder before a page is stored and a
+fresh token for the current visitor is filled in on every hit.
+"""
+import re
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from products.cache import catalogue_key, CATALOGUE_CACHE_TIMEOUT
+from utils.i18n import get_language
+
+logger = logging.getLogger(__name__)
+
+# Paths served from the page cache
+PAGE_CACHE_PATHS = [
+    re.compile(pattern) for pattern in getattr(settings, 'PAGE_CACHE_PATHS', [
+        r'^/$',
+        r'^/products/$',
+        r'^/products/category/\d+/$',
+        r'^/products/\d+/$',
+        r'^/contact/$',
+    ])
+]
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', CATALOGUE_CACHE_TIMEOUT)
+
+# Response headers kept with a cached page
+STORED_HEADERS = ('Content-Type', 'Content-Language')
+
+CSRF_TOKEN_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b'__PAGE_CACHE_CSRF_TOKEN__'
+
+
+def page_cache_key(request, language):
+    """Cache key for this request's page: path + query string + language"""
+    query = '&'.join(sorted(request.META.get('QUERY_STRING', '').split('&')))
+    digest = hashlib.md5(f"{request.path}?{query}".encode(), usedforsecurity=False).hexdigest()
+    return catalogue_key('page', language, digest)
+
+
+def is_cacheable_path(path):
+    return any(pattern.match(path) for pattern in PAGE_CACHE_PATHS)
+
+
+def bypass_reason(request):
+    """Why this request must not use the page cache, or None"""
+    if request.method not in ('GET', 'HEAD'):
+        return 'method'
+    if not is_cacheable_path(request.path):
+        return 'path'
+    return None
+
+
+def page_shell(request):
+    """Context processor: page_shell is True while rendering a shared page shell"""
+    return {'page_shell': getattr(request, 'page_shell', False)}
+
+
+def page_entry(response):
+    """Cacheable representation of a response, or None if it must not be stored"""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return None
+    cache_control = response.get('Cache-Control', '')
+    if 'private' in cache_control or 'no-store' in cache_control:
+        return None
+    content = CSRF_TOKEN_RE.sub(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content)
+    return {
+        'content': content,
+        'headers': {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+        'csrf': CSRF_PLACEHOLDER in content,
+    }
+
+
+def page_response(request, entry):
+    """Rebuild a response from a cache entry, filling in this visitor's CSRF token"""
+    content = entry['content']
+    if entry['csrf']:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+    response = HttpResponse(content)
+    for name, value in entry['headers'].items():
+        response[name] = value
+    return response
+
+
+class PageCacheMiddleware:
+    """
+    Serve GETs of catalogue pages from the cache, rendering misses as page shells.
+
+    Must come after the session middleware (the language can live in the
+    session) and after CsrfViewMiddleware, which sets the CSRF cookie for
+    tokens handed out on cache hits.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PAGE_CACHE_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled or bypass_reason(request):
+            return self.get_response(request)
+
+        request.page_shell = True
+        key = page_cache_key(request, get_language(request))
+        entry = cache.get(key)
+        if entry is not None:
+            response = page_response(request, entry)
+            response['X-Page-Cache'] = 'hit'
+            return response
+
+        response = self.get_response(request)
+
+        if request.method == 'GET':
+            entry = page_entry(response)
+            if entry is not None:
+                cache.set(key, entry, PAGE_CACHE_TIMEOUT)
+                response['X-Page-Cache'] = 'miss'
+        return response
@@ -0,0 +1,218 @@
+# utils/rate_limit.py
+"""
+Token-bucket rate limiting for endpoints that are expensive or worth abusing
+(login, registration, order placement).
+
+RATE_LIMITS in settings.py defines one rule per endpoint: the paths and
+methods it covers, a refill rate ('10/m' is ten requests a minute), a burst
+(the bucket size) and what requests are counted by - 'ip', or 'user' (the
+logged-in user, else the IP). Each key gets its own bucket and a request
+must fit in all of them. RateLimitMiddleware applies rules by path;
+@rate_limit('name') applies one to the views it decorates, sync or async,
+whatever URLs route to them.
+
+A bucket is stored as its GCRA "theoretical arrival time": one float
+instead of a token count and a timestamp, so a check is one read and one
+write. Every process keeps the last value it saw for each bucket in memory.
+That copy never holds more tokens than the shared one, so when it is empty
+the request is refused without a cache round trip and an abusive client
+costs a dict lookup. Otherwise the shared bucket in the cache (L2 only, see
+the ':ratelimit:' L1_EXCLUDE pattern) decides, so limits hold across
+workers. The shared read-modify-write is not atomic: concurrent requests
+can slip at most one extra request each past an empty bucket.
+
+Refused requests get 429 Too Many Requests with a Retry-After header.
+"""
+import math
+import re
+import time
+import logging
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from utils.i18n import get_language, ui_text
+
+logger = logging.getLogger(__name__)
+
+# Trusted proxies in front of the app; the client address is the entry they
+# appended to X-Forwarded-For (0: use REMOTE_ADDR)
+RATE_LIMIT_PROXY_COUNT = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+# Use the shared cache; False keeps buckets per process
+RATE_LIMIT_SHARED = getattr(settings, 'RATE_LIMIT_SHARED', True)
+RATE_LIMIT_LOCAL_MAX_ENTRIES = getattr(settings, 'RATE_LIMIT_LOCAL_MAX_ENTRIES', 10000)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): requests per period in seconds"""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period[0]]
+
+
+def client_ip(request):
+    if RATE_LIMIT_PROXY_COUNT:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= RATE_LIMIT_PROXY_COUNT:
+            return forwarded[-RATE_LIMIT_PROXY_COUNT]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def request_identity(request, kind):
+    """What a bucket of this kind counts the request against"""
+    if kind == 'user':
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+class LocalBuckets:
+    """Last seen arrival time per bucket for this process, least recently used dropped first"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def set(self, key, tat):
+        with self.lock:
+            self.entries[key] = tat
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_local = LocalBuckets(RATE_LIMIT_LOCAL_MAX_ENTRIES)
+
+
+class RateLimit:
+    """One RATE_LIMITS rule"""
+
+    def __init__(self, name, rate, burst=1, keys=('ip',), paths=(), methods=('POST',), shared=RATE_LIMIT_SHARED):
+        self.name = name
+        count, period = parse_rate(rate)
+        # Seconds to refill one token, and how far ahead of now a bucket may run
+        self.interval = period / count
+        self.tolerance = self.interval * (burst - 1)
+        self.keys = tuple(keys)
+        self.paths = [re.compile(pattern) for pattern in paths]
+        self.methods = {method.upper() for method in methods}
+        self.shared = shared
+
+    def applies_to(self, request):
+        return request.method in self.methods and any(pattern.match(request.path) for pattern in self.paths)
+
+    def bucket_key(self, identity):
+        return f"ratelimit:{self.name}:{identity}"
+
+    def consume(self, identity, now=None):
+        """Take a token from identity's bucket; returns 0, or seconds until one is available"""
+        now = time.time() if now is None else now
+        key = self.bucket_key(identity)
+        tat = _local.get(key)
+        if tat is not None and tat - now > self.tolerance:
+            return tat - self.tolerance - now
+
+        if self.shared:
+            tat = cache.get(key)
+        tat = max(tat or now, now)
+        if tat - now > self.tolerance:
+            _local.set(key, tat)
+            return tat - self.tolerance - now
+
+        tat += self.interval
+        if self.shared:
+            cache.set(key, tat, math.ceil(tat - now))
+        _local.set(key, tat)
+        return 0
+
+    def check(self, request):
+        """0 if the request may proceed, otherwise seconds to wait (longest over its buckets)"""
+        return max(self.consume(request_identity(request, kind)) for kind in self.keys)
+
+
+LIMITS = {
+    name: RateLimit(name, **options)
+    for name, options in getattr(settings, 'RATE_LIMITS', {}).items()
+}
+
+
+def too_many_requests(request, retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    response = HttpResponse(
+        ui_text('rate_limited', get_language(request), seconds=seconds),
+        status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def rate_limit(name):
+    """Apply the RATE_LIMITS rule name to a sync or async view, whatever its URL"""
+    limit = LIMITS[name]
+
+    def refusal(request):
+        """A 429 response if the request is over the limit, else None"""
+        if getattr(settings, 'RATE_LIMIT_ENABLED', True) and request.method in limit.methods:
+            retry_after = limit.check(request)
+            if retry_after:
+                logger.debug(f"Rate limit {name} refused {client_ip(request)}")
+                return too_many_requests(request, retry_after)
+        return None
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # A 'user' key loads request.user, which needs the sync ORM
+                response = await sync_to_async(refusal)(request)
+                if response is not None:
+                    return response
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = refusal(request)
+            if response is not None:
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """
+    Refuse requests over their RATE_LIMITS rule before the view runs.
+
+    Must come after AuthenticationMiddleware for rules keyed by 'user'.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'RATE_LIMIT_ENABLED', True)
+        self.limits = [limit for limit in LIMITS.values() if limit.paths]
+
+    def __call__(self, request):
+        if self.enabled:
+            for limit in self.limits:
+                if limit.applies_to(request):
+                    retry_after = limit.check(request)
+                    if retry_after:
+                        logger.debug(f"Rate limit {limit.name} refused {client_ip(request)}")
+                        return too_many_requests(request, retry_after)
+        return self.get_response(request)
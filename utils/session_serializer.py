@@ -0,0 +1,158 @@
+# utils/session_serializer.py
+"""
+Compact binary session serializer (SESSION_SERIALIZER).
+
+Sessions are saved on every request (SESSION_SAVE_EVERY_REQUEST), so the
+payload is encoded with msgpack instead of JSON:
+
+- well-known session and field names are written as small integers
+  (SHORT_KEYS)
+- a standard cart is packed as one row per line, keyed by the integer
+  product ID, instead of a dict of dicts that repeats every field name
+- Decimal values round-trip exactly instead of failing like they do with
+  JSON
+
+The first byte is a format version. Sessions written by Django's
+JSONSerializer start with '{' and are still read, so existing sessions
+survive the switch. They are rewritten in the compact format on their next
+save.
+"""
+import json
+from decimal import Decimal
+import msgpack
+
+FORMAT_VERSION = 1
+
+# Append only: the position of a name is its code in stored sessions
+SHORT_KEYS = [
+    # Session keys
+    'cart',
+    'checkout_data',
+    'next_url',
+    'ambertek_language',
+    'cart_items_count',
+    '_auth_user_id',
+    '_auth_user_backend',
+    '_auth_user_hash',
+    '_session_expiry',
+    '_messages',
+    # checkout_data fields
+    'customer_name',
+    'customer_email',
+    'customer_phone',
+    'shipping_address',
+    'customer_city',
+    'customer_region',
+    'payment_method',
+    'notes',
+]
+KEY_CODES = {name: code for code, name in enumerate(SHORT_KEYS)}
+
+# Cart line fields in the order they are packed in a row (after product ID)
+CART_FIELDS = ('quantity', 'price', 'name', 'image', 'slug')
+CART_FIELD_SET = set(CART_FIELDS)
+CART_CODE = KEY_CODES['cart']
+
+# msgpack extension type codes
+EXT_DECIMAL = 1
+
+
+def _is_packable_cart(cart):
+    """True if every line of cart has exactly the fields set by the cart views"""
+    return isinstance(cart, dict) and all(
+        isinstance(product_id, str) and product_id.isdigit() and str(int(product_id)) == product_id
+        and isinstance(item, dict) and item.keys() == CART_FIELD_SET
+        for product_id, item in cart.items()
+    )
+
+
+def _pack_cart(cart):
+    """One [product_id, quantity, price, name, image, slug] row per line"""
+    return [
+        [int(product_id), item['quantity'], item['price'], item['name'], item['image'], item['slug']]
+        for product_id, item in cart.items()
+    ]
+
+
+def _unpack_cart(rows):
+    return {
+        str(product_id): {'quantity': quantity, 'price': price, 'name': name, 'image': image, 'slug': slug}
+        for product_id, quantity, price, name, image, slug in rows
+    }
+
+
+def _short_key(key):
+    """Code of a known key; other keys become strings like they would in JSON"""
+    return KEY_CODES.get(key, key if isinstance(key, str) else str(key))
+
+
+def _shorten(value):
+    if isinstance(value, dict):
+        return {_short_key(key): _shorten(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shorten(item) for item in value]
+    return value
+
+
+def _expand(value):
+    if isinstance(value, dict):
+        return {SHORT_KEYS[key] if isinstance(key, int) else key: _expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item) for item in value]
+    return value
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(value).encode())
+    raise TypeError(f"Object of type {type(value).__name__} cannot be stored in the session")
+
+
+def _ext_hook(code, data):
+    if code == EXT_DECIMAL:
+        return Decimal(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def _dumps_v1(session):
+    compact = {}
+    for key, value in session.items():
+        if key == 'cart' and value and _is_packable_cart(value):
+            # A packed cart is a list of rows; an unpackable one stays a map
+            compact[CART_CODE] = _pack_cart(value)
+        else:
+            compact[_short_key(key)] = _shorten(value)
+    return msgpack.packb(compact, default=_default, use_bin_type=True)
+
+
+def _loads_v1(data):
+    compact = msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+    session = {}
+    for key, value in compact.items():
+        if key == CART_CODE and isinstance(value, list):
+            session['cart'] = _unpack_cart(value)
+        else:
+            session[SHORT_KEYS[key] if isinstance(key, int) else key] = _expand(value)
+    return session
+
+
+# Decoder per format version; keep old ones so stored sessions still load
+DECODERS = {
+    FORMAT_VERSION: _loads_v1,
+}
+
+
+class CompactSessionSerializer:
+    """Drop-in for django.core.signing.JSONSerializer"""
+
+    def dumps(self, obj):
+        return bytes([FORMAT_VERSION]) + _dumps_v1(obj)
+
+    def loads(self, data):
+        if data[:1] == b'{':
+            # Written by JSONSerializer before the switch
+            return json.loads(data.decode('latin-1'))
+        decoder = DECODERS.get(data[0])
+        if decoder is None:
+            raise ValueError(f"Unknown session format version {data[0]}")
+        return decoder(data[1:])
@@ -0,0 +1,380 @@
+# utils/tiered_cache.py
+"""
+Two-tier cache backend: a bounded in-process LRU (L1) in front of a shared
+Django cache backend (L2) - files on local disk by default, Redis when
+CACHE_URL is set (see CACHES in settings.py).
+
+Reads are answered from L1 when possible and fall through to L2; writes go
+to both. Every worker process keeps one L1, shared by all of its threads.
+
+Invalidation: delete(), incr()/decr(), touch() and clear() publish a new
+invalidation epoch in L2. Every process compares the epoch at most every
+SYNC_INTERVAL seconds and drops its L1 when it has changed, so an admin edit
+(which bumps the catalogue generation, see products/cache.py) reaches every
+worker within SYNC_INTERVAL seconds. L1 entries also expire after at most
+L1_TIMEOUT seconds as a safety net.
+
+Plain set()/add() do not broadcast. Keys are versioned - VERSION and
+KEY_PREFIX from the cache settings plus the catalogue generation - so changed
+content is written under a new key instead of over an old one. Keys matching
+an L1_EXCLUDE pattern (stampede locks, rate limit buckets and other values
+that change in place) skip L1 and always go to L2.
+
+cache.stats() returns hit/miss/eviction counters per tier for this process.
+"""
+import os
+import re
+import time
+import zlib
+import uuid
+import random
+import pickle
+import logging
+from collections import OrderedDict
+from threading import Lock
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# L2 key holding the current invalidation epoch
+EPOCH_KEY = 'tiered:epoch'
+
+# File in the L2 cache directory that serialises incr() across processes
+INCR_LOCK = 'incr.lock'
+
+DEFAULT_L1_MAX_ENTRIES = 1000
+DEFAULT_L1_TIMEOUT = 60
+DEFAULT_SYNC_INTERVAL = 1.0
+DEFAULT_L1_EXCLUDE = [r':lock$', r':ratelimit:']
+
+_MISSING = object()
+
+# Django creates one backend instance per thread; the L1 stores live here,
+# keyed by cache location, so every thread of a process shares one
+_stores = {}
+_stores_lock = Lock()
+
+
+def raw_key(key, key_prefix, version):
+    """KEY_FUNCTION for the L2 backend: keys arrive already prefixed and versioned"""
+    return key
+
+
+class CountingFileBasedCache(FileBasedCache):
+    """FileBasedCache that counts the entries it culls, for the L2 eviction counter"""
+
+    evictions = 0
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            CountingFileBasedCache.evictions += len(filelist)
+            return self.clear()
+        culled = random.sample(filelist, int(len(filelist) / self._cull_frequency))
+        CountingFileBasedCache.evictions += len(culled)
+        for fname in culled:
+            self._delete(fname)
+
+    def incr(self, key, delta=1, version=None):
+        """
+        Increment under an exclusive lock on INCR_LOCK in the cache directory,
+        so concurrent processes never lose an update, and keep the entry's own
+        expiry (BaseCache.incr re-sets it with the default TIMEOUT)
+        """
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        with open(os.path.join(self._dir, INCR_LOCK), 'ab') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                try:
+                    with open(fname, 'rb') as f:
+                        expiry = pickle.load(f)
+                        if expiry is not None and expiry < time.time():
+                            raise ValueError(f"Key '{key}' not found")
+                        value = pickle.loads(zlib.decompress(f.read())) + delta
+                except (FileNotFoundError, EOFError):
+                    raise ValueError(f"Key '{key}' not found")
+                timeout = None if expiry is None else max(expiry - time.time(), 0.001)
+                self.set(key, value, timeout, version)
+                return value
+            finally:
+                locks.unlock(lock_file)
+
+
+class L1Store:
+    """Process-wide LRU of pickled values with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.epoch = None
+        self.synced_at = 0.0
+        self.counters = {
+            'l1_hits': 0,
+            'l1_misses': 0,
+            'l1_evictions': 0,
+            'l1_invalidations': 0,
+            'l2_hits': 0,
+            'l2_misses': 0,
+            'broadcasts_sent': 0,
+            'broadcasts_received': 0,
+        }
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.counters['l1_hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.counters['l1_misses'] += 1
+        return None
+
+    def set(self, key, pickled, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['l1_evictions'] += 1
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def flush(self):
+        with self.lock:
+            self.counters['l1_invalidations'] += len(self.entries)
+            self.entries.clear()
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+
+class TieredCache(BaseCache):
+    """
+    CACHES backend. OPTIONS:
+        L2              cache settings dict for the shared tier (BACKEND, LOCATION, OPTIONS, ...)
+        L1_MAX_ENTRIES  entries kept in each process
+        L1_TIMEOUT      longest time an entry stays in L1, in seconds
+        SYNC_INTERVAL   how often the invalidation epoch is checked, in seconds
+        L1_EXCLUDE      regexes of keys that are never held in L1
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l1_timeout = options.get('L1_TIMEOUT', DEFAULT_L1_TIMEOUT)
+        self.sync_interval = options.get('SYNC_INTERVAL', DEFAULT_SYNC_INTERVAL)
+        self.l1_exclude = [re.compile(pattern) for pattern in options.get('L1_EXCLUDE', DEFAULT_L1_EXCLUDE)]
+
+        l2 = dict(options.get('L2', {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}))
+        backend = import_string(l2.pop('BACKEND'))
+        l2_location = l2.pop('LOCATION', '')
+        l2.setdefault('TIMEOUT', params.get('TIMEOUT', 300))
+        l2['KEY_FUNCTION'] = raw_key
+        self.l2 = backend(l2_location, l2)
+        self._epoch_key = self.make_key(EPOCH_KEY)
+
+        with _stores_lock:
+            self._l1 = _stores.get(location)
+            if self._l1 is None:
+                self._l1 = _stores[location] = L1Store(options.get('L1_MAX_ENTRIES', DEFAULT_L1_MAX_ENTRIES))
+
+    # Tiers
+
+    def _in_l1(self, key):
+        return not any(pattern.search(key) for pattern in self.l1_exclude)
+
+    def _l1_ttl(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.l1_timeout
+        return max(0, min(self.l1_timeout, timeout - time.time()))
+
+    def _store_l1(self, key, value, timeout=DEFAULT_TIMEOUT):
+        if self._in_l1(key):
+            self._l1.set(key, pickle.dumps(value, self.pickle_protocol), self._l1_ttl(timeout))
+
+    def _sync(self):
+        """Drop L1 if another process published a new invalidation epoch"""
+        store = self._l1
+        now = time.monotonic()
+        if now - store.synced_at < self.sync_interval:
+            return
+        store.synced_at = now
+        epoch = self.l2.get(self._epoch_key)
+        if epoch != store.epoch:
+            if store.epoch is not None or store.entries:
+                store.flush()
+                store.count('broadcasts_received')
+            store.epoch = epoch
+
+    def _broadcast(self):
+        """Tell every other process to drop its L1"""
+        epoch = uuid.uuid4().hex
+        self.l2.set(self._epoch_key, epoch, None)
+        self._l1.epoch = epoch
+        self._l1.count('broadcasts_sent')
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._sync()
+        in_l1 = self._in_l1(key)
+        if in_l1:
+            pickled = self._l1.get(key)
+            if pickled is not None:
+                return pickle.loads(pickled)
+        value = self.l2.get(key, _MISSING)
+        if value is _MISSING:
+            self._l1.count('l2_misses')
+            return default
+        self._l1.count('l2_hits')
+        if in_l1:
+            self._l1.set(key, pickle.dumps(value, self.pickle_protocol), self.l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        made = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = {}
+        missing = []
+        for made_key, key in made.items():
+            pickled = self._l1.get(made_key) if self._in_l1(made_key) else None
+            if pickled is not None:
+                found[key] = pickle.loads(pickled)
+            else:
+                missing.append(made_key)
+        if missing:
+            fetched = self.l2.get_many(missing)
+            self._l1.count('l2_hits', len(fetched))
+            self._l1.count('l2_misses', len(missing) - len(fetched))
+            for made_key, value in fetched.items():
+                self._store_l1(made_key, value, self.l1_timeout)
+                found[made[made_key]] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.l2.set(key, value, self._l2_timeout(timeout))
+        self._store_l1(key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        made = {self.make_and_validate_key(key, version=version): value for key, value in data.items()}
+        failed = set(self.l2.set_many(made, self._l2_timeout(timeout)))
+        for key, value in made.items():
+            if key not in failed:
+                self._store_l1(key, value, timeout)
+        return [key for key in data if self.make_key(key, version=version) in failed]
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        added = self.l2.add(key, value, self._l2_timeout(timeout))
+        if added:
+            self._store_l1(key, value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        touched = self.l2.touch(key, self._l2_timeout(timeout))
+        self._invalidate(key)
+        return touched
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        deleted = self.l2.delete(key)
+        self._invalidate(key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        made = [self.make_and_validate_key(key, version=version) for key in keys]
+        self.l2.delete_many(made)
+        for key in made:
+            self._l1.discard(key)
+        if any(self._in_l1(key) for key in made):
+            self._broadcast()
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._sync()
+        if self._in_l1(key) and self._l1.get(key) is not None:
+            return True
+        return self.l2.has_key(key)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self.l2.incr(key, delta)
+        self._invalidate(key)
+        return value
+
+    def clear(self):
+        self.l2.clear()
+        self._l1.flush()
+        self._broadcast()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def _l2_timeout(self, timeout):
+        # DEFAULT_TIMEOUT means this backend's default, not the L2 backend's
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _invalidate(self, key):
+        self._l1.discard(key)
+        if self._in_l1(key):
+            self._broadcast()
+
+    # Counters
+
+    def stats(self):
+        """Hit/miss/eviction counters per tier for this process"""
+        store = self._l1
+        with store.lock:
+            counters = dict(store.counters)
+            size = len(store.entries)
+        return {
+            'l1': {
+                'hits': counters['l1_hits'],
+                'misses': counters['l1_misses'],
+                'evictions': counters['l1_evictions'],
+                'invalidations': counters['l1_invalidations'],
+                'entries': size,
+                'max_entries': store.max_entries,
+            },
+            'l2': {
+                'hits': counters['l2_hits'],
+                'misses': counters['l2_misses'],
+                'evictions': self._l2_evictions(),
+                'backend': f"{type(self.l2).__module__}.{type(self.l2).__name__}",
+            },
+            'broadcasts': {
+                'sent': counters['broadcasts_sent'],
+                'received': counters['broadcasts_received'],
+            },
+        }
+
+    def _l2_evictions(self):
+        """Entries the shared tier evicted: culled by this process (files) or server-wide (Redis)"""
+        if isinstance(self.l2, CountingFileBasedCache):
+            return CountingFileBasedCache.evictions
+        get_client = getattr(getattr(self.l2, '_cache', None), 'get_client', None)
+        if get_client is None:
+            return None
+        try:
+            return get_client().info('stats').get('evicted_keys')
+        except Exception as e:
+            logger.warning(f"Could not read L2 eviction count: {e}")
+            return None